@@ -1,8 +1,12 @@
-from typing import TypedDict, Dict, Any
+from typing import TypedDict, Dict, Any, Callable, Iterable, Iterator, List, Optional
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
+import queue
+import threading
 import time
-import random
+
+from graph_optimizer import optimize_graph
+from sentiment_lexicon import sentiment_score
 
 
 # state
@@ -16,14 +20,22 @@ class SocialState(TypedDict):
     reddit_sentiment: float
 
     report: str
-    
-    
-# helper sentiment
-def fake_sentiment_score(text: str) -> float:
-    # produce pseudo-random sentiment [-1..1]
-    return round(random.uniform(-1, 1), 2)
 
 
+SOURCES = ('twitter', 'instagram', 'reddit')
+
+
+# partial report handed to streaming subscribers
+class PartialReport(TypedDict):
+    scores: Dict[str, float]   # only the sources that made it in
+    missing: List[str]
+    overall: float
+    report: str
+    elapsed_ms: float
+    partial: bool             # some sources are still missing
+    final: bool               # last report of the stream (all sources in, or the cutoff)
+    
+    
 # collect agents
 def collect_twitter(state: SocialState) -> Dict[str, Any]:
     time.sleep(0.5)
@@ -47,44 +59,51 @@ def collect_reddit(state: SocialState) -> Dict[str, Any]:
 # analyze agents
 def analyze_twitter(state: SocialState) -> Dict[str, Any]:
     text = state['twitter_text']
-    score = fake_sentiment_score(text)
+    score = sentiment_score(text)
     print(f'Analyzed Twitter sentiment: {score}')
     return {'twitter_sentiment': score}
 
 def analyze_instagram(state: SocialState) -> Dict[str, Any]:
     text = state['instagram_text']
-    score = fake_sentiment_score(text)
+    score = sentiment_score(text)
     print(f'Analyzed Instagram sentiment: {score}')
     return {'instagram_sentiment': score}
 
 def analyze_reddit(state: SocialState) -> Dict[str, Any]:
     text = state['reddit_text']
-    score = fake_sentiment_score(text)
+    score = sentiment_score(text)
     print(f'Analyzed Reddit sentiment: {score}')
     return {'reddit_sentiment': score}
 
 
-# aggregate node
-def aggregate_results(state: SocialState) -> SocialState:
-    tw = state.get('twitter_sentiment', 0.0)
-    ig = state.get('instagram_sentiment', 0.0)
-    rd = state.get('reddit_sentiment', 0.0)
+# report helpers
+def build_report(scores: Dict[str, float]) -> str:
+    """Report over whichever sources are in `scores`, labelled with them."""
+    overall = round(sum(scores.values()) / len(scores), 2) if scores else 0.0
+    included = ', '.join(scores) or 'none'
+    missing = [src for src in SOURCES if src not in scores]
+
+    report = f'Overall sentiment: {overall} (sources: {included}'
+    if missing:
+        report += f'; missing: {", ".join(missing)}'
+    report += ')\n'
+    for src in SOURCES:
+        value = scores.get(src, 'n/a')
+        report += f'- {src.capitalize()}: {value}\n'
+    return report
 
-    overall = round((tw + ig + rd) / 3, 2)
 
-    report = (
-        f'Overall sentiment: {overall}\n'
-        f'- Twitter: {tw}\n'
-        f'- Instagram: {ig}\n'
-        f'- Reddit: {rd}\n'
-    )
+# aggregate node
+def aggregate_results(state: SocialState) -> SocialState:
+    scores = {src: state.get(f'{src}_sentiment', 0.0) for src in SOURCES}
+    report = build_report(scores)
 
     print('Aggregated results')
     return {'report': report}
 
 
 # build graph
-def build_aggregator_graph():
+def build_aggregator_graph(optimize: bool = False):
     graph = StateGraph(SocialState)
 
     # Collect
@@ -122,9 +141,133 @@ def build_aggregator_graph():
     # end
     graph.add_edge('aggregate', END)
 
+    if optimize:
+        optimize_graph(graph)   # drops the branch node, START fans out directly
+    return graph.compile()
+
+
+
+# streaming mode
+# In the graph above analyze_* sit one superstep behind collect_*, so even the
+# fastest source is only analyzed once the slowest collector is done. Here
+# each source is ONE node (collect + analyze), and LangGraph streams each
+# node's update as soon as it finishes, so reports can be built incrementally.
+def make_source_node(collect: Callable, analyze: Callable) -> Callable:
+    def source_node(state: SocialState) -> Dict[str, Any]:
+        update = collect(state)
+        update.update(analyze({**state, **update}))
+        return update
+    return source_node
+
+
+def build_streaming_aggregator_graph():
+    graph = StateGraph(SocialState)
+
+    graph.add_node('source_twitter', make_source_node(collect_twitter, analyze_twitter))
+    graph.add_node('source_instagram', make_source_node(collect_instagram, analyze_instagram))
+    graph.add_node('source_reddit', make_source_node(collect_reddit, analyze_reddit))
+    graph.add_node('aggregate', aggregate_results)
+
+    graph.add_node('branch', lambda s: s)
+    graph.set_entry_point('branch')
+
+    for src in SOURCES:
+        graph.add_edge('branch', f'source_{src}')
+        graph.add_edge(f'source_{src}', 'aggregate')
+
+    graph.add_edge('aggregate', END)
+
     return graph.compile()
 
 
+def _partial_report(scores: Dict[str, float], start: float, final: bool) -> PartialReport:
+    missing = [src for src in SOURCES if src not in scores]
+    report = build_report(scores)
+    if final and missing:
+        report = f'PARTIAL report at cutoff, still pending: {", ".join(missing)}\n' + report
+    return {
+        'scores': dict(scores),
+        'missing': missing,
+        'overall': round(sum(scores.values()) / len(scores), 2) if scores else 0.0,
+        'report': report,
+        'elapsed_ms': (time.time() - start) * 1000,
+        'partial': bool(missing),
+        'final': final,
+    }
+
+
+def stream_partial_reports(
+    initial_state: SocialState,
+    deadline_ms: Optional[float] = None,
+    subscribers: Iterable[Callable[[PartialReport], None]] = (),
+    config: Optional[RunnableConfig] = None,
+) -> Iterator[PartialReport]:
+    """Yield a PartialReport every time a source finishes.
+
+    The last report always has final=True. With deadline_ms ("good enough by
+    T ms") the stream stops at the cutoff and that last report is marked
+    partial and lists the sources still pending, even if none made it in.
+    Each subscriber is called with every report as well.
+    """
+    app = build_streaming_aggregator_graph()
+    updates: queue.Queue = queue.Queue()
+    done = object()
+    cancelled = threading.Event()
+
+    def run():
+        try:
+            for chunk in app.stream(initial_state, config=config or RunnableConfig(), stream_mode='updates'):
+                if cancelled.is_set():
+                    break   # closes the stream: no further supersteps are scheduled
+                updates.put(chunk)
+        finally:
+            updates.put(done)
+
+    # the graph runs in a daemon thread, so a cutoff never waits for stragglers.
+    # After the cutoff the run is cancelled: collectors already running finish
+    # their current call (a sync node can't be interrupted) and their results
+    # are dropped, nothing after them (aggregate) runs.
+    threading.Thread(target=run, daemon=True).start()
+
+    start = time.time()
+    scores: Dict[str, float] = {}
+    try:
+        while len(scores) < len(SOURCES):
+            timeout = None
+            if deadline_ms is not None:
+                timeout = deadline_ms / 1000 - (time.time() - start)
+                if timeout <= 0:
+                    break
+            try:
+                chunk = updates.get(timeout=timeout)
+            except queue.Empty:
+                break
+            if chunk is done:
+                break
+
+            arrived = False
+            for node, update in chunk.items():
+                src = node.removeprefix('source_')
+                if src in SOURCES and f'{src}_sentiment' in (update or {}):
+                    scores[src] = update[f'{src}_sentiment']
+                    arrived = True
+            if not arrived:
+                continue
+
+            partial = _partial_report(scores, start, final=len(scores) == len(SOURCES))
+            for subscriber in subscribers:
+                subscriber(partial)
+            yield partial
+
+        # cutoff (or the run ended early): one closing report with what is pending
+        if len(scores) < len(SOURCES):
+            partial = _partial_report(scores, start, final=True)
+            for subscriber in subscribers:
+                subscriber(partial)
+            yield partial
+    finally:
+        cancelled.set()
+
 
 # demo
 def main():
@@ -152,6 +295,24 @@ def main():
     print('\n=== Final Report ===\n')
     print(result['report'])
 
+    # streaming: partial reports as sources arrive, good enough by 800 ms
+    print('\n=== Running Streaming Aggregator (deadline 800 ms) ===\n')
+    last = None
+    for partial in stream_partial_reports(initial_state, deadline_ms=800):
+        last = partial
+        print(f"[{partial['elapsed_ms']:.0f} ms] partial overall={partial['overall']} "
+              f"sources={list(partial['scores'])}")
+
+    print('\n=== Report at cutoff ===\n')
+    print(last['report'])
+
+    # nothing arrives before a 300 ms cutoff -> still one report, listing what is pending
+    print('\n=== Streaming Aggregator (deadline 300 ms) ===\n')
+    for partial in stream_partial_reports(initial_state, deadline_ms=300):
+        print(f"[{partial['elapsed_ms']:.0f} ms] final={partial['final']} partial={partial['partial']} "
+              f"missing={partial['missing']}")
+        print(partial['report'])
+
 
 if __name__ == '__main__':
     main()
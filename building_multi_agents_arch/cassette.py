@@ -0,0 +1,326 @@
+import argparse
+import asyncio
+import gzip
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Sequence
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import BaseMessage, message_to_dict, messages_from_dict
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+# Concept:
+#   - Record: CassetteRecorder is a callback handler. Passed to a live run
+#     (Ollama + Tavily) it captures every model request/response and every
+#     tool input/output, with timings, into a gzipped JSON cassette.
+#   - Requests are stored as a fingerprint (hash of roles, contents and tool
+#     calls, ids left out), so the file stays small and ids that differ from
+#     run to run don't break matching.
+#   - Replay: ReplayChatModel answers each request with the recorded response
+#     for its fingerprint, replay_tool() does the same for tools. Both run at
+#     memory speed, or with the recorded timings (timing=True, speed=...).
+#   - One ReplayChatModel serves every agent: the system prompt is part of the
+#     request, so each agent's requests have their own fingerprints.
+
+CASSETTE_VERSION = 1
+
+
+def _canonical(message: BaseMessage) -> list:
+    calls = [[c["name"], c["args"]] for c in getattr(message, "tool_calls", None) or []]
+    return [message.type, message.content, calls, getattr(message, "name", None) if message.type == "tool" else None]
+
+
+def request_fingerprint(messages: Sequence[BaseMessage]) -> str:
+    payload = json.dumps([_canonical(m) for m in messages], sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode()).hexdigest()[:32]
+
+
+def tool_key(name: str, inputs: dict) -> str:
+    return json.dumps([name, inputs], sort_keys=True, default=str)
+
+
+class Cassette:
+    def __init__(self, llm=None, tools=None, tool_descriptions=None, meta=None):
+        self.llm: dict[str, list] = llm or {}           # fingerprint -> [{"response", "seconds"}]
+        self.tools: dict[str, list] = tools or {}       # tool key -> [{"output", "seconds"}]
+        self.tool_descriptions: dict[str, str] = tool_descriptions or {}
+        self.meta: dict[str, Any] = meta or {}
+
+    def save(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        payload = {
+            "version": CASSETTE_VERSION,
+            "meta": self.meta,
+            "llm": self.llm,
+            "tools": self.tools,
+            "tool_descriptions": self.tool_descriptions,
+        }
+        with gzip.open(path, "wt", encoding="utf-8") as f:
+            json.dump(payload, f, separators=(",", ":"), default=str)
+        return path
+
+    @classmethod
+    def load(cls, path: str) -> "Cassette":
+        with gzip.open(path, "rt", encoding="utf-8") as f:
+            payload = json.load(f)
+        if payload.get("version") != CASSETTE_VERSION:
+            raise ValueError(f"{path}: unsupported cassette version {payload.get('version')}")
+        return cls(payload["llm"], payload["tools"], payload.get("tool_descriptions"), payload.get("meta"))
+
+    def stats(self) -> dict:
+        return {
+            "llm_requests": sum(len(v) for v in self.llm.values()),
+            "tool_calls": sum(len(v) for v in self.tools.values()),
+            "llm_seconds": sum(e["seconds"] for v in self.llm.values() for e in v),
+            "tool_seconds": sum(e["seconds"] for v in self.tools.values() for e in v),
+        }
+
+
+# record
+class CassetteRecorder(BaseCallbackHandler):
+    def __init__(self, meta: dict | None = None):
+        self.cassette = Cassette(meta=meta)
+        self._pending: dict = {}
+        self._lock = threading.Lock()
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        with self._lock:
+            self._pending[run_id] = (request_fingerprint(messages[0]), time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            key, start = self._pending.pop(run_id, (None, None))
+            if key is None:
+                return
+            message = response.generations[0][0].message
+            self.cassette.llm.setdefault(key, []).append({
+                "response": message_to_dict(message),
+                "seconds": time.perf_counter() - start,
+            })
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._pending.pop(run_id, None)
+
+    def on_tool_start(self, serialized, input_str, *, run_id, inputs=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        with self._lock:
+            self._pending[run_id] = (name, inputs if inputs is not None else input_str, time.perf_counter())
+            self.cassette.tool_descriptions.setdefault(name, (serialized or {}).get("description", ""))
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        from langgraph.types import Command
+
+        with self._lock:
+            name, inputs, start = self._pending.pop(run_id, (None, None, None))
+            # handoff tools return a Command, they run locally and aren't replayed
+            if name is None or isinstance(output, Command):
+                return
+            self.cassette.tools.setdefault(tool_key(name, inputs), []).append({
+                "output": getattr(output, "content", output),
+                "seconds": time.perf_counter() - start,
+            })
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._pending.pop(run_id, None)
+
+
+# replay
+class _Player:
+    """Serves recorded entries per key in order, the last one repeats."""
+
+    def __init__(self, entries: dict[str, list]):
+        self.entries = entries
+        self.cursors: dict[str, int] = defaultdict(int)
+        self.lock = threading.Lock()
+
+    def next(self, key: str, what: str) -> dict:
+        with self.lock:
+            recorded = self.entries.get(key)
+            if not recorded:
+                raise KeyError(f"{what} not in cassette (did the graph or prompts change?)")
+            index = min(self.cursors[key], len(recorded) - 1)
+            self.cursors[key] += 1
+            return recorded[index]
+
+
+class ReplayChatModel(BaseChatModel):
+    """Chat model that answers from a cassette instead of a server."""
+
+    cassette: Any
+    timing: bool = False      # sleep for the recorded model time
+    speed: float = 1.0        # >1 replays recorded timings faster
+
+    _player: _Player = PrivateAttr()
+
+    def model_post_init(self, __context: Any) -> None:
+        self._player = _Player(self.cassette.llm)
+
+    @property
+    def _llm_type(self) -> str:
+        return "replay-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools])
+
+    def _replay(self, messages):
+        entry = self._player.next(request_fingerprint(messages), "model request")
+        message = messages_from_dict([entry["response"]])[0]
+        return message, entry["seconds"] / self.speed if self.timing else 0.0
+
+    def _generate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, delay = self._replay(messages)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, **kwargs) -> ChatResult:
+        message, delay = self._replay(messages)
+        if delay:
+            await asyncio.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+
+def replay_tool(cassette: Cassette, name: str, template=None, timing: bool = False, speed: float = 1.0):
+    """A tool named `name` that returns recorded outputs. `template` (a tool) gives
+    the description / argument schema, otherwise they come from the cassette."""
+    from langchain_core.tools import StructuredTool
+    from pydantic import create_model
+
+    player = _Player(cassette.tools)
+
+    def run(**inputs):
+        entry = player.next(tool_key(name, inputs), f"tool call {name}({inputs})")
+        if timing:
+            time.sleep(entry["seconds"] / speed)
+        return entry["output"]
+
+    if template is not None:
+        description, args_schema = template.description, template.args_schema
+    else:
+        recorded = [json.loads(k)[1] for k in cassette.tools if json.loads(k)[0] == name]
+        fields = {arg: (Any, ...) for arg in (recorded[0] if recorded and isinstance(recorded[0], dict) else {})}
+        description = cassette.tool_descriptions.get(name) or f"Replayed {name}."
+        args_schema = create_model(f"{name}_args", **fields)
+
+    return StructuredTool.from_function(run, name=name, description=description, args_schema=args_schema)
+
+
+# graphs
+GRAPH_KINDS = ("supervisor", "custom_handoff", "swarm")
+LOCAL_TOOLS = {"add", "multiply", "divide", "calculate"}   # deterministic, not replayed
+
+
+def build_graph(kind: str, model, web_search):
+    """One of the three LLM graphs with every agent on `model`."""
+    import ollama_supervisor_agents
+    import supervisor_custom_handoff
+    import swarm_agents
+
+    if kind == "supervisor":
+        m = ollama_supervisor_agents
+        return m.build_supervisor_agent(model, m.build_research_agent(model, web_search), m.build_math_agent(model))
+    if kind == "custom_handoff":
+        m = supervisor_custom_handoff
+        return m.build_supervisor_graph(
+            m.build_supervisor_agent(model), m.build_research_agent(model, web_search), m.build_math_agent(model)
+        )
+    if kind == "swarm":
+        m = swarm_agents
+        return m.build_swarm_agent(m.build_research_agent(model, web_search), m.build_math_agent(model))
+    raise ValueError(f"unknown graph kind: {kind}")
+
+
+QUERY = (
+    "find US and New York state GDP in 2022. "
+    "what % of US GDP was New York state?"
+)
+
+
+def record(kind: str, path: str, live: bool, latency: float):
+    from langchain_core.runnables import RunnableConfig
+
+    if live:
+        import ollama_supervisor_agents
+
+        graph = build_graph(kind, ollama_supervisor_agents.get_model(), ollama_supervisor_agents.get_web_search())
+    else:
+        from offline_load_test import build_offline_graphs
+
+        graph, _ = build_offline_graphs(latency)[kind]
+
+    recorder = CassetteRecorder(meta={"graph": kind, "query": QUERY, "live": live})
+    start = time.perf_counter()
+    result = graph.invoke({"messages": [{"role": "user", "content": QUERY}]}, config=RunnableConfig(callbacks=[recorder]))
+    recorder.cassette.meta["wall_seconds"] = time.perf_counter() - start
+    recorder.cassette.save(path)
+    return result, recorder.cassette
+
+
+def replay(kind: str, path: str, timing: bool = False, speed: float = 1.0, runs: int = 1):
+    from langchain_core.runnables import RunnableConfig
+
+    cassette = Cassette.load(path)
+    tool_names = {json.loads(k)[0] for k in cassette.tools}
+    search_name = next(iter(tool_names - LOCAL_TOOLS), "web_search")
+
+    durations, result = [], None
+    for _ in range(runs):
+        # fresh players every run, so each run replays the cassette from the start
+        model = ReplayChatModel(cassette=cassette, timing=timing, speed=speed)
+        graph = build_graph(kind, model, replay_tool(cassette, search_name, timing=timing, speed=speed))
+        start = time.perf_counter()
+        result = graph.invoke(
+            {"messages": [{"role": "user", "content": cassette.meta.get("query", QUERY)}]},
+            config=RunnableConfig(),
+        )
+        durations.append(time.perf_counter() - start)
+    return result, durations
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Record / replay cassettes of the LLM graphs.")
+    parser.add_argument("mode", choices=("record", "replay", "demo"), nargs="?", default="demo")
+    parser.add_argument("--graph", choices=GRAPH_KINDS, default="swarm")
+    parser.add_argument("--cassette", default=None)
+    parser.add_argument("--live", action="store_true", help="record against Ollama + Tavily")
+    parser.add_argument("--latency", type=float, default=0.2, help="offline recording: seconds per model call")
+    parser.add_argument("--timing", action="store_true", help="replay with the recorded timings")
+    parser.add_argument("--speed", type=float, default=1.0)
+    parser.add_argument("--runs", type=int, default=20)
+    args = parser.parse_args()
+
+    kinds = GRAPH_KINDS if args.mode == "demo" else (args.graph,)
+    for kind in kinds:
+        path = args.cassette or os.path.join("cassettes", f"{kind}.json.gz")
+        recorded = None
+        if args.mode in ("record", "demo"):
+            recorded, cassette = record(kind, path, args.live, args.latency)
+            stats = cassette.stats()
+            print(
+                f"\n=== {kind}: recorded {stats['llm_requests']} model calls, {stats['tool_calls']} tool calls "
+                f"in {cassette.meta['wall_seconds']:.2f}s -> {path} ({os.path.getsize(path)} bytes) ==="
+            )
+        if args.mode in ("replay", "demo"):
+            replayed, fast = replay(kind, path, runs=args.runs)
+            if recorded is not None:
+                same = [m.content for m in recorded["messages"]] == [m.content for m in replayed["messages"]]
+                assert same, "replayed run diverged from the recording"
+            print(f"replay, memory speed : {sum(fast) / len(fast) * 1000:7.1f}ms per run ({len(fast)} runs)")
+            if args.timing or args.mode == "demo":
+                _, timed = replay(kind, path, timing=True, speed=args.speed)
+                print(f"replay, timed (x{args.speed:g})  : {timed[0] * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
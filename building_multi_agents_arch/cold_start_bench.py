@@ -0,0 +1,74 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+
+# Concept:
+#   - Every autoscaled worker pays interpreter start + module import + first
+#     graph build before it can serve a request.
+#   - Each sample runs in a fresh interpreter so nothing is cached between runs.
+#   - "import" is what a worker pays just to load the module, "first build" is
+#     the cost of the first get_*() call (deferred imports + graph compile).
+
+MODULES = {
+    "ollama_supervisor_agents": "get_supervisor_agent",
+    "supervisor_custom_handoff": "get_supervisor_graph",
+    "swarm_agents": "get_swarm_agent",
+}
+
+SNIPPET = """
+import json, time
+t0 = time.perf_counter()
+import {module}
+t1 = time.perf_counter()
+{module}.{factory}()
+t2 = time.perf_counter()
+print(json.dumps({{"import": t1 - t0, "first_build": t2 - t1}}))
+"""
+
+
+def measure(module: str, factory: str, runs: int):
+    here = os.path.dirname(os.path.abspath(__file__))
+    env = dict(os.environ)
+    # the Tavily tool is constructed but never called
+    env.setdefault("TAVILY_API_KEY", "cold-start-bench")
+
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        out = subprocess.run(
+            [sys.executable, "-W", "ignore", "-c", SNIPPET.format(module=module, factory=factory)],
+            cwd=here,
+            env=env,
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        sample = json.loads(out.stdout.strip().splitlines()[-1])
+        sample["process"] = time.perf_counter() - start
+        samples.append(sample)
+
+    return {key: statistics.median(s[key] for s in samples) for key in samples[0]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure cold-start time of the LLM modules.")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    print(f"=== Cold start (median of {args.runs} fresh interpreters) ===\n")
+    print(f"{'module':28s} {'import':>10s} {'first build':>12s} {'process':>10s}")
+    for module, factory in MODULES.items():
+        stats = measure(module, factory, args.runs)
+        print(
+            f"{module:28s} {stats['import'] * 1000:8.1f}ms "
+            f"{stats['first_build'] * 1000:10.1f}ms {stats['process'] * 1000:8.1f}ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,179 @@
+import asyncio
+import json
+import threading
+import time
+import uuid
+from typing import Any, Sequence
+
+from langchain_core.language_models.chat_models import BaseChatModel
+from langchain_core.messages import AIMessage, BaseMessage, SystemMessage
+from langchain_core.outputs import ChatGeneration, ChatResult
+from langchain_core.utils.function_calling import convert_to_openai_tool
+from pydantic import PrivateAttr
+
+
+# Concept:
+#   - ScriptedChatModel is a drop-in replacement for ChatOllama that never
+#     talks to a server. It replays a fixed list of steps (text replies,
+#     tool calls, handoffs) in order.
+#   - Every conversation replays the script from the beginning. A conversation
+#     is identified by its first non-system message, so many sessions can run
+#     concurrently through the same compiled graph.
+#   - latency / tokens_per_second simulate a real model so graph overhead,
+#     handoff cost and concurrency can be measured without the LLM noise.
+
+
+# script steps
+def reply(content: str) -> AIMessage:
+    """A plain text answer."""
+    return AIMessage(content=content)
+
+
+def tool_call(name: str, args: dict[str, Any] | None = None, content: str = "") -> AIMessage:
+    """An answer that calls a single tool."""
+    return AIMessage(
+        content=content,
+        tool_calls=[{"name": name, "args": args or {}, "id": "", "type": "tool_call"}],
+    )
+
+
+def handoff(agent_name: str) -> AIMessage:
+    """An answer that calls the `transfer_to_<agent_name>` handoff tool."""
+    return tool_call(f"transfer_to_{agent_name}")
+
+
+def count_tokens(text: str) -> int:
+    """Rough whitespace token count, good enough for simulated usage."""
+    return len(text.split())
+
+
+def _message_tokens(message: BaseMessage) -> int:
+    tokens = count_tokens(str(message.content))
+    for call in getattr(message, "tool_calls", None) or []:
+        tokens += 1 + count_tokens(json.dumps(call["args"]))
+    return tokens
+
+
+class ScriptedChatModel(BaseChatModel):
+    """Deterministic chat model that replays `script` once per conversation."""
+
+    script: list[AIMessage]
+    latency: float = 0.0                    # seconds before the first token
+    tokens_per_second: float | None = None  # None -> output is instant
+    cycle: bool = False                     # restart the script when exhausted
+    model_name: str = "scripted"
+
+    _cursors: dict[str, int] = PrivateAttr(default_factory=dict)
+    _lock: threading.Lock = PrivateAttr(default_factory=threading.Lock)
+
+    @property
+    def _llm_type(self) -> str:
+        return "scripted-chat-model"
+
+    def bind_tools(self, tools: Sequence[Any], **kwargs: Any):
+        return self.bind(tools=[convert_to_openai_tool(t) for t in tools])
+
+    @property
+    def calls(self) -> int:
+        """Number of model calls served since the last reset."""
+        with self._lock:
+            return sum(self._cursors.values())
+
+    def reset(self) -> None:
+        """Forget all conversations, every session starts at step 0 again."""
+        with self._lock:
+            self._cursors.clear()
+
+    # script replay
+    def _session_key(self, messages: list[BaseMessage]) -> str:
+        for m in messages:
+            if not isinstance(m, SystemMessage):
+                return m.id or str(m.content)
+        return ""
+
+    def _next_step(self, messages: list[BaseMessage]) -> tuple[AIMessage, int]:
+        """The next scripted answer and the cursor position it consumed."""
+        key = self._session_key(messages)
+        with self._lock:
+            index = self._cursors.get(key, 0)
+            self._cursors[key] = index + 1
+        position = index
+
+        if index >= len(self.script):
+            if not self.cycle or not self.script:
+                raise IndexError(
+                    f"{self.model_name}: script exhausted after {len(self.script)} steps"
+                )
+            index %= len(self.script)
+
+        # always return a fresh message, agents mutate the response (e.g. .name)
+        step = self.script[index]
+        message = AIMessage(
+            content=step.content,
+            tool_calls=[
+                {**call, "id": call["id"] or f"call_{uuid.uuid4().hex[:12]}"}
+                for call in step.tool_calls
+            ],
+        )
+        return message, position
+
+    def _rewind(self, messages: list[BaseMessage], position: int) -> None:
+        """Give back the step at `position`, unless a later call already moved past it."""
+        key = self._session_key(messages)
+        with self._lock:
+            if self._cursors.get(key) == position + 1:
+                self._cursors[key] = position
+
+    def _check_tools(self, message: AIMessage, tools: list[dict] | None) -> None:
+        if not message.tool_calls:
+            return
+        bound = {t["function"]["name"] for t in tools or []}
+        for call in message.tool_calls:
+            if call["name"] not in bound:
+                raise ValueError(
+                    f"{self.model_name}: scripted tool call '{call['name']}' is not "
+                    f"bound to this agent (bound: {sorted(bound)})"
+                )
+
+    def _respond(self, messages: list[BaseMessage], tools: list[dict] | None):
+        message, position = self._next_step(messages)
+        self._check_tools(message, tools)
+
+        input_tokens = sum(_message_tokens(m) for m in messages)
+        output_tokens = _message_tokens(message)
+        delay = self.latency
+        if self.tokens_per_second:
+            delay += output_tokens / self.tokens_per_second
+
+        message.usage_metadata = {
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "total_tokens": input_tokens + output_tokens,
+        }
+        # same keys ChatOllama reports (durations in nanoseconds)
+        message.response_metadata = {
+            "model": self.model_name,
+            "model_name": self.model_name,
+            "prompt_eval_count": input_tokens,
+            "eval_count": output_tokens,
+            "total_duration": int(delay * 1e9),
+            "eval_duration": int(delay * 1e9),
+        }
+        return message, delay, position
+
+    def _generate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message, delay, _ = self._respond(messages, tools)
+        if delay:
+            time.sleep(delay)
+        return ChatResult(generations=[ChatGeneration(message=message)])
+
+    async def _agenerate(self, messages, stop=None, run_manager=None, tools=None, **kwargs) -> ChatResult:
+        message, delay, position = self._respond(messages, tools)
+        if delay:
+            try:
+                await asyncio.sleep(delay)
+            except asyncio.CancelledError:
+                # a cancelled call never produced its response, replay it next time
+                self._rewind(messages, position)
+                raise
+        return ChatResult(generations=[ChatGeneration(message=message)])
@@ -0,0 +1,163 @@
+import argparse
+import statistics
+import time
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+
+from fake_chat_model import ScriptedChatModel, handoff, reply, tool_call
+from offline_load_test import offline_web_search
+
+import ollama_supervisor_agents
+import supervisor_custom_handoff
+import swarm_agents
+
+
+# Concept:
+#   - Counts how many times math_agent has to call the LLM per math task, with
+#     the old binary tools (add / multiply / divide) vs. the calculate tool.
+#   - Offline (default) the math agent is a ScriptedChatModel that replays what
+#     a well-behaved model does in each mode. Those turn counts are fixed by the
+#     scripts below (and the seconds by --latency): a smoke test of the graphs
+#     and tools, not a measurement. Only --live, where the real Ollama model
+#     decides, measures how many turns qwen actually saves.
+
+# each task: the query plus the scripted math steps for both modes
+MATH_TASKS = [
+    {
+        "query": (
+            "In 2022 New York state GDP was 2.05 trillion and US GDP was 25.46 "
+            "trillion. What % of US GDP was New York state?"
+        ),
+        "binary": [
+            tool_call("divide", {"a": 2.05, "b": 25.46}),
+            tool_call("multiply", {"a": 0.0805, "b": 100}),
+            reply("8.05%"),
+        ],
+        "expression": [
+            tool_call("calculate", {"expression": "2.05 / 25.46 * 100"}),
+            reply("8.05%"),
+        ],
+    },
+    {
+        "query": "A 1200 dollar laptop gets 15% off and then 8% sales tax. What is the final price?",
+        "binary": [
+            tool_call("multiply", {"a": 1200, "b": 0.85}),
+            tool_call("multiply", {"a": 1020, "b": 1.08}),
+            reply("1101.60 dollars"),
+        ],
+        "expression": [
+            tool_call("calculate", {"expression": "1200 * (1 - 0.15) * 1.08"}),
+            reply("1101.60 dollars"),
+        ],
+    },
+    {
+        "query": "What is the average of 17, 23 and 41?",
+        "binary": [
+            tool_call("add", {"a": 17, "b": 23}),
+            tool_call("add", {"a": 40, "b": 41}),
+            tool_call("divide", {"a": 81, "b": 3}),
+            reply("27"),
+        ],
+        "expression": [
+            tool_call("calculate", {"expression": "(17 + 23 + 41) / 3"}),
+            reply("27"),
+        ],
+    },
+]
+
+GRAPH_KINDS = ("supervisor", "custom_handoff", "swarm")
+
+
+def count_llm_turns(messages, agent_name: str = "math_agent") -> int:
+    """Number of real LLM responses from `agent_name` (synthetic handoff-back messages excluded)."""
+    return sum(
+        1 for m in messages
+        if isinstance(m, AIMessage)
+        and m.name == agent_name
+        and not m.response_metadata.get("__is_handoff_back")
+    )
+
+
+def build_graph(kind: str, math_model, supervisor_model, research_model, web_search, expression_tool: bool):
+    if kind == "supervisor":
+        m = ollama_supervisor_agents
+        return m.build_supervisor_agent(
+            supervisor_model,
+            m.build_research_agent(research_model, web_search),
+            m.build_math_agent(math_model, expression_tool=expression_tool),
+        )
+    if kind == "custom_handoff":
+        m = supervisor_custom_handoff
+        return m.build_supervisor_graph(
+            m.build_supervisor_agent(supervisor_model),
+            m.build_research_agent(research_model, web_search),
+            m.build_math_agent(math_model, expression_tool=expression_tool),
+        )
+    if kind == "swarm":
+        # the swarm starts in math_agent, no routing step needed
+        m = swarm_agents
+        return m.build_swarm_agent(
+            m.build_research_agent(research_model, web_search),
+            m.build_math_agent(math_model, expression_tool=expression_tool),
+        )
+    raise ValueError(f"unknown graph kind: {kind}")
+
+
+def run_task(kind: str, task: dict, mode: str, live: bool, latency: float):
+    expression_tool = mode == "expression"
+    if live:
+        model = ollama_supervisor_agents.get_model()
+        graph = build_graph(kind, model, model, model, ollama_supervisor_agents.get_web_search(), expression_tool)
+    else:
+        math_model = ScriptedChatModel(script=task[mode], model_name="math_agent", latency=latency)
+        supervisor_model = ScriptedChatModel(
+            script=[handoff("math_agent"), reply(task[mode][-1].content)],
+            model_name="supervisor",
+            latency=latency,
+        )
+        research_model = ScriptedChatModel(script=[], model_name="research_agent")
+        graph = build_graph(kind, math_model, supervisor_model, research_model, offline_web_search, expression_tool)
+
+    start = time.perf_counter()
+    result = graph.invoke(
+        {"messages": [{"role": "user", "content": task["query"]}]},
+        config=RunnableConfig(),
+    )
+    return count_llm_turns(result["messages"]), time.perf_counter() - start
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Math agent LLM turns: binary tools vs calculate.")
+    parser.add_argument("--live", action="store_true", help="use the real Ollama model")
+    parser.add_argument("--latency", type=float, default=0.3, help="simulated seconds per offline model call")
+    args = parser.parse_args()
+
+    if args.live:
+        print("=== Math agent LLM turns per task (live, measured) ===\n")
+    else:
+        print("=== Math agent LLM turns per task (offline, SCRIPTED) ===\n")
+        print("turns are the lengths of the scripts in MATH_TASKS and seconds mostly the simulated")
+        print("--latency, so this only checks the graphs still run; use --live to measure the model.\n")
+    saved_label = "saved" if args.live else "scripted"
+    print(f"{'graph':15s} {'binary turns':>13s} {'calc turns':>11s} {saved_label:>8s} {'binary s':>9s} {'calc s':>8s}")
+    for kind in GRAPH_KINDS:
+        stats = {}
+        for mode in ("binary", "expression"):
+            runs = [run_task(kind, task, mode, args.live, args.latency) for task in MATH_TASKS]
+            stats[mode] = (
+                statistics.mean(turns for turns, _ in runs),
+                statistics.mean(seconds for _, seconds in runs),
+            )
+
+        before, after = stats["binary"][0], stats["expression"][0]
+        saved = (before - after) / before * 100 if before else 0.0
+        print(
+            f"{kind:15s} {before:13.2f} {after:11.2f} {saved:7.1f}% "
+            f"{stats['binary'][1]:9.2f} {stats['expression'][1]:8.2f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,312 @@
+import argparse
+import contextlib
+import importlib
+import os
+import re
+import sys
+import time
+from typing import TypedDict, get_type_hints
+
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+
+from langgraph.graph import END, MessagesState, StateGraph
+from langgraph.prebuilt import ToolNode, tools_condition
+
+from fake_chat_model import ScriptedChatModel, handoff, reply, tool_call
+from offline_load_test import offline_web_search
+from session_memory import MemoryMonitor
+
+import ollama_supervisor_agents
+import swarm_agents
+
+
+# Concept:
+#   - Soak test for long-lived sessions: one session, thousands of synthetic
+#     turns. Every turn appends a user message to the state the last turn
+#     returned (or, with --checkpointer, sends only the new message to the same
+#     thread_id) and runs the whole graph again.
+#   - The models are ScriptedChatModel with cycle=True, so the scripts restart
+#     every turn and nothing leaves the machine.
+#   - "chat" is a minimal agent + tools loop on MessagesState plus a log string,
+#     cheap enough for thousands of turns. "network" / "hierarchical" run the
+#     real network_agents / hieraarchical_agents graphs (one directory up) as a
+#     subgraph of a MessagesState session: every node appends to their
+#     history / log string and nothing ever trims it. "supervisor" / "swarm" are the real
+#     graphs; the prebuilt agents format repr(state) on every model call, so
+#     their turns get slower as the session grows, use a few hundred turns.
+#   - MemoryMonitor measures the state after every turn and books tracemalloc
+#     deltas to nodes; the report is growth per turn, the nodes that keep the
+#     most memory and the source lines that hold it.
+#   - The defaults fit a CI job (300 turns, well under a minute): a full
+#     gc.collect() under tracemalloc was most of a turn's cost, so it only runs
+#     every --collect-every turns and traced growth is fitted to those turns.
+
+
+#synthetic sessions
+class ChatSessionState(MessagesState):
+    log: str
+
+
+def build_chat_graph(checkpointer=None):
+    model = ScriptedChatModel(
+        # a search every 4th turn, plain answers in between
+        script=[
+            tool_call("web_search", {"query": "US and New York GDP 2022"}),
+            reply("US GDP 2022: 25.46 trillion. New York GDP 2022: 2.05 trillion."),
+            reply("New York state was about 8.05% of US GDP in 2022."),
+            reply("That is roughly one dollar in twelve."),
+            reply("California and Texas were larger, every other state was smaller."),
+        ],
+        model_name="chat_agent", cycle=True,
+    ).bind_tools([offline_web_search])
+
+    def agent(state: ChatSessionState):
+        return {"messages": [model.invoke(state["messages"])], "log": state.get("log", "") + " -> agent"}
+
+    graph = StateGraph(ChatSessionState)
+    graph.add_node("agent", agent)
+    graph.add_node("tools", ToolNode([offline_web_search]))
+    graph.set_entry_point("agent")
+    graph.add_conditional_edges("agent", tools_condition)
+    graph.add_edge("tools", "agent")
+    return graph.compile(checkpointer=checkpointer)
+
+
+def _top_level(module: str):
+    # network_agents / hieraarchical_agents live one directory up from this folder
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    if root not in sys.path:
+        sys.path.append(root)
+    return importlib.import_module(module)
+
+
+def _session_state(name: str, state: type) -> type:
+    # MessagesState + the fields of a demo's state (typing and typing_extensions
+    # TypedDicts can't be subclassed together)
+    fields = {**get_type_hints(MessagesState, include_extras=True), **get_type_hints(state, include_extras=True)}
+    return TypedDict(name, fields)
+
+
+# the real ticket network / loan hierarchy as a subgraph node of a MessagesState
+# session: a turn's user message becomes a new ticket / application, the
+# history / log string is carried over from turn to turn like any state field
+def build_network_graph(checkpointer=None):
+    network_agents = _top_level("network_agents")
+
+    NetworkSessionState = _session_state("NetworkSessionState", network_agents.TicketState)
+
+    def new_ticket(state: NetworkSessionState):
+        return {
+            "text": state["messages"][-1].content, "category": "", "has_required_info": False,
+            "auto_resolved": False, "escalated": False, "history": state.get("history", ""),
+            "scan_offset": 0, "scan_tail": "", "scan_hits": [],
+        }
+
+    def answer(state: NetworkSessionState):
+        outcome = "auto-resolved" if state["auto_resolved"] else "escalated"
+        return {"messages": [AIMessage(f"{state['category']} ticket, {outcome}.")]}
+
+    graph = StateGraph(NetworkSessionState)
+    graph.add_node("new_ticket", new_ticket)
+    graph.add_node("network", network_agents.build_network_graph())
+    graph.add_node("answer", answer)
+    graph.set_entry_point("new_ticket")
+    graph.add_edge("new_ticket", "network")
+    graph.add_edge("network", "answer")
+    graph.add_edge("answer", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def build_hierarchical_graph(checkpointer=None):
+    hieraarchical_agents = _top_level("hieraarchical_agents")
+
+    HierarchicalSessionState = _session_state("HierarchicalSessionState", hieraarchical_agents.LoanState)
+
+    def new_application(state: HierarchicalSessionState):
+        text = state["messages"][-1].content
+        amount = int(re.search(r"application: (\d+)", text).group(1))
+        return {
+            "loan_amount": amount, "documents_ok": "documents attached" in text,
+            "risk_score": 0.0, "approved": False, "log": state.get("log", ""),
+        }
+
+    def answer(state: HierarchicalSessionState):
+        return {"messages": [AIMessage("Approved." if state["approved"] else "Declined.")]}
+
+    graph = StateGraph(HierarchicalSessionState)
+    graph.add_node("new_application", new_application)
+    graph.add_node("hierarchy", hieraarchical_agents.build_hierarchical_graph())
+    graph.add_node("answer", answer)
+    graph.set_entry_point("new_application")
+    graph.add_edge("new_application", "hierarchy")
+    graph.add_edge("hierarchy", "answer")
+    graph.add_edge("answer", END)
+    return graph.compile(checkpointer=checkpointer)
+
+
+def build_session_graph(kind: str, checkpointer=None):
+    if kind == "chat":
+        graph = build_chat_graph(checkpointer)
+    elif kind == "network":
+        graph = build_network_graph(checkpointer)
+    elif kind == "hierarchical":
+        graph = build_hierarchical_graph(checkpointer)
+    elif kind == "supervisor":
+        supervisor = ScriptedChatModel(
+            script=[handoff("research_agent"), handoff("math_agent"), reply("New York was about 8.05% of US GDP.")],
+            model_name="supervisor", cycle=True,
+        )
+        research = ScriptedChatModel(
+            script=[tool_call("web_search", {"query": "US and New York GDP 2022"}), reply("US 25.46T, NY 2.05T.")],
+            model_name="research_agent", cycle=True,
+        )
+        math = ScriptedChatModel(
+            script=[tool_call("divide", {"a": 2.05, "b": 25.46}), reply("8.05%")],
+            model_name="math_agent", cycle=True,
+        )
+        graph = ollama_supervisor_agents.build_supervisor_agent(
+            supervisor,
+            ollama_supervisor_agents.build_research_agent(research, offline_web_search),
+            ollama_supervisor_agents.build_math_agent(math),
+            checkpointer=checkpointer,
+        )
+    elif kind == "swarm":
+        research = ScriptedChatModel(
+            script=[tool_call("web_search", {"query": "US and New York GDP 2022"}), handoff("math_agent")],
+            model_name="research_agent", cycle=True,
+        )
+        math = ScriptedChatModel(
+            script=[handoff("research_agent"), tool_call("divide", {"a": 2.05, "b": 25.46}), reply("8.05%")],
+            model_name="math_agent", cycle=True,
+        )
+        graph = swarm_agents.build_swarm_agent(
+            swarm_agents.build_research_agent(research, offline_web_search),
+            swarm_agents.build_math_agent(math),
+            checkpointer=checkpointer,
+        )
+    else:
+        raise ValueError(f"unknown session kind: {kind}")
+    return graph
+
+
+TURN_MESSAGES = {
+    "network": [
+        "I was charged twice on my invoice, account id 991, need a refund asap.",
+        "Getting an error when I login.",
+        "How do I change my profile picture?",
+    ],
+    "hierarchical": [
+        "Loan application: 50000, documents attached.",
+        "Loan application: 250000, documents to follow.",
+    ],
+}
+
+
+def user_turn(turn: int, kind: str = "chat") -> dict:
+    messages = TURN_MESSAGES.get(kind)
+    if messages:
+        return {"role": "user", "content": f"turn {turn}: {messages[turn % len(messages)]}"}
+    return {"role": "user", "content": f"turn {turn}: what % of US GDP was New York state in 2022?"}
+
+
+def soak(kind: str, turns: int, monitor: MemoryMonitor, checkpointer: bool = False, every: int = 0):
+    saver = None
+    if checkpointer:
+        from langgraph.checkpoint.memory import InMemorySaver
+
+        saver = InMemorySaver()
+    graph = build_session_graph(kind, saver)
+
+    session = f"{kind}-soak"
+    config = RunnableConfig(
+        callbacks=[monitor],
+        metadata={"session_id": session},
+        configurable={"thread_id": session},
+    )
+    state = {"messages": []}
+    # the top-level demo agents print from every node
+    quiet = open(os.devnull, "w") if kind in ("network", "hierarchical") else None
+    start = time.perf_counter()
+    for turn in range(1, turns + 1):
+        with contextlib.redirect_stdout(quiet) if quiet else contextlib.nullcontext():
+            if saver is not None:
+                graph.invoke({"messages": [user_turn(turn, kind)]}, config=config)
+            else:
+                state = graph.invoke({**state, "messages": [*state["messages"], user_turn(turn, kind)]}, config=config)
+
+        if every and turn % every == 0:
+            last = monitor.snapshots[session][-1]
+            print(
+                f"  turn {turn:5d}: state {last['total_bytes'] / 1024:9.1f} KiB, "
+                f"traced {last['traced_bytes'] / 1024:9.1f} KiB, {time.perf_counter() - start:6.1f}s"
+            )
+    return session, time.perf_counter() - start
+
+
+def report(monitor: MemoryMonitor, session: str, seconds: float, top: int):
+    snapshots = monitor.snapshots[session]
+    growth = monitor.growth(session)
+
+    print(f"\nturns          : {len(snapshots)} in {seconds:.1f}s")
+    print(f"final state    : {snapshots[-1]['total_bytes'] / 1024:.1f} KiB")
+    print(f"state growth   : {growth['state']:.0f} bytes/turn")
+    print(f"traced growth  : {growth['traced']:.0f} bytes/turn")
+    for key, value in growth.items():
+        if key.startswith("field:"):
+            print(f"  {key[6:]:12s} : {value:.0f} bytes/turn")
+
+    # every node run leaves LangGraph's per-step objects and not yet collected
+    # garbage behind, even one that allocates nothing (more inside a subgraph);
+    # only the excess over the lightest node of the same level points at a node
+    baselines = monitor.node_baselines()
+    print("\nnet allocation per node, above the lightest node of its level:")
+    for key, entry in monitor.top_nodes(top):
+        baseline = baselines.get(key.rpartition("/")[0], 0.0)
+        print(
+            f"  {key:36s} calls={entry['calls']:6d} per call={entry['net_bytes'] / entry['calls']:8.0f} B "
+            f"baseline={baseline:6.0f} B excess={monitor.excess_bytes(key, baselines) / 1024:9.1f} KiB"
+        )
+
+    print("\nallocation sites (since start):")
+    for stat in monitor.top_allocations(top):
+        frame = stat.traceback[0]
+        print(f"  {stat.size_diff / 1024:9.1f} KiB {stat.count_diff:+7d} blocks  {frame.filename}:{frame.lineno}")
+
+    if monitor.alerts:
+        print("\nalerts:")
+        for alert in monitor.alerts:
+            print(f"  turn {alert['turn']:5d} {alert['kind']:12s} {alert['subject']}")
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Memory soak test of a long-lived offline session.")
+    parser.add_argument("--kind", choices=["chat", "network", "hierarchical", "supervisor", "swarm"], default="chat")
+    parser.add_argument("--turns", type=int, default=300)
+    parser.add_argument("--checkpointer", action="store_true", help="keep the session in an InMemorySaver thread")
+    parser.add_argument("--no-trace", action="store_true", help="state sizes only, no tracemalloc (much faster)")
+    parser.add_argument("--collect-every", type=int, default=50, help="gc.collect() before every Nth snapshot, 1 = exact but slow")
+    parser.add_argument("--alert-state-kb", type=int, default=1024, help="alert when a session's state passes this")
+    parser.add_argument("--alert-traced-mb", type=int, default=64, help="alert when traced memory passes this")
+    parser.add_argument("--every", type=int, default=100, help="progress line every N turns")
+    parser.add_argument("--top", type=int, default=8)
+    args = parser.parse_args()
+
+    monitor = MemoryMonitor(
+        thresholds={
+            "state_bytes": args.alert_state_kb * 1024,
+            "traced_bytes": args.alert_traced_mb * 1024 * 1024,
+        },
+        trace=not args.no_trace,
+        collect=args.collect_every,
+    )
+
+    print(f"\n=== {args.kind} session, {args.turns} turns{' (checkpointer)' if args.checkpointer else ''} ===\n")
+    with monitor:
+        session, seconds = soak(args.kind, args.turns, monitor, args.checkpointer, args.every)
+        report(monitor, session, seconds, args.top)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,209 @@
+import argparse
+import asyncio
+import statistics
+import time
+
+from langchain_core.messages import ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from fake_chat_model import ScriptedChatModel, handoff, reply, tool_call
+
+import ollama_supervisor_agents
+import supervisor_custom_handoff
+import swarm_agents
+
+
+# Concept:
+#   - Same three graphs as the demos, but every LLM is a ScriptedChatModel and
+#     web search returns canned text, so nothing leaves the machine.
+#   - With latency=0 the numbers are pure graph overhead (LangGraph supersteps,
+#     tool nodes, Command handoffs). With latency>0 we can see how sessions
+#     overlap when many run concurrently.
+
+QUERY = (
+    "find US and New York state GDP in 2022. "
+    "what % of US GDP was New York state?"
+)
+
+
+#offline search tool
+@tool("web_search")
+def offline_web_search(query: str) -> str:
+    """Search the web (offline, canned result)."""
+    return (
+        "US GDP in 2022 was 25.46 trillion dollars. "
+        "New York state GDP in 2022 was 2.05 trillion dollars."
+    )
+
+
+#scripts - one list of steps per agent, replayed for every session
+def research_script(next_agent: str | None = None):
+    steps = [tool_call("web_search", {"query": "US and New York GDP 2022"})]
+    if next_agent:
+        steps.append(handoff(next_agent))
+    else:
+        steps.append(reply("US GDP 2022: 25.46 trillion. New York GDP 2022: 2.05 trillion."))
+    return steps
+
+
+def math_script():
+    return [
+        tool_call("divide", {"a": 2.05, "b": 25.46}),
+        tool_call("multiply", {"a": 0.0805, "b": 100}),
+        reply("8.05%"),
+    ]
+
+
+def supervisor_script():
+    return [
+        handoff("research_agent"),
+        handoff("math_agent"),
+        reply("New York state was about 8.05% of US GDP in 2022."),
+    ]
+
+
+def scripted_model(script, name: str, latency: float, tokens_per_second: float | None):
+    return ScriptedChatModel(
+        script=script,
+        model_name=name,
+        latency=latency,
+        tokens_per_second=tokens_per_second,
+    )
+
+
+#offline graphs
+def build_offline_graphs(latency: float = 0.0, tokens_per_second: float | None = None):
+    """Build {name: (graph, models)} for supervisor, custom handoff and swarm."""
+    graphs = {}
+
+    # create_supervisor
+    models = {
+        "supervisor": scripted_model(supervisor_script(), "supervisor", latency, tokens_per_second),
+        "research_agent": scripted_model(research_script(), "research_agent", latency, tokens_per_second),
+        "math_agent": scripted_model(math_script(), "math_agent", latency, tokens_per_second),
+    }
+    research = ollama_supervisor_agents.build_research_agent(models["research_agent"], offline_web_search)
+    math = ollama_supervisor_agents.build_math_agent(models["math_agent"])
+    graphs["supervisor"] = (
+        ollama_supervisor_agents.build_supervisor_agent(models["supervisor"], research, math),
+        models,
+    )
+
+    # custom Command handoff
+    models = {
+        "supervisor": scripted_model(supervisor_script(), "supervisor", latency, tokens_per_second),
+        "research_agent": scripted_model(research_script(), "research_agent", latency, tokens_per_second),
+        "math_agent": scripted_model(math_script(), "math_agent", latency, tokens_per_second),
+    }
+    graphs["custom_handoff"] = (
+        supervisor_custom_handoff.build_supervisor_graph(
+            supervisor_custom_handoff.build_supervisor_agent(models["supervisor"]),
+            supervisor_custom_handoff.build_research_agent(models["research_agent"], offline_web_search),
+            supervisor_custom_handoff.build_math_agent(models["math_agent"]),
+        ),
+        models,
+    )
+
+    # swarm (starts in math_agent, which hands off to research and back)
+    models = {
+        "research_agent": scripted_model(research_script(next_agent="math_agent"), "research_agent", latency, tokens_per_second),
+        "math_agent": scripted_model([handoff("research_agent"), *math_script()], "math_agent", latency, tokens_per_second),
+    }
+    graphs["swarm"] = (
+        swarm_agents.build_swarm_agent(
+            swarm_agents.build_research_agent(models["research_agent"], offline_web_search),
+            swarm_agents.build_math_agent(models["math_agent"]),
+        ),
+        models,
+    )
+
+    return graphs
+
+
+def count_handoffs(messages) -> int:
+    return sum(
+        1 for m in messages
+        if isinstance(m, ToolMessage) and (m.name or "").startswith("transfer_")
+    )
+
+
+def new_session(query: str = QUERY):
+    return {"messages": [{"role": "user", "content": query}]}
+
+
+#measurements
+def measure_overhead(graph, models, runs: int = 50):
+    """Run sessions one after another and report per-run / per-call cost."""
+    for m in models.values():
+        m.reset()
+
+    durations = []
+    result = None
+    for _ in range(runs):
+        start = time.perf_counter()
+        result = graph.invoke(new_session(), config=RunnableConfig())
+        durations.append(time.perf_counter() - start)
+
+    model_calls = sum(m.calls for m in models.values()) / runs
+    handoffs = count_handoffs(result["messages"])
+    mean = statistics.mean(durations)
+    return {
+        "runs": runs,
+        "mean_ms": mean * 1000,
+        "p95_ms": sorted(durations)[int(0.95 * (runs - 1))] * 1000,
+        "model_calls": model_calls,
+        "handoffs": handoffs,
+        "ms_per_model_call": mean * 1000 / model_calls,
+        "ms_per_handoff": mean * 1000 / handoffs if handoffs else 0.0,
+    }
+
+
+async def measure_concurrency(graph, models, sessions: int):
+    """Run `sessions` sessions at once and report wall-clock throughput."""
+    for m in models.values():
+        m.reset()
+
+    start = time.perf_counter()
+    await asyncio.gather(
+        *(graph.ainvoke(new_session(), config=RunnableConfig()) for _ in range(sessions))
+    )
+    wall = time.perf_counter() - start
+    return {
+        "sessions": sessions,
+        "wall_s": wall,
+        "sessions_per_s": sessions / wall,
+    }
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Offline load test for the LLM graphs.")
+    parser.add_argument("--runs", type=int, default=30)
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per model call")
+    parser.add_argument("--tokens-per-second", type=float, default=None)
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    args = parser.parse_args()
+
+    print("=== Graph overhead (latency=0) ===\n")
+    for name, (graph, models) in build_offline_graphs().items():
+        stats = measure_overhead(graph, models, runs=args.runs)
+        print(
+            f"{name:15s} mean={stats['mean_ms']:7.2f}ms p95={stats['p95_ms']:7.2f}ms "
+            f"calls={stats['model_calls']:.0f} handoffs={stats['handoffs']} "
+            f"per_call={stats['ms_per_model_call']:.2f}ms per_handoff={stats['ms_per_handoff']:.2f}ms"
+        )
+
+    print(f"\n=== Concurrency (latency={args.latency}s/call) ===\n")
+    graphs = build_offline_graphs(args.latency, args.tokens_per_second)
+    for name, (graph, models) in graphs.items():
+        for sessions in args.concurrency:
+            stats = asyncio.run(measure_concurrency(graph, models, sessions))
+            print(
+                f"{name:15s} sessions={stats['sessions']:4d} "
+                f"wall={stats['wall_s']:6.2f}s throughput={stats['sessions_per_s']:7.2f}/s"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,23 +1,36 @@
-from langgraph.graph import START, END
-from langgraph.prebuilt import create_react_agent
-from langgraph_supervisor import create_supervisor
-
-from langchain_ollama import ChatOllama
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.messages import convert_to_messages
-from langchain_core.runnables import RunnableConfig
-
-from IPython.display import Image, display
+from functools import lru_cache
 from dotenv import load_dotenv
 import os
 
+from safe_calculator import calculate
+
 load_dotenv()
 
+# Concept:
+#   - Nothing heavy happens at import time. langgraph / langchain / IPython are
+#     imported inside the functions that need them, and the model, search tool,
+#     agents and supervisor are built on first use by the cached get_* factories.
+#   - The old module attributes (model, web_search, research_agent, math_agent,
+#     supervisor_agent) still work, they resolve lazily through __getattr__.
+#   - Rate limits are opt-in: pass a limiter (e.g. rate_limits.TokenBucket) as
+#     model_limiter / search_limiter to the get_* factories. Without one nothing
+#     changes; each distinct limiter gets its own cached instances.
+
+
 # select llm
-model = ChatOllama(
-    model="qwen2.5:3b-instruct",
-    temperature=0.0,
-)
+@lru_cache(maxsize=None)
+def get_model(limiter=None):
+    from langchain_ollama import ChatOllama
+
+    model = ChatOllama(
+        model="qwen2.5:3b-instruct",
+        temperature=0.0,
+    )
+    if limiter is not None:
+        from rate_limits import limit_model
+
+        model = limit_model(model, limiter)
+    return model
 
 
 # define tools
@@ -34,77 +47,140 @@ def divide(a: float, b: float) -> float:
     return a / b
 
 
-tavily_api_key = os.getenv("TAVILY_API_KEY")
+@lru_cache(maxsize=None)
+def get_web_search(limiter=None):
+    from langchain_community.tools.tavily_search import TavilySearchResults
 
-web_search = TavilySearchResults(
-    max_results=3,
-    tavily_api_key=tavily_api_key
-)
+    tavily_api_key = os.getenv("TAVILY_API_KEY")
+
+    web_search = TavilySearchResults(
+        max_results=3,
+        tavily_api_key=tavily_api_key
+    )
+    if limiter is not None:
+        from rate_limits import limit_tool
+
+        web_search = limit_tool(web_search, limiter)
+    return web_search
 
 
 #create worker agents - ReAct
-research_agent = create_react_agent(
-    model=model,
-    tools=[web_search],
-    name="research_agent",
-     prompt=(
-        "You are a research agent.\n\n"
-        "INSTRUCTIONS (MUST FOLLOW):\n"
-        "- For EVERY query, you MUST call the `web_search` tool at least once.\n"
-        "- Use web_search to fetch data, then summarize the results.\n"
-        "- Do NOT perform math or percentage calculations.\n"
-        "- After using web_search and summarizing, respond to the supervisor directly\n"
-        "  with ONLY the factual data you found (numbers, facts, etc.).\n"
-        "- Do NOT mention agents, tools, or transfers in your response.\n"
-    ),
-)
-
-math_agent = create_react_agent(
-    model=model,
-    tools=[add, multiply, divide],
-    name="math_agent",
-    prompt=(
-        "You are a math agent.\n\n"
-        "INSTRUCTIONS:\n"
-        "- Assist ONLY with math-related tasks\n"
-        "- After you're done with your tasks, respond to the supervisor directly\n"
-        "- Respond ONLY with the results of your work, do NOT include ANY other text."
-    ),
-)
+def build_research_agent(model, web_search):
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        model=model,
+        tools=[web_search],
+        name="research_agent",
+        prompt=(
+            "You are a research agent.\n\n"
+            "INSTRUCTIONS (MUST FOLLOW):\n"
+            "- For EVERY query, you MUST call the `web_search` tool at least once.\n"
+            "- Use web_search to fetch data, then summarize the results.\n"
+            "- Do NOT perform math or percentage calculations.\n"
+            "- After using web_search and summarizing, respond to the supervisor directly\n"
+            "  with ONLY the factual data you found (numbers, facts, etc.).\n"
+            "- Do NOT mention agents, tools, or transfers in your response.\n"
+        ),
+    )
+
+def build_math_agent(model, expression_tool: bool = True):
+    from langgraph.prebuilt import create_react_agent
+
+    # expression_tool=False keeps only the binary tools (old behaviour, for comparison)
+    tools = [add, multiply, divide]
+    calculate_hint = ""
+    if expression_tool:
+        tools = [calculate, *tools]
+        calculate_hint = "- Use calculate to evaluate a whole expression in ONE call.\n"
+
+    return create_react_agent(
+        model=model,
+        tools=tools,
+        name="math_agent",
+        prompt=(
+            "You are a math agent.\n\n"
+            "INSTRUCTIONS:\n"
+            "- Assist ONLY with math-related tasks\n"
+            f"{calculate_hint}"
+            "- After you're done with your tasks, respond to the supervisor directly\n"
+            "- Respond ONLY with the results of your work, do NOT include ANY other text."
+        ),
+    )
 
 
 #create supervisor agent 
-supervisor_graph = create_supervisor(
-    model=model,
-    agents=[research_agent, math_agent],
-    prompt=(
-        "You are a supervisor managing two agents:\n"
-        "- research_agent: ONLY for information lookup and web search.\n"
-        "- math_agent: ONLY for calculations.\n\n"
-        "RULES (MUST FOLLOW):\n"
-        "1. You MUST NOT answer the user directly until BOTH agents have been used if the question\n"
-        "   involves numbers AND calculations (like percentages).\n"
-        "2. For questions like GDP + percentage:\n"
-        "   a) First, send the task to research_agent.\n"
-        "   b) Wait for research_agent's answer.\n"
-        "   c) Then send the numeric results to math_agent.\n"
-        "   d) Only after math_agent responds, send ONE final answer to the user.\n"
-        "3. Never write things like 'I transferred the task'; just route agents and then give the final answer.\n"
-        "4. Do not do any research or math yourself. Always delegate.\n"
-    ),
-    add_handoff_back_messages=True,
-    output_mode="full_history",
-)
-
-supervisor_agent = supervisor_graph.compile()
-
-
-# If you are in a notebook, this will show the graph image
-try:
-    display(Image(supervisor_agent.get_graph().draw_mermaid_png()))
-except Exception:
-    # In plain terminal this will just be skipped
-    pass
+def build_supervisor_agent(model, research_agent, math_agent, checkpointer=None):
+    from langgraph_supervisor import create_supervisor
+
+    supervisor_graph = create_supervisor(
+        model=model,
+        agents=[research_agent, math_agent],
+        prompt=(
+            "You are a supervisor managing two agents:\n"
+            "- research_agent: ONLY for information lookup and web search.\n"
+            "- math_agent: ONLY for calculations.\n\n"
+            "RULES (MUST FOLLOW):\n"
+            "1. You MUST NOT answer the user directly until BOTH agents have been used if the question\n"
+            "   involves numbers AND calculations (like percentages).\n"
+            "2. For questions like GDP + percentage:\n"
+            "   a) First, send the task to research_agent.\n"
+            "   b) Wait for research_agent's answer.\n"
+            "   c) Then send the numeric results to math_agent.\n"
+            "   d) Only after math_agent responds, send ONE final answer to the user.\n"
+            "3. Never write things like 'I transferred the task'; just route agents and then give the final answer.\n"
+            "4. Do not do any research or math yourself. Always delegate.\n"
+        ),
+        add_handoff_back_messages=True,
+        output_mode="full_history",
+    )
+    return supervisor_graph.compile(checkpointer=checkpointer)
+
+
+#cached instances - built once, on first use
+#one model limiter is shared by all three agents, the search limiter only by web_search
+@lru_cache(maxsize=None)
+def get_research_agent(model_limiter=None, search_limiter=None):
+    return build_research_agent(get_model(model_limiter), get_web_search(search_limiter))
+
+@lru_cache(maxsize=None)
+def get_math_agent(model_limiter=None):
+    return build_math_agent(get_model(model_limiter))
+
+@lru_cache(maxsize=None)
+def get_supervisor_agent(model_limiter=None, search_limiter=None):
+    return build_supervisor_agent(
+        get_model(model_limiter),
+        get_research_agent(model_limiter, search_limiter),
+        get_math_agent(model_limiter),
+    )
+
+
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "web_search": get_web_search,
+    "research_agent": get_research_agent,
+    "math_agent": get_math_agent,
+    "supervisor_agent": get_supervisor_agent,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+# opt-in visualization (notebooks only, needs IPython + network for mermaid.ink)
+def show_graph(graph=None):
+    from IPython.display import Image, display
+
+    graph = graph or get_supervisor_agent()
+    try:
+        display(Image(graph.get_graph().draw_mermaid_png()))
+    except Exception:
+        # In plain terminal this will just be skipped
+        pass
 
 
 # pretty-print helpers
@@ -119,6 +195,8 @@ def pretty_print_message(message, indent: bool = False):
 
 
 def pretty_print_messages(update, last_message: bool = False):
+    from langchain_core.messages import convert_to_messages
+
     is_subgraph = False
     if isinstance(update, tuple):
         ns, update = update
@@ -138,9 +216,11 @@ def pretty_print_messages(update, last_message: bool = False):
         print(update_label)
         print("\n")
 
-        messages = convert_to_messages(node_update["messages"])
+        # slice first, only the messages we print get converted
+        messages = node_update["messages"]
         if last_message:
             messages = messages[-1:]
+        messages = convert_to_messages(messages)
 
         for m in messages:
             pretty_print_message(m, indent=is_subgraph)
@@ -151,6 +231,9 @@ def pretty_print_messages(update, last_message: bool = False):
 
 def test_supervisor_functionality():
     """Test the supervisor pattern with a GDP-like query to validate handoffs."""
+    from langchain_core.runnables import RunnableConfig
+
+    supervisor_agent = get_supervisor_agent()
 
     query = (
         "find US and New York state GDP in 2022. "
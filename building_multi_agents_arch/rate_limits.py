@@ -0,0 +1,423 @@
+import argparse
+import asyncio
+import contextlib
+import threading
+import time
+from collections import deque
+from contextvars import ContextVar
+from typing import Any, Callable, Dict, Optional
+
+from langchain_core.rate_limiters import BaseRateLimiter
+
+
+# Concept:
+#   - TokenBucket is a langchain BaseRateLimiter: `rate` tokens per second,
+#     up to `burst` saved up. Chat models take it as `rate_limiter=` (that's how
+#     limit_model applies it), tools get wrapped by limit_tool. One bucket per
+#     provider: all three agents share the Ollama bucket, web_search has its own.
+#   - Waiting callers reserve tokens in order (the balance may go negative), so
+#     a burst is spread out at `rate` instead of all retrying at once.
+#   - AdmissionController looks at the buckets BEFORE a session starts. It knows
+#     roughly what one session costs (e.g. 8 model calls + 1 search) and what the
+#     sessions already running still need. If the new session would have to wait
+#     more than `max_delay` on the limiters, it is held at the door, and shed with
+#     SessionRejected after `admit_timeout`, instead of dying halfway through.
+#   - Every bucket records how long callers waited; metrics() exposes them.
+
+
+class SessionRejected(RuntimeError):
+    """Raised by AdmissionController when a session can't be admitted in time."""
+
+
+class _Session:
+    """Estimated tokens a running session still needs, per bucket."""
+
+    def __init__(self, cost: Dict[str, float]):
+        self.remaining = dict(cost)
+        self._lock = threading.Lock()
+
+    def consume(self, name: str, tokens: float):
+        with self._lock:
+            if name in self.remaining:
+                self.remaining[name] = max(0.0, self.remaining[name] - tokens)
+
+
+# the admitted session the current call belongs to; LangGraph copies the
+# context into its tasks / threads, so tool and model calls of a run see it
+_current_session: ContextVar[Optional[_Session]] = ContextVar("rate_limit_session", default=None)
+
+
+def _percentile(values, q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+#token bucket
+class TokenBucket(BaseRateLimiter):
+    def __init__(
+        self,
+        rate: float,
+        burst: float = 1.0,
+        name: str = "bucket",
+        clock: Callable[[], float] = time.monotonic,
+        max_samples: int = 10_000,
+    ):
+        if rate <= 0 or burst < 1:
+            raise ValueError("rate must be > 0 and burst >= 1")
+        self.rate = rate
+        self.burst = burst
+        self.name = name
+        self.clock = clock
+
+        self._tokens = float(burst)   # starts full
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+        self._waits: deque = deque(maxlen=max_samples)
+        self.acquired = 0
+        self.rejected = 0
+        self.wait_total = 0.0
+
+    def _refill(self, now: float):
+        self._tokens = min(self.burst, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def available(self) -> float:
+        """Tokens in the bucket right now, negative while callers are queued."""
+        with self._lock:
+            self._refill(self.clock())
+            return self._tokens
+
+    def _reserve(self, tokens: float, blocking: bool) -> Optional[float]:
+        """Take `tokens`, returns how long to wait for them (None = not available)."""
+        with self._lock:
+            self._refill(self.clock())
+            if not blocking and self._tokens < tokens:
+                self.rejected += 1
+                return None
+            self._tokens -= tokens
+            wait = -self._tokens / self.rate if self._tokens < 0 else 0.0
+            self.acquired += 1
+            self.wait_total += wait
+            self._waits.append(wait)
+
+        session = _current_session.get()
+        if session is not None:
+            session.consume(self.name, tokens)
+        return wait
+
+    def acquire(self, *, blocking: bool = True, tokens: float = 1.0) -> bool:
+        wait = self._reserve(tokens, blocking)
+        if wait is None:
+            return False
+        if wait:
+            time.sleep(wait)
+        return True
+
+    async def aacquire(self, *, blocking: bool = True, tokens: float = 1.0) -> bool:
+        wait = self._reserve(tokens, blocking)
+        if wait is None:
+            return False
+        if wait:
+            await asyncio.sleep(wait)
+        return True
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self._waits)
+        return {
+            "rate": self.rate,
+            "burst": self.burst,
+            "acquired": self.acquired,
+            "rejected": self.rejected,
+            "delayed": sum(1 for w in waits if w > 0),
+            "wait_total_s": self.wait_total,
+            "wait_p50_s": _percentile(waits, 0.50),
+            "wait_p95_s": _percentile(waits, 0.95),
+            "wait_max_s": max(waits, default=0.0),
+        }
+
+
+#applying limits
+def limit_model(model, limiter: BaseRateLimiter):
+    """Copy of a chat model (ChatOllama, ScriptedChatModel, ...) that waits on `limiter` before every call."""
+    return model.model_copy(update={"rate_limiter": limiter})
+
+
+def limit_tool(tool, limiter: BaseRateLimiter):
+    """Same tool (name, description, schema), `limiter` acquired before every call."""
+    from langchain_core.runnables import RunnableConfig, patch_config
+    from langchain_core.tools import BaseTool, StructuredTool
+    from langchain_core.tools import tool as as_tool
+
+    if not isinstance(tool, BaseTool):
+        tool = as_tool(tool)
+
+    # StructuredTool passes the run's config and child callbacks in, so the inner
+    # tool keeps the caller's tags / metadata / configurable and traces under this call
+    def run(config: RunnableConfig, callbacks=None, **kwargs):
+        limiter.acquire()
+        return tool.invoke(kwargs, config=patch_config(config, callbacks=callbacks))
+
+    async def arun(config: RunnableConfig, callbacks=None, **kwargs):
+        await limiter.aacquire()
+        return await tool.ainvoke(kwargs, config=patch_config(config, callbacks=callbacks))
+
+    return StructuredTool.from_function(
+        func=run,
+        coroutine=arun,
+        name=tool.name,
+        description=tool.description,
+        args_schema=tool.args_schema,
+    )
+
+
+#admission control
+class AdmissionController:
+    def __init__(
+        self,
+        limiters: Dict[str, TokenBucket],
+        session_cost: Dict[str, float],      # estimated tokens per session, per bucket name
+        max_sessions: Optional[int] = None,  # concurrent sessions, None = no cap
+        max_delay: float = 2.0,              # limiter wait a session may expect once admitted
+        admit_timeout: float = 0.0,          # how long to hold a session at the door before shedding
+        poll_interval: float = 0.02,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.limiters = limiters
+        self.session_cost = session_cost
+        self.max_sessions = max_sessions
+        self.max_delay = max_delay
+        self.admit_timeout = admit_timeout
+        self.poll_interval = poll_interval
+        self.clock = clock
+
+        self._active: list = []
+        self._lock = threading.Lock()
+        self._admit_waits: deque = deque(maxlen=10_000)
+        self.admitted = 0
+        self.delayed = 0
+        self.shed = 0
+
+    def _projected(self, cost: Dict[str, float]) -> float:
+        worst = 0.0
+        for name, tokens in cost.items():
+            bucket = self.limiters[name]
+            remaining = sum(s.remaining.get(name, 0.0) for s in self._active)
+            worst = max(worst, (remaining + tokens - bucket.available()) / bucket.rate)
+        return worst
+
+    def projected_wait(self, cost: Optional[Dict[str, float]] = None) -> float:
+        """Seconds until the buckets could serve the running sessions plus one with `cost`."""
+        with self._lock:
+            return self._projected(cost or self.session_cost)
+
+    def _try_admit(self, cost: Dict[str, float], waited: float) -> Optional[_Session]:
+        # check + register + count under one lock, two callers can't both take the
+        # last slot and metrics() never sees a session that isn't counted yet
+        with self._lock:
+            if self.max_sessions is not None and len(self._active) >= self.max_sessions:
+                return None
+            if self._projected(cost) > self.max_delay:
+                return None
+            session = _Session(cost)
+            self._active.append(session)
+            self.admitted += 1
+            self.delayed += waited > 0
+            self._admit_waits.append(waited)
+            return session
+
+    def _admitted(self, session: Optional[_Session], waited: float) -> _Session:
+        if session is None:
+            with self._lock:
+                self.shed += 1
+            raise SessionRejected(
+                f"rate limits: session would wait more than {self.max_delay:.1f}s "
+                f"(held {waited:.2f}s at admission)"
+            )
+        return session
+
+    def _release(self, session: _Session):
+        with self._lock:
+            self._active.remove(session)
+
+    @contextlib.contextmanager
+    def session(self, cost: Optional[Dict[str, float]] = None):
+        cost = cost or self.session_cost
+        start, waited = self.clock(), 0.0
+        session = self._try_admit(cost, waited)
+        while session is None and waited < self.admit_timeout:
+            time.sleep(self.poll_interval)
+            waited = self.clock() - start
+            session = self._try_admit(cost, waited)
+        session = self._admitted(session, waited)
+
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+            self._release(session)
+
+    @contextlib.asynccontextmanager
+    async def asession(self, cost: Optional[Dict[str, float]] = None):
+        cost = cost or self.session_cost
+        start, waited = self.clock(), 0.0
+        session = self._try_admit(cost, waited)
+        while session is None and waited < self.admit_timeout:
+            await asyncio.sleep(self.poll_interval)
+            waited = self.clock() - start
+            session = self._try_admit(cost, waited)
+        session = self._admitted(session, waited)
+
+        token = _current_session.set(session)
+        try:
+            yield session
+        finally:
+            _current_session.reset(token)
+            self._release(session)
+
+    def invoke(self, graph, input, config=None, cost: Optional[Dict[str, float]] = None):
+        with self.session(cost):
+            return graph.invoke(input, config=config)
+
+    async def ainvoke(self, graph, input, config=None, cost: Optional[Dict[str, float]] = None):
+        async with self.asession(cost):
+            return await graph.ainvoke(input, config=config)
+
+    def metrics(self) -> Dict[str, Any]:
+        with self._lock:
+            waits = list(self._admit_waits)
+            active, admitted, delayed, shed = len(self._active), self.admitted, self.delayed, self.shed
+        return {
+            "active": active,
+            "admitted": admitted,
+            "delayed": delayed,
+            "shed": shed,
+            "admit_wait_p95_s": _percentile(waits, 0.95),
+            "admit_wait_max_s": max(waits, default=0.0),
+            "limiters": {name: bucket.metrics() for name, bucket in self.limiters.items()},
+        }
+
+
+#demo
+class QuotaExceeded(RuntimeError):
+    """What the (simulated) search provider returns over quota, a 429."""
+
+
+def build_demo_graph(latency: float, search_limiter=None, model_limiter=None, provider_quota=None):
+    """Offline supervisor graph; the search provider enforces `provider_quota` (a TokenBucket)."""
+    from langchain_core.tools import tool
+
+    import ollama_supervisor_agents
+    from offline_load_test import math_script, research_script, scripted_model, supervisor_script
+
+    @tool("web_search")
+    def quota_web_search(query: str) -> str:
+        """Search the web (offline, canned result, provider quota enforced)."""
+        if provider_quota is not None and not provider_quota.acquire(blocking=False):
+            raise QuotaExceeded("429: search quota exceeded")
+        return (
+            "US GDP in 2022 was 25.46 trillion dollars. "
+            "New York state GDP in 2022 was 2.05 trillion dollars."
+        )
+
+    models = {
+        "supervisor": scripted_model(supervisor_script(), "supervisor", latency, None),
+        "research_agent": scripted_model(research_script(), "research_agent", latency, None),
+        "math_agent": scripted_model(math_script(), "math_agent", latency, None),
+    }
+    if model_limiter is not None:
+        models = {name: limit_model(m, model_limiter) for name, m in models.items()}
+    search = limit_tool(quota_web_search, search_limiter) if search_limiter is not None else quota_web_search
+
+    research = ollama_supervisor_agents.build_research_agent(models["research_agent"], search)
+    math = ollama_supervisor_agents.build_math_agent(models["math_agent"])
+    return ollama_supervisor_agents.build_supervisor_agent(models["supervisor"], research, math)
+
+
+async def burst(graph, sessions: int, controller: Optional[AdmissionController] = None):
+    from offline_load_test import new_session
+
+    async def one(i):
+        start = time.perf_counter()
+        try:
+            if controller is None:
+                await graph.ainvoke(new_session(f"{i}: find US and New York state GDP in 2022"))
+            else:
+                await controller.ainvoke(graph, new_session(f"{i}: find US and New York state GDP in 2022"))
+            return "ok", time.perf_counter() - start
+        except SessionRejected:
+            return "shed", time.perf_counter() - start
+        except QuotaExceeded:
+            return "failed", time.perf_counter() - start
+
+    return await asyncio.gather(*(one(i) for i in range(sessions)))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Token buckets and admission control for tools and models.")
+    parser.add_argument("--sessions", type=int, default=40)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per model call")
+    parser.add_argument("--search-quota", type=float, default=5.0, help="provider searches per second")
+    args = parser.parse_args()
+
+    def report(label, outcomes, wall):
+        counts = {k: sum(1 for o, _ in outcomes if o == k) for k in ("ok", "failed", "shed")}
+        ok = sorted(t for o, t in outcomes if o == "ok")
+        p95 = ok[int(0.95 * (len(ok) - 1))] if ok else 0.0
+        print(
+            f"{label:22s} ok={counts['ok']:3d} failed_midway={counts['failed']:3d} "
+            f"shed_at_start={counts['shed']:3d} p95_ok={p95:5.2f}s wall={wall:5.2f}s"
+        )
+
+    print(f"=== Burst of {args.sessions} supervisor sessions, search quota {args.search_quota:.0f}/s ===\n")
+
+    # no limits: the provider answers 429 to everything past its quota
+    quota = TokenBucket(args.search_quota, burst=args.search_quota, name="provider")
+    graph = build_demo_graph(args.latency, provider_quota=quota)
+    start = time.perf_counter()
+    outcomes = asyncio.run(burst(graph, args.sessions))
+    report("no limits", outcomes, time.perf_counter() - start)
+
+    # our buckets stay under the provider quota; admission sheds what can't finish in time
+    def limited_run(label, admission: bool):
+        quota = TokenBucket(args.search_quota, burst=args.search_quota, name="provider")
+        limiters = {
+            "web_search": TokenBucket(args.search_quota * 0.9, burst=args.search_quota * 0.9, name="web_search"),
+            "ollama": TokenBucket(50.0, burst=20, name="ollama"),
+        }
+        graph = build_demo_graph(args.latency, limiters["web_search"], limiters["ollama"], quota)
+        controller = None
+        if admission:
+            controller = AdmissionController(
+                limiters,
+                session_cost={"web_search": 1, "ollama": 8},   # one supervisor session
+                max_delay=2.0,
+                admit_timeout=1.0,
+            )
+        start = time.perf_counter()
+        outcomes = asyncio.run(burst(graph, args.sessions, controller))
+        report(label, outcomes, time.perf_counter() - start)
+        return limiters, controller
+
+    limited_run("token buckets", admission=False)
+    limiters, controller = limited_run("buckets + admission", admission=True)
+
+    print("\nmetrics (buckets + admission):")
+    metrics = controller.metrics()
+    print(
+        f"  admission: admitted={metrics['admitted']} delayed={metrics['delayed']} shed={metrics['shed']} "
+        f"wait_p95={metrics['admit_wait_p95_s']:.2f}s"
+    )
+    for name, m in metrics["limiters"].items():
+        print(
+            f"  {name:10s} acquired={m['acquired']:4d} delayed={m['delayed']:4d} "
+            f"wait_p50={m['wait_p50_s']:.2f}s wait_p95={m['wait_p95_s']:.2f}s wait_max={m['wait_max_s']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
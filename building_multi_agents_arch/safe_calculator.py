@@ -0,0 +1,109 @@
+import ast
+import math
+import operator
+
+
+# Concept:
+#   - With only binary add / multiply / divide tools, "NY / US * 100" costs the
+#     math agent one LLM round trip per operation.
+#   - calculate() takes the whole expression in ONE tool call. It parses it
+#     with ast and walks a small whitelist of nodes, so there is no eval() and
+#     no access to names, attributes, imports or arbitrary calls.
+
+MAX_EXPRESSION_LENGTH = 500
+MAX_EXPONENT = 1000
+MAX_INT_BITS = 4096
+
+_BINARY_OPS = {
+    ast.Add: operator.add,
+    ast.Sub: operator.sub,
+    ast.Mult: operator.mul,
+    ast.Div: operator.truediv,
+    ast.FloorDiv: operator.floordiv,
+    ast.Mod: operator.mod,
+    ast.Pow: operator.pow,
+}
+
+_UNARY_OPS = {
+    ast.UAdd: operator.pos,
+    ast.USub: operator.neg,
+}
+
+_FUNCTIONS = {
+    "abs": abs,
+    "round": round,
+    "min": min,
+    "max": max,
+    "sqrt": math.sqrt,
+}
+
+
+def _finite(value):
+    # float overflow doesn't raise: 1e308 * 10 is inf, and inf - inf is nan
+    if isinstance(value, float) and not math.isfinite(value):
+        raise ValueError("result is too large")
+    return value
+
+
+def _evaluate(node: ast.AST) -> float:
+    if isinstance(node, ast.Expression):
+        return _evaluate(node.body)
+
+    if isinstance(node, ast.Constant) and type(node.value) in (int, float):
+        return _finite(node.value)   # 1e999 parses as inf
+
+    if isinstance(node, ast.BinOp) and type(node.op) in _BINARY_OPS:
+        left = _evaluate(node.left)
+        right = _evaluate(node.right)
+        if isinstance(node.op, ast.Pow) and abs(right) > MAX_EXPONENT:
+            raise ValueError(f"exponent {right} is too large")
+        result = _BINARY_OPS[type(node.op)](left, right)
+        if isinstance(result, complex):   # (-8) ** 0.5
+            raise ValueError("result is not a real number")
+        if isinstance(result, int) and result.bit_length() > MAX_INT_BITS:
+            raise ValueError("result is too large")
+        return _finite(result)
+
+    if isinstance(node, ast.UnaryOp) and type(node.op) in _UNARY_OPS:
+        return _UNARY_OPS[type(node.op)](_evaluate(node.operand))
+
+    if (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Name)
+        and node.func.id in _FUNCTIONS
+        and not node.keywords
+    ):
+        return _finite(_FUNCTIONS[node.func.id](*(_evaluate(arg) for arg in node.args)))
+
+    raise ValueError(f"unsupported syntax: {ast.dump(node)[:60]}")
+
+
+def evaluate_expression(expression: str) -> float:
+    """Safely evaluate an arithmetic expression, raises ValueError if not allowed."""
+    if len(expression) > MAX_EXPRESSION_LENGTH:
+        raise ValueError(f"expression longer than {MAX_EXPRESSION_LENGTH} characters")
+
+    try:
+        tree = ast.parse(expression.strip(), mode="eval")
+    except SyntaxError as e:
+        raise ValueError(f"invalid expression: {e.msg}") from e
+
+    try:
+        return _evaluate(tree)
+    except ZeroDivisionError as e:
+        raise ValueError("division by zero") from e
+    except OverflowError as e:
+        raise ValueError("result is too large") from e
+    except TypeError as e:
+        # whitelisted function with the wrong arguments: min(), round(1, 2, 3)
+        raise ValueError(f"invalid arguments: {e}") from e
+
+
+# tool - the docstring is what the LLM sees
+def calculate(expression: str) -> float:
+    """Evaluate a whole arithmetic expression in one call.
+
+    Supports + - * / // % ** and parentheses, plus abs, round, min, max, sqrt.
+    Example: "2.05 / 25.46 * 100" for a percentage.
+    """
+    return evaluate_expression(expression)
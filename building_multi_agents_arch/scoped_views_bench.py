@@ -0,0 +1,159 @@
+import argparse
+
+from langchain_core.runnables import RunnableConfig
+from langchain_core.tools import tool
+
+from fake_chat_model import ScriptedChatModel, handoff, reply, tool_call
+from usage_accounting import UsageLedger
+
+import swarm_agents
+
+
+# Concept:
+#   - Runs the swarm twice on the GDP query, all models scripted: once with
+#     the shared history (the default) and once with a ScopedView per agent
+#     and payload handoffs.
+#   - The search tool returns a realistic, verbose page, that's what math_agent
+#     keeps re-reading with the shared history.
+#   - UsageLedger records the prompt tokens of every LLM call, so we can compare
+#     them turn by turn, per agent.
+
+QUERY = (
+    "find US and New York state GDP in 2022. "
+    "what % of US GDP was New York state?"
+)
+
+US_GDP = 25.46
+NY_GDP = 2.05
+
+
+#verbose offline search tool
+@tool("web_search")
+def verbose_web_search(query: str) -> str:
+    """Search the web (offline, canned result)."""
+    results = [
+        (
+            "Gross domestic product of the United States",
+            f"The US economy grew in 2022 and nominal GDP reached {US_GDP} trillion "
+            "dollars according to the Bureau of Economic Analysis. Real GDP growth "
+            "slowed to 1.9 percent as higher interest rates weighed on housing and "
+            "business investment, while consumer spending on services stayed strong.",
+        ),
+        (
+            "New York state economy - annual report",
+            f"New York state GDP in 2022 was {NY_GDP} trillion dollars, the third "
+            "largest state economy after California and Texas. Finance, insurance and "
+            "real estate account for close to a third of state output, followed by "
+            "professional services, health care and information.",
+        ),
+        (
+            "GDP by state, 2022 (BEA release)",
+            "Current-dollar GDP increased in all 50 states and the District of "
+            "Columbia. The percent change ranged from 13.6 percent in Texas to 6.1 "
+            "percent in Maryland. Tables include chained dollars and industry detail.",
+        ),
+    ]
+    return "\n\n".join(f"{title}\n{body}" for title, body in results)
+
+
+#scripts
+def scripts(scoped: bool) -> dict:
+    if not scoped:
+        return {
+            "math_agent": [
+                handoff("research_agent"),
+                tool_call("calculate", {"expression": f"{NY_GDP} / {US_GDP} * 100"}),
+                reply("New York state was about 8.05% of US GDP in 2022."),
+            ],
+            "research_agent": [
+                tool_call("web_search", {"query": "US and New York state GDP 2022"}),
+                handoff("math_agent"),
+            ],
+        }
+
+    return {
+        "math_agent": [
+            tool_call("transfer_to_research_agent", {"summary": "need 2022 GDP of the US and of New York state"}),
+            tool_call("calculate", {"expression": f"{NY_GDP} / {US_GDP} * 100"}),
+            reply("New York state was about 8.05% of US GDP in 2022."),
+        ],
+        "research_agent": [
+            tool_call("web_search", {"query": "US and New York state GDP 2022"}),
+            tool_call(
+                "transfer_to_math_agent",
+                {"summary": "2022 nominal GDP, trillion USD", "data": {"us_gdp": US_GDP, "ny_gdp": NY_GDP}},
+            ),
+        ],
+    }
+
+
+def build_graph(scoped: bool, model=None):
+    script = scripts(scoped)
+    models = {name: ScriptedChatModel(script=steps, model_name=name) for name, steps in script.items()}
+    if model is not None:
+        models = {name: model for name in script}
+
+    def view(name):
+        return swarm_agents.ScopedView(name) if scoped else None
+
+    return swarm_agents.build_swarm_agent(
+        swarm_agents.build_research_agent(models["research_agent"], verbose_web_search, view=view("research_agent")),
+        swarm_agents.build_math_agent(models["math_agent"], view=view("math_agent")),
+    )
+
+
+def run(scoped: bool, model=None):
+    ledger = UsageLedger()
+    result = build_graph(scoped, model).invoke(
+        {"messages": [{"role": "user", "content": QUERY}]},
+        config=RunnableConfig(callbacks=[ledger]),
+    )
+    return result, ledger
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Prompt tokens per turn: shared history vs scoped views.")
+    parser.add_argument("--live", action="store_true", help="use the real Ollama model instead of scripts")
+    args = parser.parse_args()
+
+    model = swarm_agents.get_model() if args.live else None
+    shared, shared_ledger = run(False, model)
+    scoped, scoped_ledger = run(True, model)
+
+    if not args.live:
+        # same answer either way, and the shared history still has everything
+        assert shared["messages"][-1].content == scoped["messages"][-1].content
+    print(f"Query: {QUERY}")
+    print(f"answer (shared): {shared['messages'][-1].content}")
+    print(f"answer (scoped): {scoped['messages'][-1].content}")
+    print(f"history length : shared={len(shared['messages'])} scoped={len(scoped['messages'])}\n")
+
+    print("=== Prompt tokens per LLM turn ===\n")
+    print(f"{'turn':>4s} {'agent':15s} {'shared':>7s} {'scoped':>7s} {'change':>7s}")
+    for i, (a, b) in enumerate(zip(shared_ledger.records, scoped_ledger.records), 1):
+        agent = a["agent"] if a["agent"] == b["agent"] else f"{a['agent']}/{b['agent']}"
+        change = (b["input_tokens"] - a["input_tokens"]) / max(a["input_tokens"], 1) * 100
+        print(f"{i:4d} {agent:15s} {a['input_tokens']:7d} {b['input_tokens']:7d} {change:+6.1f}%")
+
+    # research_agent pays a little for the richer handoff summary it receives
+    print("\n=== Per agent ===\n")
+    shared_usage, scoped_usage = shared_ledger.by_agent(), scoped_ledger.by_agent()
+    for agent in sorted(shared_usage):
+        a, b = shared_usage[agent], scoped_usage.get(agent, {"calls": 0, "input_tokens": 0})
+        per_turn_a = a["input_tokens"] / max(a["calls"], 1)
+        per_turn_b = b["input_tokens"] / max(b["calls"], 1)
+        print(
+            f"{agent:15s} prompt tokens/turn {per_turn_a:7.1f} -> {per_turn_b:7.1f} "
+            f"({(per_turn_b - per_turn_a) / per_turn_a * 100:+.1f}%)"
+        )
+
+    a, b = shared_ledger.totals(), scoped_ledger.totals()
+    print(
+        f"\ntotal prompt tokens: {a['input_tokens']} -> {b['input_tokens']} "
+        f"({(b['input_tokens'] - a['input_tokens']) / a['input_tokens'] * 100:+.1f}%)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,320 @@
+import gc
+import sys
+import threading
+import tracemalloc
+import weakref
+from collections import defaultdict
+from typing import Any, Callable, Dict, List, Optional, TypedDict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tracing import NODE_TAG_PREFIX, agent_of
+
+
+# Concept:
+#   - MemoryMonitor is an opt-in callback handler for long-lived sessions: pass
+#     it in config["callbacks"] (with config["metadata"]["session_id"], or a
+#     thread_id when a checkpointer is used) and nothing else changes.
+#   - Every time a session's run ends, its final state is measured field by
+#     field (messages, history, log, ...) with a deep sizeof, so growth per
+#     turn and the field responsible can be read back.
+#   - While tracemalloc is on, each graph node run is booked the net bytes it
+#     left allocated (traced memory after - before). Nodes of nested agents are
+#     keyed "<agent>/<node>"; a subgraph node includes its inner nodes, and
+#     branches running in parallel threads blur into each other. Garbage the
+#     cycle collector hasn't freed yet and LangGraph's own per-step objects
+#     count too, even for a node that allocates nothing: node_baselines() is
+#     that floor per nesting level, top_nodes() ranks by the bytes above it.
+#   - top_allocations() diffs tracemalloc against the baseline taken at start()
+#     and lists the source lines holding the new memory.
+#   - Thresholds fire an Alert once per (kind, subject) through on_alert.
+
+
+class Thresholds(TypedDict, total=False):
+    state_bytes: int      # whole state of one session
+    field_bytes: int      # any single state field (messages, history, ...)
+    node_bytes: int       # net allocation of one node run
+    traced_bytes: int     # everything tracemalloc sees
+
+
+class Alert(TypedDict):
+    kind: str             # a Thresholds key
+    subject: str          # session id, "<session>.<field>", node key or "process"
+    value: int
+    threshold: int
+    turn: int
+
+
+class StateSnapshot(TypedDict):
+    turn: int
+    total_bytes: int
+    fields: Dict[str, int]
+    traced_bytes: int
+    collected: bool       # gc.collect() ran first, traced_bytes has no garbage in it
+
+
+class NodeMemory(TypedDict):
+    calls: int
+    net_bytes: int        # summed over all runs
+    max_bytes: int        # largest single run
+
+
+def deep_sizeof(value: Any, seen: Optional[set] = None) -> int:
+    """sys.getsizeof of `value` and everything it references, each object counted once."""
+    seen = set() if seen is None else seen
+    if id(value) in seen:
+        return 0
+    seen.add(id(value))
+
+    size = sys.getsizeof(value)
+    if isinstance(value, (str, bytes, bytearray, int, float, bool)) or value is None:
+        return size
+    if isinstance(value, dict):
+        return size + sum(deep_sizeof(k, seen) + deep_sizeof(v, seen) for k, v in value.items())
+    if isinstance(value, (list, tuple, set, frozenset)):
+        return size + sum(deep_sizeof(v, seen) for v in value)
+    # pydantic models (messages) and plain objects; attribute names belong to the class
+    fields = getattr(value, "__dict__", None)
+    if fields is not None and id(fields) not in seen:
+        seen.add(id(fields))
+        size += sys.getsizeof(fields) + sum(deep_sizeof(v, seen) for v in fields.values())
+    return size
+
+
+class SizeCache:
+    """deep_sizeof of list items (messages), remembered for as long as the item is alive.
+
+    Messages don't change once they are in the state, so measuring a session after
+    every turn only has to size the new ones instead of the whole history again.
+    """
+
+    def __init__(self):
+        self._sizes: Dict[int, tuple] = {}
+
+    def sizeof(self, value: Any) -> int:
+        entry = self._sizes.get(id(value))
+        if entry is not None and entry[0]() is value:
+            return entry[1]
+        size = deep_sizeof(value)
+        try:
+            ref = weakref.ref(value, lambda _, key=id(value): self._sizes.pop(key, None))
+        except TypeError:
+            return size   # str, tuple, ... can't be weakly referenced
+        self._sizes[id(value)] = (ref, size)
+        return size
+
+
+def state_size(state: Dict[str, Any], cache: Optional[SizeCache] = None) -> Dict[str, int]:
+    """Deep size in bytes of every field of a graph state."""
+    if cache is None:
+        seen: set = set()
+        return {key: deep_sizeof(value, seen) for key, value in state.items()}
+    return {
+        key: sys.getsizeof(value) + sum(cache.sizeof(item) for item in value)
+        if isinstance(value, list) else deep_sizeof(value)
+        for key, value in state.items()
+    }
+
+
+def _slope(points: List[tuple]) -> float:
+    """Least-squares slope of (x, y) points, 0 if there aren't two distinct x."""
+    if len(points) < 2:
+        return 0.0
+    n = len(points)
+    mean_x = sum(x for x, _ in points) / n
+    mean_y = sum(y for _, y in points) / n
+    var = sum((x - mean_x) ** 2 for x, _ in points)
+    if var == 0:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in points) / var
+
+
+class MemoryMonitor(BaseCallbackHandler):
+    def __init__(
+        self,
+        thresholds: Optional[Thresholds] = None,
+        on_alert: Optional[Callable[[Alert], None]] = None,
+        trace: bool = True,      # use tracemalloc for node attribution + top_allocations
+        frames: int = 1,         # traceback depth kept by tracemalloc
+        collect: int = 1,        # gc.collect() before every Nth snapshot of a session, so traced bytes
+                                 # = retained bytes there (0 = never; a full collection is slow)
+    ):
+        self.thresholds: Thresholds = dict(thresholds or {})
+        self.on_alert = on_alert or (lambda alert: print(
+            f"MemoryMonitor: {alert['kind']} {alert['subject']} = "
+            f"{alert['value'] / 1024:.1f} KiB > {alert['threshold'] / 1024:.1f} KiB (turn {alert['turn']})"
+        ))
+        self.trace = trace
+        self.frames = frames
+        self.collect = collect
+
+        self.snapshots: Dict[str, List[StateSnapshot]] = defaultdict(list)
+        self.nodes: Dict[str, NodeMemory] = {}
+        self.alerts: List[Alert] = []
+        self._fired: set = set()
+        self._sizes = SizeCache()
+        self._roots: Dict[UUID, str] = {}            # top-level run -> session
+        self._open: Dict[UUID, tuple] = {}           # node run -> (key, traced bytes at start)
+        self._lock = threading.Lock()
+        self._started_tracing = False
+        self._baseline: Optional[tracemalloc.Snapshot] = None
+
+    # lifecycle
+    def start(self):
+        if self.trace:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start(self.frames)
+                self._started_tracing = True
+            self._baseline = tracemalloc.take_snapshot()
+        return self
+
+    def stop(self):
+        """Stop tracemalloc if start() turned it on, the collected numbers stay."""
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _traced(self) -> int:
+        return tracemalloc.get_traced_memory()[0] if tracemalloc.is_tracing() else 0
+
+    # callbacks
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name", "")
+        if parent_run_id is None:
+            session = metadata.get("session_id") or metadata.get("thread_id") or "default"
+            with self._lock:
+                self._roots[run_id] = str(session)
+        elif any(t.startswith(NODE_TAG_PREFIX) for t in tags or []) and name == metadata.get("langgraph_node"):
+            agent = agent_of(metadata)
+            key = name if agent in ("", name) else f"{agent}/{name}"
+            with self._lock:
+                self._open[run_id] = (key, self._traced())
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id, outputs)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        # Command(graph=PARENT) handoffs end the node with an exception too
+        self._end(run_id, None)
+
+    def _end(self, run_id, outputs):
+        traced = self._traced()
+        with self._lock:
+            session = self._roots.pop(run_id, None)
+            opened = self._open.pop(run_id, None)
+        if session is not None and isinstance(outputs, dict):
+            self.observe(session, outputs)
+        elif opened is not None:
+            key, before = opened
+            delta = traced - before
+            with self._lock:
+                entry = self.nodes.setdefault(key, {"calls": 0, "net_bytes": 0, "max_bytes": 0})
+                entry["calls"] += 1
+                entry["net_bytes"] += delta
+                entry["max_bytes"] = max(entry["max_bytes"], delta)
+            self._check("node_bytes", key, delta)
+
+    # snapshots
+    def observe(self, session: str, state: Dict[str, Any]) -> StateSnapshot:
+        """Record the size of `state` as the next turn of `session` (the callbacks do this per run)."""
+        fields = state_size(state, self._sizes)
+        with self._lock:
+            turn = len(self.snapshots[session]) + 1
+        collected = bool(self.collect) and tracemalloc.is_tracing() and turn % self.collect == 0
+        if collected:
+            gc.collect()
+        with self._lock:
+            snapshot: StateSnapshot = {
+                "turn": turn,
+                "total_bytes": sum(fields.values()),
+                "fields": fields,
+                "traced_bytes": self._traced(),
+                "collected": collected,
+            }
+            self.snapshots[session].append(snapshot)
+
+        self._check("state_bytes", session, snapshot["total_bytes"], turn)
+        for field, size in fields.items():
+            self._check("field_bytes", f"{session}.{field}", size, turn)
+        self._check("traced_bytes", "process", snapshot["traced_bytes"], turn)
+        return snapshot
+
+    def _check(self, kind: str, subject: str, value: int, turn: int = 0):
+        threshold = self.thresholds.get(kind)
+        if threshold is None or value <= threshold:
+            return
+        with self._lock:
+            if (kind, subject) in self._fired:
+                return
+            self._fired.add((kind, subject))
+            alert: Alert = {"kind": kind, "subject": subject, "value": value, "threshold": threshold, "turn": turn}
+            self.alerts.append(alert)
+        self.on_alert(alert)
+
+    # reports
+    def growth(self, session: str, skip: int = 1) -> Dict[str, float]:
+        """Bytes per turn (least-squares slope) of the state, each field and traced memory.
+
+        The first `skip` turns are left out, they include one-off warm-up allocations.
+        Traced growth only uses the turns that ran gc.collect() when there are some.
+        """
+        with self._lock:
+            snapshots = self.snapshots[session][skip:]
+        collected = [s for s in snapshots if s["collected"]] or snapshots
+        out = {
+            "state": _slope([(s["turn"], s["total_bytes"]) for s in snapshots]),
+            "traced": _slope([(s["turn"], s["traced_bytes"]) for s in collected]),
+        }
+        for field in snapshots[-1]["fields"] if snapshots else []:
+            out[f"field:{field}"] = _slope([(s["turn"], s["fields"].get(field, 0)) for s in snapshots])
+        return out
+
+    def node_baselines(self) -> Dict[str, float]:
+        """Smallest net bytes per run of any node, per nesting level ("" = top level,
+        "<agent>" = the nodes inside that subgraph): what a run leaves behind on its own."""
+        floors: Dict[str, float] = {}
+        with self._lock:
+            for key, entry in self.nodes.items():
+                if entry["calls"]:
+                    level = key.rpartition("/")[0]
+                    floors[level] = min(floors.get(level, float("inf")), entry["net_bytes"] / entry["calls"])
+        return {level: max(0.0, floor) for level, floor in floors.items()}
+
+    def excess_bytes(self, key: str, baselines: Optional[Dict[str, float]] = None) -> float:
+        """Net bytes of a node above its level's baseline, summed over its runs."""
+        baselines = self.node_baselines() if baselines is None else baselines
+        with self._lock:
+            entry = self.nodes[key]
+            return entry["net_bytes"] - baselines.get(key.rpartition("/")[0], 0.0) * entry["calls"]
+
+    def top_nodes(self, limit: int = 10) -> List[tuple]:
+        """(node key, NodeMemory), most net bytes above the node_baselines() first."""
+        baselines = self.node_baselines()
+        with self._lock:
+            keys = list(self.nodes)
+        ranked = sorted(keys, key=lambda key: -self.excess_bytes(key, baselines))[:limit]
+        with self._lock:
+            return [(key, self.nodes[key]) for key in ranked]
+
+    def top_allocations(self, limit: int = 10) -> List[tracemalloc.StatisticDiff]:
+        """Source lines holding the most memory allocated since start()."""
+        if self._baseline is None or not tracemalloc.is_tracing():
+            return []
+        ignore = [
+            tracemalloc.Filter(False, tracemalloc.__file__),
+            tracemalloc.Filter(False, __file__),   # the monitor's own snapshots
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap>"),
+            tracemalloc.Filter(False, "<frozen importlib._bootstrap_external>"),
+            tracemalloc.Filter(False, "<unknown>"),
+        ]
+        snapshot = tracemalloc.take_snapshot().filter_traces(ignore)
+        diff = snapshot.compare_to(self._baseline.filter_traces(ignore), "lineno")
+        return [d for d in diff if d.size_diff > 0][:limit]
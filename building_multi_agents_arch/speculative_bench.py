@@ -0,0 +1,132 @@
+import argparse
+import asyncio
+import time
+
+from langchain_core.runnables import RunnableConfig
+
+from fake_chat_model import ScriptedChatModel, handoff, reply, tool_call
+from offline_load_test import offline_web_search
+
+import supervisor_custom_handoff as m
+
+
+# Concept:
+#   - Runs the custom handoff graph with and without a Speculator on a small
+#     mix of queries, all models scripted, so only the routing order matters.
+#   - Routing calls emit a couple of tokens, worker calls more, so with a
+#     tokens_per_second rate the supervisor decides before a worker step ends,
+#     like a real model would.
+#   - The last task is a deliberate miss: "find" makes the keyword rule guess
+#     research_agent, but the supervisor goes straight to math_agent.
+
+TASKS = [
+    {
+        "query": "find US and New York state GDP in 2022. what % of US GDP was New York state?",
+        "route": ["research_agent", "math_agent"],
+        "research_agent": [
+            tool_call("web_search", {"query": "US and New York GDP 2022"}),
+            reply("US GDP 2022: 25.46 trillion. New York GDP 2022: 2.05 trillion."),
+        ],
+        "math_agent": [
+            tool_call("calculate", {"expression": "2.05 / 25.46 * 100"}),
+            reply("8.05%"),
+        ],
+    },
+    {
+        "query": "who founded the company that makes the iPhone?",
+        "route": ["research_agent"],
+        "research_agent": [
+            tool_call("web_search", {"query": "Apple founders"}),
+            reply("Steve Jobs, Steve Wozniak and Ronald Wayne."),
+        ],
+        "math_agent": [],
+    },
+    {
+        "query": "calculate 17% of 2300",
+        "route": ["math_agent"],
+        "research_agent": [],
+        "math_agent": [
+            tool_call("calculate", {"expression": "2300 * 0.17"}),
+            reply("391"),
+        ],
+    },
+    {
+        "query": "find 15% of 80",
+        "route": ["math_agent"],
+        "research_agent": [],
+        "math_agent": [
+            tool_call("calculate", {"expression": "80 * 0.15"}),
+            reply("12"),
+        ],
+    },
+]
+
+
+def build_task_graph(task: dict, latency: float, tokens_per_second: float, speculator=None):
+    def model(name, script):
+        return ScriptedChatModel(
+            script=script, model_name=name, latency=latency, tokens_per_second=tokens_per_second
+        )
+
+    supervisor_script = [handoff(agent) for agent in task["route"]] + [reply("Done.")]
+    return m.build_supervisor_graph(
+        m.build_supervisor_agent(model("supervisor", supervisor_script)),
+        m.build_research_agent(model("research_agent", task["research_agent"]), offline_web_search),
+        m.build_math_agent(model("math_agent", task["math_agent"])),
+        speculator=speculator,
+    )
+
+
+def answers(result):
+    return [msg.content for msg in result["messages"] if msg.type == "ai" and msg.content]
+
+
+async def run_task(task: dict, latency: float, tokens_per_second: float, speculator=None):
+    graph = build_task_graph(task, latency, tokens_per_second, speculator)
+    start = time.perf_counter()
+    result = await graph.ainvoke(
+        {"messages": [{"role": "user", "content": task["query"]}]},
+        config=RunnableConfig(),
+    )
+    return time.perf_counter() - start, result
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Speculative worker execution in the custom handoff graph.")
+    parser.add_argument("--latency", type=float, default=0.1, help="seconds before the first token")
+    parser.add_argument("--tokens-per-second", type=float, default=20.0)
+    args = parser.parse_args()
+
+    predictors = {
+        "keyword rules": m.KeywordPredictor,
+        "previous decision": lambda: m.PreviousDecisionPredictor(fallback=m.KeywordPredictor()),
+    }
+    for label, make_predictor in predictors.items():
+        speculator = m.Speculator(make_predictor())
+
+        print(f"\n=== Custom handoff: serial vs speculative ({label}) ===\n")
+        print(f"{'query':55s} {'serial s':>9s} {'spec s':>8s} {'saved':>7s}")
+        total_serial = total_spec = 0.0
+        for task in TASKS:
+            serial, serial_result = asyncio.run(run_task(task, args.latency, args.tokens_per_second))
+            spec, spec_result = asyncio.run(run_task(task, args.latency, args.tokens_per_second, speculator))
+
+            # a committed speculative run must end with the same answers as the serial one
+            assert answers(serial_result) == answers(spec_result), "speculative run diverged"
+
+            total_serial += serial
+            total_spec += spec
+            print(f"{task['query'][:55]:55s} {serial:9.2f} {spec:8.2f} {(serial - spec) / serial * 100:6.1f}%")
+
+        stats = speculator.stats()
+        print(f"\ntotal: serial={total_serial:.2f}s speculative={total_spec:.2f}s")
+        print(
+            f"predictions={stats['predictions']} hits={stats['hits']} misses={stats['misses']} "
+            f"hit_rate={stats['hit_rate']:.0%} overlap={stats['overlap_seconds']:.2f}s "
+            f"wasted={stats['wasted_seconds']:.2f}s"
+        )
+
+
+if __name__ == "__main__":
+    main()
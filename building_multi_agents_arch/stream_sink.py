@@ -0,0 +1,210 @@
+import argparse
+import io
+import json
+import sys
+import time
+from typing import Any, Callable, Iterable, TextIO
+
+
+# Concept:
+#   - pretty_print_messages renders every chunk from scratch. Subgraph nodes
+#     return the WHOLE message list, so the cost of each chunk grows with the
+#     conversation.
+#   - StreamSink remembers which messages it already emitted (by message id,
+#     tool_call_id / tool call ids, else role + name + content). For each chunk it
+#     walks the list from the end and stops at the first message it has seen,
+#     so only the new tail is converted and rendered: constant cost per chunk.
+#   - What to do with a new message is up to the formatters: console, JSONL,
+#     or a callback (e.g. a websocket send).
+
+
+def _message_key(message) -> str:
+    """Stable identity of a message, for BaseMessage objects and raw dicts."""
+    get = message.get if isinstance(message, dict) else lambda k, d=None: getattr(message, k, d)
+    if get("id"):
+        return f"id:{get('id')}"
+    if get("tool_call_id"):
+        return f"tool:{get('tool_call_id')}"
+    calls = get("tool_calls") or []
+    if calls and all(c.get("id") for c in calls):
+        return "calls:" + ",".join(c["id"] for c in calls)
+    role = get("role") or get("type")
+    return f"{role}:{get('name')}:{get('content')}"
+
+
+def _graph_id(ns) -> str:
+    return ns[-1].split(":")[0] if ns else ""
+
+
+# formatters - each gets (message, node, graph_id), message is a BaseMessage
+class ConsoleFormatter:
+    def __init__(self, out: TextIO | None = None):
+        self.out = out
+        self._last_label = None
+
+    def __call__(self, message, node: str, graph_id: str):
+        out = self.out or sys.stdout   # looked up late so redirect_stdout works
+        label = f"Update from node {node}:" if not graph_id else f"\tUpdate from subgraph {graph_id} node {node}:"
+        if label != self._last_label:
+            out.write(f"{label}\n\n")
+            self._last_label = label
+
+        text = message.pretty_repr()
+        if graph_id:
+            text = "\n".join("\t" + line for line in text.split("\n"))
+        out.write(text + "\n\n")
+
+
+def message_event(message, node: str, graph_id: str) -> dict:
+    """JSON-ready description of one message."""
+    event = {
+        "graph": graph_id or None,
+        "node": node,
+        "type": message.type,
+        "name": getattr(message, "name", None),
+        "content": message.content,
+    }
+    if getattr(message, "tool_calls", None):
+        event["tool_calls"] = [{"name": c["name"], "args": c["args"]} for c in message.tool_calls]
+    return event
+
+
+class JsonlFormatter:
+    def __init__(self, out: TextIO):
+        self.out = out
+
+    def __call__(self, message, node: str, graph_id: str):
+        self.out.write(json.dumps(message_event(message, node, graph_id), default=str) + "\n")
+
+
+class CallbackFormatter:
+    """Hands every new message, as a dict, to `send` (e.g. a websocket's send)."""
+
+    def __init__(self, send: Callable[[dict], Any]):
+        self.send = send
+
+    def __call__(self, message, node: str, graph_id: str):
+        self.send(message_event(message, node, graph_id))
+
+
+class StreamSink:
+    def __init__(self, formatters: Iterable[Callable] | None = None, last_message: bool = False):
+        self.formatters = list(formatters) if formatters is not None else [ConsoleFormatter()]
+        self.last_message = last_message    # only the newest message of each update
+        self.seen: set[str] = set()
+        self.emitted = 0
+
+    def _new_messages(self, messages) -> list:
+        # walk back from the end, stop at the first message already emitted
+        new = []
+        for message in reversed(messages):
+            key = _message_key(message)
+            if key in self.seen:
+                break
+            new.append((key, message))
+            if self.last_message:
+                break
+        new.reverse()
+        return new
+
+    def write(self, chunk):
+        """Emit the new messages of one stream chunk (stream_mode="updates")."""
+        from langchain_core.messages import convert_to_messages
+
+        ns = ()
+        if isinstance(chunk, tuple):
+            ns, chunk = chunk
+        graph_id = _graph_id(ns)
+
+        for node, update in (chunk or {}).items():
+            if not isinstance(update, dict) or not update.get("messages"):
+                continue
+            new = self._new_messages(update["messages"])
+            if not new:
+                continue
+            # only the new tail is converted
+            for (key, _), message in zip(new, convert_to_messages([m for _, m in new])):
+                self.seen.add(key)
+                self.emitted += 1
+                for formatter in self.formatters:
+                    formatter(message, node, graph_id)
+
+    def consume(self, stream):
+        """write() every chunk, returns the last one."""
+        last = None
+        for chunk in stream:
+            self.write(chunk)
+            last = chunk
+        return last
+
+    async def aconsume(self, stream):
+        last = None
+        async for chunk in stream:
+            self.write(chunk)
+            last = chunk
+        return last
+
+
+# benchmark: per-chunk cost as the conversation grows
+def synthetic_chunks(turns: int):
+    """Supervisor-style updates: every chunk carries the whole history so far."""
+    from langchain_core.messages import AIMessage, HumanMessage
+
+    history = [HumanMessage(content="find US and New York state GDP", id="m0")]
+    for i in range(1, turns + 1):
+        history = history + [AIMessage(content=f"step {i}: partial result", name="research_agent", id=f"m{i}")]
+        yield {"research_agent": {"messages": history}}
+
+
+def benchmark(sizes=(10, 100, 500, 1000)):
+    from langchain_core.messages import convert_to_messages
+
+    print(f"{'history':>8s} {'convert all us/chunk':>21s} {'sink us/chunk':>14s}")
+    for size in sizes:
+        chunks = list(synthetic_chunks(size))
+        tail = chunks[-50:]
+
+        # the old way: convert the whole list, then print the last message
+        out = io.StringIO()
+        start = time.perf_counter()
+        for chunk in tail:
+            for update in chunk.values():
+                messages = convert_to_messages(update["messages"])[-1:]
+                for m in messages:
+                    out.write(m.pretty_repr() + "\n")
+        full = (time.perf_counter() - start) / len(tail) * 1e6
+
+        sink = StreamSink([ConsoleFormatter(io.StringIO())])
+        for chunk in chunks[:-50]:
+            sink.write(chunk)
+        start = time.perf_counter()
+        for chunk in tail:
+            sink.write(chunk)
+        delta = (time.perf_counter() - start) / len(tail) * 1e6
+
+        print(f"{size:8d} {full:21.1f} {delta:14.1f}")
+
+
+#demo
+def main():
+    parser = argparse.ArgumentParser(description="Delta-only stream output.")
+    parser.add_argument("--format", choices=("console", "jsonl"), default="console")
+    args = parser.parse_args()
+
+    from langchain_core.runnables import RunnableConfig
+    from offline_load_test import build_offline_graphs, new_session
+
+    graph, _ = build_offline_graphs()["supervisor"]
+    formatter = ConsoleFormatter() if args.format == "console" else JsonlFormatter(sys.stdout)
+    sink = StreamSink([formatter])
+
+    print("=== Offline supervisor run, new messages only ===\n")
+    sink.consume(graph.stream(new_session(), subgraphs=True, config=RunnableConfig()))
+    print(f"emitted {sink.emitted} messages\n")
+
+    print("=== Per-chunk cost ===\n")
+    benchmark()
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,26 @@
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
 from typing import Annotated
 
-from langchain_ollama import ChatOllama
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.messages import convert_to_messages
-from langchain_core.runnables import RunnableConfig
-from langchain_core.tools import tool, InjectedToolCallId
-
-from langgraph.graph import StateGraph, START, END, MessagesState
-from langgraph.prebuilt import create_react_agent, InjectedState
-from langgraph.types import Command
+from safe_calculator import calculate
 
 load_dotenv()
 
+# langchain / langgraph / ollama are imported inside the functions that use
+# them and every heavy object is built on first use by a cached get_* factory,
+# so importing this module is cheap (see cold_start_bench.py).
+
 
 #llm
-model = ChatOllama(
-    model="qwen2.5:3b-instruct",
-    temperature=0.0,
-)
+@lru_cache(maxsize=None)
+def get_model():
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model="qwen2.5:3b-instruct",
+        temperature=0.0,
+    )
 
 
 #tools - math
@@ -36,43 +37,59 @@ def divide(a: float, b: float) -> float:
     return a / b
 
 #search tool
-tavily_api_key = os.getenv("TAVILY_API_KEY")
-web_search = TavilySearchResults(
-    max_results=3,
-    tavily_api_key=tavily_api_key,
-)
+@lru_cache(maxsize=None)
+def get_web_search():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    tavily_api_key = os.getenv("TAVILY_API_KEY")
+    return TavilySearchResults(
+        max_results=3,
+        tavily_api_key=tavily_api_key,
+    )
 
 
 #agents
-research_agent = create_react_agent(
-    model=model,
-    tools=[web_search],
-    name="research_agent",
-    prompt=(
-        "You are a research agent.\n\n"
-        "INSTRUCTIONS:\n"
-        "- Assist ONLY with research-related tasks.\n"
-        "- Use the web_search tool when needed to fetch data.\n"
-        "- DO NOT do any math.\n"
-        "- After you're done, respond to the supervisor directly with "
-        "the data you found.\n"
-        "- Respond ONLY with the results of your work, no extra meta talk."
-    ),
-)
-
-math_agent = create_react_agent(
-    model=model,
-    tools=[add, multiply, divide],
-    name="math_agent",
-    prompt=(
-        "You are a math agent.\n\n"
-        "INSTRUCTIONS:\n"
-        "- Assist ONLY with math-related tasks.\n"
-        "- You may receive numbers or facts from the research agent.\n"
-        "- Use add / multiply / divide to compute answers.\n"
-        "- Respond ONLY with the final numeric result and a short explanation."
-    ),
-)
+def build_research_agent(model, web_search):
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        model=model,
+        tools=[web_search],
+        name="research_agent",
+        prompt=(
+            "You are a research agent.\n\n"
+            "INSTRUCTIONS:\n"
+            "- Assist ONLY with research-related tasks.\n"
+            "- Use the web_search tool when needed to fetch data.\n"
+            "- DO NOT do any math.\n"
+            "- After you're done, respond to the supervisor directly with "
+            "the data you found.\n"
+            "- Respond ONLY with the results of your work, no extra meta talk."
+        ),
+    )
+
+def build_math_agent(model, expression_tool: bool = True):
+    from langgraph.prebuilt import create_react_agent
+
+    tools = [add, multiply, divide]
+    calculate_hint = "- Use add / multiply / divide to compute answers.\n"
+    if expression_tool:
+        tools = [calculate, *tools]
+        calculate_hint = "- Use calculate to evaluate a whole expression in ONE call.\n"
+
+    return create_react_agent(
+        model=model,
+        tools=tools,
+        name="math_agent",
+        prompt=(
+            "You are a math agent.\n\n"
+            "INSTRUCTIONS:\n"
+            "- Assist ONLY with math-related tasks.\n"
+            "- You may receive numbers or facts from the research agent.\n"
+            f"{calculate_hint}"
+            "- Respond ONLY with the final numeric result and a short explanation."
+        ),
+    )
 
 
 # Concept:
@@ -88,6 +105,11 @@ def create_handoff_tool(*, agent_name: str, description: str | None = None):
     - Appends a 'successfully transferred' tool message to messages,
     - Returns Command telling LangGraph to go to the target agent node.
     """
+    from langchain_core.tools import tool, InjectedToolCallId
+    from langgraph.graph import MessagesState
+    from langgraph.prebuilt import InjectedState
+    from langgraph.types import Command
+
     name = f"transfer_to_{agent_name}"
     description = description or f"Ask {agent_name} for help."
 
@@ -117,49 +139,265 @@ def create_handoff_tool(*, agent_name: str, description: str | None = None):
     return handoff_tool
 
 #concrete handoff tools for each worker agent
-assign_to_research_agent = create_handoff_tool(
-    agent_name="research_agent",
-    description="Assign task to the research agent.",
-)
+@lru_cache(maxsize=None)
+def get_assign_to_research_agent():
+    return create_handoff_tool(
+        agent_name="research_agent",
+        description="Assign task to the research agent.",
+    )
 
-assign_to_math_agent = create_handoff_tool(
-    agent_name="math_agent",
-    description="Assign task to the math agent.",
-)
+@lru_cache(maxsize=None)
+def get_assign_to_math_agent():
+    return create_handoff_tool(
+        agent_name="math_agent",
+        description="Assign task to the math agent.",
+    )
 
 #supervisor here is a ReAct agent
-supervisor_agent = create_react_agent(
-    model=model,
-    tools=[assign_to_research_agent, assign_to_math_agent],
-    prompt=(
-        "You are a supervisor managing two agents:\n"
-        "- research_agent: Assign research / web lookup tasks to this agent.\n"
-        "- math_agent: Assign mathematical / calculation tasks to this agent.\n\n"
-        "RULES:\n"
-        "- For questions like 'find GDP then compute %', FIRST send the task\n"
-        "  to research_agent, then send the numeric results to math_agent.\n"
-        "- Do not call agents in parallel; always one at a time.\n"
-        "- Do NOT do any research or math yourself.\n"
-        "- Use ONLY the handoff tools (transfer_to_*) to delegate work.\n"
-    ),
-    name="supervisor",
-)
+def build_supervisor_agent(model):
+    from langgraph.prebuilt import create_react_agent
+
+    return create_react_agent(
+        model=model,
+        tools=[get_assign_to_research_agent(), get_assign_to_math_agent()],
+        prompt=(
+            "You are a supervisor managing two agents:\n"
+            "- research_agent: Assign research / web lookup tasks to this agent.\n"
+            "- math_agent: Assign mathematical / calculation tasks to this agent.\n\n"
+            "RULES:\n"
+            "- For questions like 'find GDP then compute %', FIRST send the task\n"
+            "  to research_agent, then send the numeric results to math_agent.\n"
+            "- Do not call agents in parallel; always one at a time.\n"
+            "- Do NOT do any research or math yourself.\n"
+            "- Use ONLY the handoff tools (transfer_to_*) to delegate work.\n"
+        ),
+        name="supervisor",
+    )
+
+
+# Concept (speculative mode):
+#   - Normally a worker can only start after the supervisor LLM has finished
+#     generating its transfer_to_* call, which is pure serial latency.
+#   - A cheap predictor guesses the next worker from the messages. The guess
+#     starts running concurrently with the supervisor LLM call.
+#   - Supervisor picks the same worker -> the speculative result is committed
+#     and the worker node is skipped. Anything else -> it is cancelled.
+#   - The handoff tools take no arguments, so the only thing the supervisor
+#     adds is WHICH worker: a speculative run sees the same messages the real
+#     one would, minus the two handoff messages.
+#   - The node is async, so a speculative graph is run with ainvoke / astream.
+RESEARCH_KEYWORDS = ("find", "search", "look up", "latest", "gdp", "population", "who", "when")
+MATH_KEYWORDS = ("%", "percent", "calculate", "compute", "sum", "average", "ratio", "how much")
+
+
+def _worker_replies(messages):
+    return {getattr(m, "name", None) for m in messages if getattr(m, "type", "") == "ai"}
+
+
+def _first_user_text(messages) -> str:
+    for m in messages:
+        if getattr(m, "type", "") == "human":
+            return str(m.content).lower()
+    return ""
+
+
+class KeywordPredictor:
+    """Research first when the query needs facts, math once research has replied."""
+
+    def __call__(self, messages) -> str | None:
+        query = _first_user_text(messages)
+        replied = _worker_replies(messages)
+        needs_research = any(k in query for k in RESEARCH_KEYWORDS)
+        needs_math = any(k in query for k in MATH_KEYWORDS)
+
+        if needs_research and "research_agent" not in replied:
+            return "research_agent"
+        if needs_math and "math_agent" not in replied:
+            return "math_agent"
+        return None
+
+    def observe(self, messages, decision: str | None):
+        pass
+
+
+class PreviousDecisionPredictor:
+    """Predict whatever the supervisor chose last time after the same worker."""
+
+    def __init__(self, fallback=None):
+        self.fallback = fallback
+        self.decisions: dict[str, str | None] = {}
+
+    @staticmethod
+    def _last_speaker(messages) -> str:
+        for m in reversed(messages):
+            name = getattr(m, "name", None)
+            if getattr(m, "type", "") == "ai" and name in ("research_agent", "math_agent"):
+                return name
+        return "start"
+
+    def __call__(self, messages) -> str | None:
+        key = self._last_speaker(messages)
+        if key in self.decisions:
+            return self.decisions[key]
+        return self.fallback(messages) if self.fallback else None
+
+    def observe(self, messages, decision: str | None):
+        self.decisions[self._last_speaker(messages)] = decision
+
+
+class Speculator:
+    """Wraps the supervisor node: runs the predicted worker while the supervisor decides."""
+
+    def __init__(self, predictor=None):
+        self.predictor = predictor or KeywordPredictor()
+        self.predictions = 0
+        self.hits = 0
+        self.misses = 0
+        self.overlap_seconds = 0.0    # worker time hidden behind the supervisor call (hits)
+        self.wasted_seconds = 0.0     # worker time thrown away (misses)
+
+    @property
+    def hit_rate(self) -> float:
+        return self.hits / self.predictions if self.predictions else 0.0
+
+    def stats(self) -> dict:
+        return {
+            "predictions": self.predictions,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hit_rate,
+            "overlap_seconds": self.overlap_seconds,
+            "wasted_seconds": self.wasted_seconds,
+        }
+
+    def wrap(self, supervisor_agent, workers: dict):
+        """Async supervisor node that starts the predicted worker alongside the supervisor.
+
+        On a hit the worker's result is used as is. The worker started before the
+        supervisor decided, so it ran WITHOUT the supervisor's handoff messages in its
+        input, which is not exactly what the non-speculative path would have sent it.
+        On a miss, or if the supervisor fails, the worker task is cancelled and awaited.
+        """
+        import asyncio
+        import time
+
+        from langgraph.errors import ParentCommand
+        from langgraph.types import Command
+
+        async def speculative_supervisor(state, config):
+            messages = state["messages"]
+            predicted = self.predictor(messages)
+            task = None
+            started = time.perf_counter()
+            if predicted in workers:
+                self.predictions += 1
+                task = asyncio.create_task(workers[predicted].ainvoke({"messages": messages}, config))
+
+            async def discard():
+                task.cancel()
+                try:
+                    await task
+                except (asyncio.CancelledError, Exception):
+                    pass
+
+            decision, command, result = None, None, None
+            try:
+                result = await supervisor_agent.ainvoke(state, config)
+            except ParentCommand as e:
+                command = e.args[0]
+                decision = command.goto if isinstance(command.goto, str) else None
+            except BaseException:
+                # supervisor failed or was cancelled: don't leave the worker running
+                if task is not None:
+                    await discard()
+                raise
+            decided = time.perf_counter()
+            self.predictor.observe(messages, decision)
+
+            if task is not None and decision == predicted:
+                self.hits += 1
+                self.overlap_seconds += decided - started
+                worker_result = await task
+                # supervisor's handoff messages, then everything the worker added
+                handoff_messages = command.update["messages"]
+                new_messages = worker_result["messages"][len(messages):]
+                return Command(goto="supervisor", update={"messages": handoff_messages + new_messages})
+
+            if task is not None:
+                self.misses += 1
+                await discard()
+                self.wasted_seconds += time.perf_counter() - started
+
+            if command is not None:
+                raise ParentCommand(command)
+            return result
+
+        return speculative_supervisor
 
 
 #build graph
-supervisor_graph = (
-    StateGraph(MessagesState)
-    # destinations is only for visualization, not needed for logic
-    .add_node("supervisor", supervisor_agent, destinations=("research_agent", "math_agent", END))
-    .add_node("research_agent", research_agent)
-    .add_node("math_agent", math_agent)
-    # Entry: always start at supervisor
-    .add_edge(START, "supervisor")
-    # After each worker finishes, control returns to supervisor
-    .add_edge("research_agent", "supervisor")
-    .add_edge("math_agent", "supervisor")
-    .compile()
-)
+def build_supervisor_graph(supervisor_agent, research_agent, math_agent, speculator: Speculator | None = None):
+    from langgraph.graph import StateGraph, START, END, MessagesState
+
+    supervisor_node = supervisor_agent
+    destinations = ("research_agent", "math_agent", END)
+    if speculator is not None:
+        supervisor_node = speculator.wrap(
+            supervisor_agent,
+            {"research_agent": research_agent, "math_agent": math_agent},
+        )
+        destinations = ("supervisor", *destinations)
+
+    return (
+        StateGraph(MessagesState)
+        # destinations is only for visualization, not needed for logic
+        .add_node("supervisor", supervisor_node, destinations=destinations)
+        .add_node("research_agent", research_agent)
+        .add_node("math_agent", math_agent)
+        # Entry: always start at supervisor
+        .add_edge(START, "supervisor")
+        # After each worker finishes, control returns to supervisor
+        .add_edge("research_agent", "supervisor")
+        .add_edge("math_agent", "supervisor")
+        .compile()
+    )
+
+
+#cached instances - built once, on first use
+@lru_cache(maxsize=None)
+def get_research_agent():
+    return build_research_agent(get_model(), get_web_search())
+
+@lru_cache(maxsize=None)
+def get_math_agent():
+    return build_math_agent(get_model())
+
+@lru_cache(maxsize=None)
+def get_supervisor_agent():
+    return build_supervisor_agent(get_model())
+
+@lru_cache(maxsize=None)
+def get_supervisor_graph():
+    return build_supervisor_graph(get_supervisor_agent(), get_research_agent(), get_math_agent())
+
+
+# old module attributes keep working, resolved lazily on first access
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "web_search": get_web_search,
+    "assign_to_research_agent": get_assign_to_research_agent,
+    "assign_to_math_agent": get_assign_to_math_agent,
+    "research_agent": get_research_agent,
+    "math_agent": get_math_agent,
+    "supervisor_agent": get_supervisor_agent,
+    "supervisor_graph": get_supervisor_graph,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 #pretty print helpers
@@ -173,6 +411,8 @@ def pretty_print_message(message, indent: bool = False):
 
 
 def pretty_print_messages(update, last_message: bool = False):
+    from langchain_core.messages import convert_to_messages
+
     is_subgraph = False
     if isinstance(update, tuple):
         ns, update = update
@@ -190,9 +430,11 @@ def pretty_print_messages(update, last_message: bool = False):
         print(update_label)
         print("\n")
 
-        messages = convert_to_messages(node_update["messages"])
+        # slice first, only the messages we print get converted
+        messages = node_update["messages"]
         if last_message:
             messages = messages[-1:]
+        messages = convert_to_messages(messages)
 
         for m in messages:
             pretty_print_message(m, indent=is_subgraph)
@@ -202,6 +444,9 @@ def pretty_print_messages(update, last_message: bool = False):
     
 #demo
 def main():
+    from langchain_core.runnables import RunnableConfig
+
+    supervisor_graph = get_supervisor_graph()
     query = (
         "find US and New York state GDP in 2022. "
         "what % of US GDP was New York state?"
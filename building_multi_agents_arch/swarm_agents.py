@@ -1,22 +1,24 @@
 from dotenv import load_dotenv
+from functools import lru_cache
 import os
 
-from langchain_ollama import ChatOllama
-from langchain_community.tools.tavily_search import TavilySearchResults
-from langchain_core.messages import convert_to_messages
-from langchain_core.runnables import RunnableConfig
-
-from langgraph.graph import START, END
-from langgraph.prebuilt import create_react_agent
-from langgraph_swarm import create_swarm, create_handoff_tool
+from safe_calculator import calculate
 
 load_dotenv()
 
+# Import is kept light on purpose: the swarm, its agents, the model and the
+# search tool come from cached get_* factories and pull in langgraph_swarm /
+# ollama / tavily only when first called.
+
 #llm
-model = ChatOllama(
-    model="qwen2.5:3b-instruct",
-    temperature=0.0,
-)
+@lru_cache(maxsize=None)
+def get_model():
+    from langchain_ollama import ChatOllama
+
+    return ChatOllama(
+        model="qwen2.5:3b-instruct",
+        temperature=0.0,
+    )
 
 
 #math tools
@@ -34,11 +36,15 @@ def divide(a: float, b: float) -> float:
 
 
 #search tool
-tavily_api_key = os.getenv("TAVILY_API_KEY")
-web_search = TavilySearchResults(
-    max_results=3,
-    tavily_api_key=tavily_api_key,
-)
+@lru_cache(maxsize=None)
+def get_web_search():
+    from langchain_community.tools.tavily_search import TavilySearchResults
+
+    tavily_api_key = os.getenv("TAVILY_API_KEY")
+    return TavilySearchResults(
+        max_results=3,
+        tavily_api_key=tavily_api_key,
+    )
 
 
 #swarm handoff
@@ -48,61 +54,249 @@ web_search = TavilySearchResults(
 #   - Each agent can call these tools to hand control to the OTHER agent.
 #   - There is NO central supervisor node; agents coordinate among themselves.
 
-handoff_to_research_agent = create_handoff_tool(
-    agent_name="research_agent",
-    description=(
-        "Transfer control to the research agent for web searches and "
-        "information gathering."
-    ),
-)
+@lru_cache(maxsize=None)
+def get_handoff_to_research_agent():
+    from langgraph_swarm import create_handoff_tool
 
-handoff_to_math_agent = create_handoff_tool(
-    agent_name="math_agent",
-    description=(
-        "Transfer control to the math agent for numerical calculations "
-        "and percentage computations."
-    ),
-)
+    return create_handoff_tool(
+        agent_name="research_agent",
+        description=(
+            "Transfer control to the research agent for web searches and "
+            "information gathering."
+        ),
+    )
+
+@lru_cache(maxsize=None)
+def get_handoff_to_math_agent():
+    from langgraph_swarm import create_handoff_tool
+
+    return create_handoff_tool(
+        agent_name="math_agent",
+        description=(
+            "Transfer control to the math agent for numerical calculations "
+            "and percentage computations."
+        ),
+    )
+
+
+#scoped views + payload handoffs
+# Concept:
+#   - By default every agent reads the WHOLE shared history, so math_agent
+#     re-reads every search result on every turn.
+#   - A payload handoff tool takes `summary` + `data` arguments: the sender
+#     writes down what the next agent needs, and that compact payload rides on
+#     the handoff ToolMessage (as its artifact).
+#   - ScopedView is a pre_model_hook: the agent's LLM only sees the user query,
+#     the payloads handed to it and its own turns (with their tool results).
+#     The shared history itself is untouched, it is only what is SENT that shrinks.
+
+HANDOFF_PAYLOAD_KEY = "handoff_payload"
+
+
+def create_payload_handoff_tool(agent_name: str, description: str):
+    """Like langgraph_swarm's create_handoff_tool, plus a structured payload."""
+    import json
+    from typing import Annotated
+
+    from langchain_core.messages import ToolMessage
+    from langchain_core.tools import InjectedToolCallId, tool
+    from langgraph.prebuilt import InjectedState
+    from langgraph.types import Command
+    from langgraph_swarm.handoff import METADATA_KEY_HANDOFF_DESTINATION
+
+    name = f"transfer_to_{agent_name}"
+
+    @tool(name, description=f"{description} Put what {agent_name} needs in `summary` and the key values in `data`.")
+    def handoff_to_agent(
+        summary: str,
+        state: Annotated[dict, InjectedState],
+        tool_call_id: Annotated[str, InjectedToolCallId],
+        data: dict | None = None,
+    ):
+        sender = next((m.name for m in reversed(state["messages"]) if m.type == "ai"), None)
+        payload = {"from": sender, "to": agent_name, "summary": summary, "data": data or {}}
+        tool_message = ToolMessage(
+            content=f"Successfully transferred to {agent_name}: {summary} {json.dumps(data or {})}",
+            name=name,
+            tool_call_id=tool_call_id,
+            artifact={HANDOFF_PAYLOAD_KEY: payload},
+        )
+        return Command(
+            goto=agent_name,
+            graph=Command.PARENT,
+            update={"messages": [*state["messages"], tool_message], "active_agent": agent_name},
+        )
+
+    handoff_to_agent.metadata = {METADATA_KEY_HANDOFF_DESTINATION: agent_name}
+    return handoff_to_agent
+
+
+def handoff_payload(message) -> dict | None:
+    """The payload a handoff ToolMessage carries, None for any other message."""
+    artifact = getattr(message, "artifact", None)
+    if message.type == "tool" and isinstance(artifact, dict):
+        return artifact.get(HANDOFF_PAYLOAD_KEY)
+    return None
+
+
+class ScopedView:
+    """pre_model_hook that decides which part of the shared history an agent's LLM sees."""
+
+    def __init__(
+        self,
+        agent_name: str,
+        user_messages: bool = True,   # the user's query / follow-ups
+        own_turns: bool = True,       # this agent's AI messages + their tool results
+        payloads: bool = True,        # handoff payloads addressed to this agent
+        foreign_replies: int = 0,     # also the last N plain answers of other agents
+    ):
+        self.agent_name = agent_name
+        self.user_messages = user_messages
+        self.own_turns = own_turns
+        self.payloads = payloads
+        self.foreign_replies = foreign_replies
+
+    def render_payload(self, payload: dict):
+        import json
+        from langchain_core.messages import HumanMessage
+
+        data = json.dumps(payload["data"], separators=(",", ":")) if payload["data"] else ""
+        return HumanMessage(content=f"[handoff from {payload['from']}] {payload['summary']} {data}".strip())
+
+    def select(self, messages) -> list:
+        own_calls = set()
+        foreign = [
+            i for i, m in enumerate(messages)
+            if m.type == "ai" and m.name != self.agent_name and m.content and not m.tool_calls
+        ]
+        keep_foreign = set(foreign[-self.foreign_replies:]) if self.foreign_replies else set()
+
+        view = []
+        for i, m in enumerate(messages):
+            if m.type == "human":
+                if self.user_messages:
+                    view.append(m)
+            elif m.type == "ai" and m.name == self.agent_name:
+                if self.own_turns:
+                    view.append(m)
+                    own_calls.update(c["id"] for c in m.tool_calls)
+            elif m.type == "tool" and m.tool_call_id in own_calls:
+                view.append(m)
+            elif m.type == "tool":
+                payload = handoff_payload(m)
+                if self.payloads and payload and payload["to"] == self.agent_name:
+                    view.append(self.render_payload(payload))
+            elif i in keep_foreign:
+                view.append(m)
+        return view
+
+    def __call__(self, state) -> dict:
+        return {"llm_input_messages": self.select(state["messages"])}
 
 
 # worker agents - not supervised but part of a swarm
 # both are ReAct agents
-research_agent = create_react_agent(
-    model=model,
-    tools=[web_search, handoff_to_math_agent],
-    name="research_agent",
-    prompt=(
-        "You are a research agent specialized in web research and information gathering.\n\n"
-        "INSTRUCTIONS:\n"
-        "- Handle research-related tasks, web searches, and information gathering.\n"
-        "- DO NOT attempt mathematical calculations yourself.\n"
-        "- When you have gathered numeric data but a calculation is needed "
-        "  (e.g., percentages), use handoff_to_math_agent to hand off.\n"
-        "- When you finish research tasks, answer clearly with the facts you found."
-    ),
-)
-
-math_agent = create_react_agent(
-    model=model,
-    tools=[add, multiply, divide, handoff_to_research_agent],
-    name="math_agent",
-    prompt=(
-        "You are a math agent specialized in numerical calculations.\n\n"
-        "INSTRUCTIONS:\n"
-        "- Handle mathematical calculations, such as percentages or ratios.\n"
-        "- DO NOT perform web research yourself.\n"
-        "- If you need missing data (e.g., GDP numbers), use handoff_to_research_agent.\n"
-        "- When you finish, provide a clear numeric result and short explanation."
-    ),
-)
+# view=ScopedView(...) -> payload handoffs + scoped history, else the shared history
+def build_research_agent(model, web_search, view: ScopedView | None = None):
+    from langgraph.prebuilt import create_react_agent
+
+    handoff_tool = get_handoff_to_math_agent()
+    if view is not None:
+        handoff_tool = create_payload_handoff_tool(
+            agent_name="math_agent",
+            description=handoff_tool.description,
+        )
+
+    return create_react_agent(
+        model=model,
+        tools=[web_search, handoff_tool],
+        pre_model_hook=view,
+        name="research_agent",
+        prompt=(
+            "You are a research agent specialized in web research and information gathering.\n\n"
+            "INSTRUCTIONS:\n"
+            "- Handle research-related tasks, web searches, and information gathering.\n"
+            "- DO NOT attempt mathematical calculations yourself.\n"
+            "- When you have gathered numeric data but a calculation is needed "
+            "  (e.g., percentages), use handoff_to_math_agent to hand off.\n"
+            "- When you finish research tasks, answer clearly with the facts you found."
+        ),
+    )
+
+def build_math_agent(model, expression_tool: bool = True, view: ScopedView | None = None):
+    from langgraph.prebuilt import create_react_agent
+
+    handoff_tool = get_handoff_to_research_agent()
+    if view is not None:
+        handoff_tool = create_payload_handoff_tool(
+            agent_name="research_agent",
+            description=handoff_tool.description,
+        )
+
+    tools = [add, multiply, divide, handoff_tool]
+    calculate_hint = ""
+    if expression_tool:
+        tools = [calculate, *tools]
+        calculate_hint = "- Use calculate to evaluate a whole expression in ONE call.\n"
+
+    return create_react_agent(
+        model=model,
+        tools=tools,
+        pre_model_hook=view,
+        name="math_agent",
+        prompt=(
+            "You are a math agent specialized in numerical calculations.\n\n"
+            "INSTRUCTIONS:\n"
+            "- Handle mathematical calculations, such as percentages or ratios.\n"
+            f"{calculate_hint}"
+            "- DO NOT perform web research yourself.\n"
+            "- If you need missing data (e.g., GDP numbers), use handoff_to_research_agent.\n"
+            "- When you finish, provide a clear numeric result and short explanation."
+        ),
+    )
 
 
 #create swarm - swarm means to large group of insects btw 😂
 # default_active_agent = where we start. Here we start in math_agent
-swarm_agent = create_swarm(
-    agents=[research_agent, math_agent],
-    default_active_agent="math_agent",
-).compile()
+def build_swarm_agent(research_agent, math_agent, checkpointer=None):
+    from langgraph_swarm import create_swarm
+
+    return create_swarm(
+        agents=[research_agent, math_agent],
+        default_active_agent="math_agent",
+    ).compile(checkpointer=checkpointer)
+
+
+#cached instances - built once, on first use
+@lru_cache(maxsize=None)
+def get_research_agent():
+    return build_research_agent(get_model(), get_web_search())
+
+@lru_cache(maxsize=None)
+def get_math_agent():
+    return build_math_agent(get_model())
+
+@lru_cache(maxsize=None)
+def get_swarm_agent():
+    return build_swarm_agent(get_research_agent(), get_math_agent())
+
+
+# old module attributes keep working, resolved lazily on first access
+_LAZY_ATTRIBUTES = {
+    "model": get_model,
+    "web_search": get_web_search,
+    "handoff_to_research_agent": get_handoff_to_research_agent,
+    "handoff_to_math_agent": get_handoff_to_math_agent,
+    "research_agent": get_research_agent,
+    "math_agent": get_math_agent,
+    "swarm_agent": get_swarm_agent,
+}
+
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return _LAZY_ATTRIBUTES[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 #pretty print helpers
@@ -116,6 +310,8 @@ def pretty_print_message(message, indent: bool = False):
 
 
 def pretty_print_messages(update, last_message: bool = False):
+    from langchain_core.messages import convert_to_messages
+
     is_subgraph = False
     if isinstance(update, tuple):
         ns, update = update
@@ -133,9 +329,11 @@ def pretty_print_messages(update, last_message: bool = False):
         print(update_label)
         print("\n")
 
-        messages = convert_to_messages(node_update["messages"])
+        # slice first, only the messages we print get converted
+        messages = node_update["messages"]
         if last_message:
             messages = messages[-1:]
+        messages = convert_to_messages(messages)
 
         for m in messages:
             pretty_print_message(m, indent=is_subgraph)
@@ -145,6 +343,9 @@ def pretty_print_messages(update, last_message: bool = False):
 #demo
 def test_swarm_functionality():
     """Test swarm pattern with GDP-style query to see handoffs."""
+    from langchain_core.runnables import RunnableConfig
+
+    swarm_agent = get_swarm_agent()
     query = (
         "find US and New York state GDP in 2024. "
         "what % of US GDP was New York state?"
@@ -0,0 +1,277 @@
+import argparse
+import json
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional, TypedDict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+
+# Concept:
+#   - SpanTracer is a callback handler: pass it in config["callbacks"] and it
+#     records one span per graph node (including the nodes of nested
+#     supervisor / swarm subgraphs), per LLM call and per tool call.
+#   - A tool that returns a Command (transfer_to_* and custom handoff tools)
+#     is recorded as a "handoff" span with its goto target.
+#   - export_chrome_trace() writes the Chrome trace event format, which opens
+#     as a flame / timeline view in chrome://tracing or https://ui.perfetto.dev.
+#   - Each top-level run is one "process" in the viewer, so concurrent
+#     sessions traced with the same tracer show up side by side.
+
+# tag LangGraph puts on the run of every node task (inner runnables don't have it)
+NODE_TAG_PREFIX = "graph:step:"
+MAX_ARG_CHARS = 200
+
+
+class Span(TypedDict):
+    id: str
+    parent_id: Optional[str]
+    session: int             # index of the top-level run the span belongs to
+    name: str
+    category: str            # "graph" | "node" | "llm" | "tool" | "handoff"
+    start_us: float
+    end_us: Optional[float]
+    args: Dict[str, Any]
+
+
+def _short(value: Any) -> str:
+    text = value if isinstance(value, str) else repr(value)
+    return text if len(text) <= MAX_ARG_CHARS else text[:MAX_ARG_CHARS] + "..."
+
+
+def agent_of(metadata: Dict[str, Any]) -> str:
+    """Innermost subgraph in the checkpoint namespace, else the node name."""
+    ns = metadata.get("checkpoint_ns") or ""
+    if ns:
+        return ns.split("|")[-1].split(":")[0]
+    return metadata.get("langgraph_node", "")
+
+
+def _is_bubble_up(error: BaseException) -> bool:
+    # Command(graph=PARENT) and interrupts travel up as exceptions, they are not failures
+    from langgraph.errors import GraphBubbleUp
+
+    return isinstance(error, GraphBubbleUp)
+
+
+class SpanTracer(BaseCallbackHandler):
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._open: Dict[UUID, Span] = {}
+        # run ids we skip (inner runnables) still need to map to a recorded ancestor
+        self._ancestor: Dict[UUID, Optional[UUID]] = {}
+        self._sessions: Dict[UUID, int] = {}
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def _now_us(self) -> float:
+        return (time.perf_counter() - self._origin) * 1e6
+
+    def _recorded_parent(self, parent_run_id: Optional[UUID]) -> Optional[UUID]:
+        while parent_run_id is not None and parent_run_id not in self._open:
+            parent_run_id = self._ancestor.get(parent_run_id)
+        return parent_run_id
+
+    def _start(self, run_id, parent_run_id, name: str, category: str, args: Dict[str, Any]):
+        with self._lock:
+            parent = self._recorded_parent(parent_run_id)
+            if parent is None:
+                session = self._sessions.setdefault(run_id, len(self._sessions))
+            else:
+                session = self._open[parent]["session"]
+            span: Span = {
+                "id": str(run_id),
+                "parent_id": str(parent) if parent else None,
+                "session": session,
+                "name": name,
+                "category": category,
+                "start_us": self._now_us(),
+                "end_us": None,
+                "args": args,
+            }
+            self._open[run_id] = span
+            self.spans.append(span)
+
+    def _skip(self, run_id, parent_run_id):
+        with self._lock:
+            self._ancestor[run_id] = parent_run_id
+
+    def _end(self, run_id, **args):
+        with self._lock:
+            self._ancestor.pop(run_id, None)
+            span = self._open.pop(run_id, None)
+            if span is None:
+                return
+            span["end_us"] = self._now_us()
+            span["args"].update(args)
+
+    # graph + node spans
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name", "chain")
+        if parent_run_id is None:
+            self._start(run_id, None, name, "graph", {})
+        elif any(t.startswith(NODE_TAG_PREFIX) for t in tags or []) and name == metadata.get("langgraph_node"):
+            self._start(run_id, parent_run_id, name, "node", {
+                "step": metadata.get("langgraph_step"),
+                "checkpoint_ns": metadata.get("checkpoint_ns", ""),
+            })
+        else:
+            self._skip(run_id, parent_run_id)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        if _is_bubble_up(error):
+            self._end(run_id, bubbled=type(error).__name__)
+        else:
+            self._end(run_id, error=_short(error))
+
+    # LLM spans
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        metadata = metadata or {}
+        agent = agent_of(metadata)
+        self._start(run_id, parent_run_id, agent or "llm", "llm", {
+            "agent": agent,
+            "model": metadata.get("ls_model_name", ""),
+            "input_messages": sum(len(batch) for batch in messages),
+        })
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        args = {}
+        generations = [g for batch in response.generations for g in batch]
+        message = getattr(generations[0], "message", None) if generations else None
+        usage = getattr(message, "usage_metadata", None) or {}
+        if usage:
+            args["input_tokens"] = usage.get("input_tokens", 0)
+            args["output_tokens"] = usage.get("output_tokens", 0)
+        if message is not None and getattr(message, "tool_calls", None):
+            args["tool_calls"] = [c["name"] for c in message.tool_calls]
+        self._end(run_id, **args)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=_short(error))
+
+    # tool + handoff spans
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        name = kwargs.get("name") or (serialized or {}).get("name", "tool")
+        self._start(run_id, parent_run_id, name, "tool", {
+            "agent": agent_of(metadata or {}),
+            "input": _short(input_str),
+        })
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        from langgraph.types import Command
+
+        if isinstance(output, Command):
+            with self._lock:
+                span = self._open.get(run_id)
+                if span is not None:
+                    span["category"] = "handoff"
+            goto = output.goto if isinstance(output.goto, str) else _short(output.goto)
+            self._end(run_id, goto=goto)
+        else:
+            self._end(run_id, output=_short(getattr(output, "content", output)))
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        self._end(run_id, error=_short(error))
+
+    # export
+    def to_chrome_trace(self) -> Dict[str, Any]:
+        """Chrome trace event format ("X" complete events, one pid per session)."""
+        with self._lock:
+            now = self._now_us()
+            spans = sorted(self.spans, key=lambda s: (s["start_us"], -(s["end_us"] or now)))
+
+        # the viewer nests events by time on one thread, so a span only goes on a
+        # lane whose innermost open span is its parent (or on an idle lane);
+        # parallel branches and concurrent LLM calls end up on separate lanes
+        lane_of: Dict[str, int] = {}
+        stacks: Dict[int, List[List[tuple]]] = {}   # session -> lanes -> [(end, span id)]
+        events = []
+        for span in spans:
+            end = span["end_us"] if span["end_us"] is not None else now
+            lanes = stacks.setdefault(span["session"], [])
+            preferred = [lane_of[span["parent_id"]]] if span["parent_id"] in lane_of else []
+            lane = len(lanes)
+            for candidate in preferred + list(range(len(lanes))):
+                stack = lanes[candidate]
+                while stack and stack[-1][0] <= span["start_us"]:
+                    stack.pop()
+                if not stack or (stack[-1][1] == span["parent_id"] and stack[-1][0] >= end):
+                    lane = candidate
+                    break
+            if lane == len(lanes):
+                lanes.append([])
+            lanes[lane].append((end, span["id"]))
+            lane_of[span["id"]] = lane
+
+            events.append({
+                "name": span["name"],
+                "cat": span["category"],
+                "ph": "X",
+                "ts": round(span["start_us"], 3),
+                "dur": round(end - span["start_us"], 3),
+                "pid": span["session"],
+                "tid": lane,
+                "args": dict(span["args"], unfinished=True) if span["end_us"] is None else span["args"],
+            })
+
+        for session in sorted({s["session"] for s in spans}):
+            events.append({"name": "process_name", "ph": "M", "pid": session, "args": {"name": f"session {session}"}})
+
+        return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+    def export_chrome_trace(self, path: str) -> str:
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with open(path, "w") as f:
+            json.dump(self.to_chrome_trace(), f)
+        return path
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Total seconds and count per (category, name), finished spans only."""
+        totals: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            for span in self.spans:
+                if span["end_us"] is None:
+                    continue
+                key = f"{span['category']}:{span['name']}"
+                entry = totals.setdefault(key, {"count": 0, "seconds": 0.0})
+                entry["count"] += 1
+                entry["seconds"] += (span["end_us"] - span["start_us"]) / 1e6
+        return totals
+
+
+def trace_run(graph, inputs, path: str, config: Optional[dict] = None):
+    """Invoke `graph` once with a fresh tracer and write the trace to `path`."""
+    tracer = SpanTracer()
+    config = dict(config or {})
+    config["callbacks"] = list(config.get("callbacks") or []) + [tracer]
+    result = graph.invoke(inputs, config=config)
+    tracer.export_chrome_trace(path)
+    return result, tracer
+
+
+#demo
+def main():
+    from offline_load_test import build_offline_graphs, new_session
+
+    parser = argparse.ArgumentParser(description="Trace the offline graphs to Chrome trace files.")
+    parser.add_argument("--latency", type=float, default=0.05, help="simulated seconds per model call")
+    parser.add_argument("--out", default="traces")
+    args = parser.parse_args()
+
+    for name, (graph, _models) in build_offline_graphs(args.latency).items():
+        path = os.path.join(args.out, f"{name}.json")
+        _, tracer = trace_run(graph, new_session(), path)
+
+        print(f"\n=== {name}: {len(tracer.spans)} spans -> {path} ===\n")
+        for key, entry in sorted(tracer.summary().items(), key=lambda kv: -kv[1]["seconds"]):
+            print(f"{key:40s} count={entry['count']:3d} total={entry['seconds'] * 1000:8.1f}ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,261 @@
+import argparse
+import threading
+import time
+from collections import defaultdict
+from typing import Any, Dict, List, Optional, TypedDict
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+
+from tracing import agent_of
+
+
+# Concept:
+#   - UsageLedger is a callback handler that books every LLM call of a run to
+#     the agent that made it (supervisor, research_agent, math_agent, ...).
+#   - Tokens come from usage_metadata, falling back to Ollama's
+#     prompt_eval_count / eval_count; model seconds come from Ollama's
+#     total_duration, falling back to wall-clock time of the call.
+#   - Each handoff (a tool that returns a Command) starts a new "segment", so
+#     the cost of the work done after every handoff can be read back too.
+#   - One ledger can be passed to many runs: every top-level run is a session,
+#     and by_agent() / totals() aggregate across all of them. Only the records
+#     outlive a run, its bookkeeping is dropped when the top-level run ends.
+
+# the segment a session is in before its first handoff
+START_SEGMENT = "start"
+
+
+class CallRecord(TypedDict):
+    session: str
+    agent: str
+    segment: str             # "<from>-><to>" of the handoff the call happened after
+    handoff_index: int       # 0 before the first handoff
+    model: str
+    input_tokens: int
+    output_tokens: int
+    model_seconds: float     # what the model server reports, else wall-clock
+    wall_seconds: float
+
+
+class Usage(TypedDict):
+    calls: int
+    input_tokens: int
+    output_tokens: int
+    total_tokens: int
+    model_seconds: float
+    wall_seconds: float
+
+
+def _empty_usage() -> Usage:
+    return {
+        "calls": 0,
+        "input_tokens": 0,
+        "output_tokens": 0,
+        "total_tokens": 0,
+        "model_seconds": 0.0,
+        "wall_seconds": 0.0,
+    }
+
+
+def _add(usage: Usage, record: CallRecord):
+    usage["calls"] += 1
+    usage["input_tokens"] += record["input_tokens"]
+    usage["output_tokens"] += record["output_tokens"]
+    usage["total_tokens"] += record["input_tokens"] + record["output_tokens"]
+    usage["model_seconds"] += record["model_seconds"]
+    usage["wall_seconds"] += record["wall_seconds"]
+
+
+def usage_from_message(message) -> Dict[str, Any]:
+    """Tokens + model seconds of one AIMessage, from usage_metadata or Ollama metadata."""
+    usage = getattr(message, "usage_metadata", None) or {}
+    meta = getattr(message, "response_metadata", None) or {}
+    duration_ns = meta.get("total_duration")
+    return {
+        "model": meta.get("model_name") or meta.get("model") or "",
+        "input_tokens": usage.get("input_tokens", meta.get("prompt_eval_count", 0)) or 0,
+        "output_tokens": usage.get("output_tokens", meta.get("eval_count", 0)) or 0,
+        "model_seconds": duration_ns / 1e9 if duration_ns else None,
+    }
+
+
+class UsageLedger(BaseCallbackHandler):
+    def __init__(self):
+        self.records: List[CallRecord] = []
+        self._lock = threading.Lock()
+        self._session_of: Dict[UUID, str] = {}         # any run id -> its session
+        self._segment: Dict[str, tuple] = {}           # session -> (index, label)
+        self._calls: Dict[UUID, tuple] = {}            # llm run id -> (agent, start)
+        self._tools: Dict[UUID, str] = {}              # tool run id -> agent calling it
+        self._roots: Dict[UUID, str] = {}              # top-level run id -> its session
+        self._session_count = 0
+
+    def _track(self, run_id, parent_run_id, metadata):
+        with self._lock:
+            if parent_run_id is None or parent_run_id not in self._session_of:
+                session = (metadata or {}).get("session_id") or f"session-{self._session_count}"
+                self._session_count += 1
+                self._segment[session] = (0, START_SEGMENT)
+                self._roots[run_id] = session
+            else:
+                session = self._session_of[parent_run_id]
+            self._session_of[run_id] = session
+
+    def _forget(self, run_id):
+        with self._lock:
+            self._session_of.pop(run_id, None)
+            session = self._roots.pop(run_id, None)
+            if session is None or session in self._roots.values():
+                return
+            # the session's last top-level run ended: drop its segment and any run
+            # whose end callback never came (cancelled, or an error the graph swallowed)
+            self._segment.pop(session, None)
+            for child in [r for r, s in self._session_of.items() if s == session]:
+                del self._session_of[child]
+                self._calls.pop(child, None)
+                self._tools.pop(child, None)
+
+    # session tracking
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._track(run_id, parent_run_id, metadata)
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._forget(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._forget(run_id)
+
+    # LLM calls
+    def on_chat_model_start(self, serialized, messages, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._track(run_id, parent_run_id, metadata)
+        with self._lock:
+            self._calls[run_id] = (agent_of(metadata or {}) or "unknown", time.perf_counter())
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        with self._lock:
+            agent, start = self._calls.pop(run_id, ("unknown", time.perf_counter()))
+            session = self._session_of.get(run_id, "unknown")
+            index, segment = self._segment.get(session, (0, START_SEGMENT))
+        self._forget(run_id)
+        wall = time.perf_counter() - start
+
+        generations = [g for batch in response.generations for g in batch]
+        message = getattr(generations[0], "message", None) if generations else None
+        usage = usage_from_message(message)
+
+        record: CallRecord = {
+            "session": session,
+            "agent": agent,
+            "segment": segment,
+            "handoff_index": index,
+            "model": usage["model"],
+            "input_tokens": usage["input_tokens"],
+            "output_tokens": usage["output_tokens"],
+            "model_seconds": usage["model_seconds"] if usage["model_seconds"] is not None else wall,
+            "wall_seconds": wall,
+        }
+        with self._lock:
+            self.records.append(record)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._calls.pop(run_id, None)
+        self._forget(run_id)
+
+    # handoffs
+    def on_tool_start(self, serialized, input_str, *, run_id, parent_run_id=None, metadata=None, **kwargs):
+        self._track(run_id, parent_run_id, metadata)
+        with self._lock:
+            self._tools[run_id] = agent_of(metadata or {})
+
+    def on_tool_end(self, output, *, run_id, **kwargs):
+        from langgraph.types import Command
+
+        with self._lock:
+            agent = self._tools.pop(run_id, "")
+            session = self._session_of.get(run_id)
+            if session in self._segment and isinstance(output, Command) and isinstance(output.goto, str):
+                index, _ = self._segment[session]
+                self._segment[session] = (index + 1, f"{agent}->{output.goto}")
+        self._forget(run_id)
+
+    def on_tool_error(self, error, *, run_id, **kwargs):
+        with self._lock:
+            self._tools.pop(run_id, None)
+        self._forget(run_id)
+
+    # queries
+    def _group(self, key, session: Optional[str] = None) -> Dict[Any, Usage]:
+        groups: Dict[Any, Usage] = defaultdict(_empty_usage)
+        with self._lock:
+            records = list(self.records)
+        for record in records:
+            if session is None or record["session"] == session:
+                _add(groups[key(record)], record)
+        return dict(groups)
+
+    def sessions(self) -> List[str]:
+        with self._lock:
+            return list(dict.fromkeys(r["session"] for r in self.records))
+
+    def by_agent(self, session: Optional[str] = None) -> Dict[str, Usage]:
+        """Usage per agent, for one session or aggregated over all of them."""
+        return self._group(lambda r: r["agent"], session)
+
+    def by_session(self) -> Dict[str, Usage]:
+        return self._group(lambda r: r["session"])
+
+    def by_handoff(self, session: Optional[str] = None) -> Dict[tuple, Usage]:
+        """Usage per (handoff index, "<from>-><to>") segment."""
+        return self._group(lambda r: (r["handoff_index"], r["segment"]), session)
+
+    def totals(self, session: Optional[str] = None) -> Usage:
+        return self._group(lambda r: "total", session).get("total", _empty_usage())
+
+    def report(self, session: Optional[str] = None) -> str:
+        total = self.totals(session)
+        lines = [
+            f"{'agent':16s} {'calls':>6s} {'in tok':>8s} {'out tok':>8s} "
+            f"{'model s':>8s} {'tokens %':>9s} {'time %':>7s}"
+        ]
+        by_agent = sorted(self.by_agent(session).items(), key=lambda kv: -kv[1]["total_tokens"])
+        for agent, usage in by_agent:
+            token_share = usage["total_tokens"] / total["total_tokens"] * 100 if total["total_tokens"] else 0.0
+            time_share = usage["model_seconds"] / total["model_seconds"] * 100 if total["model_seconds"] else 0.0
+            lines.append(
+                f"{agent:16s} {usage['calls']:6d} {usage['input_tokens']:8d} {usage['output_tokens']:8d} "
+                f"{usage['model_seconds']:8.2f} {token_share:8.1f}% {time_share:6.1f}%"
+            )
+        return "\n".join(lines)
+
+    def reset(self):
+        with self._lock:
+            self.records.clear()
+
+
+#demo
+def main():
+    from offline_load_test import build_offline_graphs, new_session
+
+    parser = argparse.ArgumentParser(description="Per-agent token / latency accounting.")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.02, help="simulated seconds per model call")
+    args = parser.parse_args()
+
+    for name, (graph, _models) in build_offline_graphs(args.latency).items():
+        ledger = UsageLedger()
+        for _ in range(args.runs):
+            graph.invoke(new_session(), config={"callbacks": [ledger]})
+
+        print(f"\n=== {name}: {len(ledger.sessions())} sessions ===\n")
+        print(ledger.report())
+
+        first = ledger.sessions()[0]
+        print(f"\nper handoff ({first}):")
+        for (index, segment), usage in sorted(ledger.by_handoff(first).items()):
+            print(f"  {index}: {segment:32s} calls={usage['calls']} tokens={usage['total_tokens']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,302 @@
+from typing import Any, Dict, List, Optional, TypedDict
+from collections import defaultdict
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.runnables import RunnableConfig
+import argparse
+import contextlib
+import html
+import io
+import sys
+import threading
+import time
+
+# does parallel=True actually run branches at the same time?
+# - ConcurrencyProfiler is a callback handler: it records start / end and the
+#   thread of every node of the top-level graph, grouped by superstep
+# - a superstep with more than one node is a fan-out; for those:
+#   parallelism = sum of branch durations / wall time of the step
+#   (3 branches fully overlapped -> 3.0, run one after another -> 1.0)
+# - the ideal for a step is sum of branch durations / longest branch (what
+#   parallelism would be with no waiting at all); efficiency = parallelism / ideal
+# - join wait: a superstep ends when its slowest branch does, every other
+#   branch's result sits idle until the next step (join / aggregate) starts
+# - gantt_text() / gantt_html() draw the timeline, check() turns it into a CI gate;
+#   its limits are relative to the measured branch durations, so a slower or
+#   busier machine doesn't fail it, only branches that stopped overlapping do
+
+# tag LangGraph puts on the run of every node task
+NODE_TAG_PREFIX = 'graph:step:'
+
+
+class BranchSpan(TypedDict):
+    node: str
+    step: int
+    thread: str
+    start: float   # seconds since the profiler was created
+    end: Optional[float]
+
+
+class ConcurrencyProfiler(BaseCallbackHandler):
+    def __init__(self):
+        self.spans: List[BranchSpan] = []
+        self._open: Dict[Any, BranchSpan] = {}
+        self._roots: set = set()
+        self._lock = threading.Lock()
+        self._origin = time.perf_counter()
+
+    def on_chain_start(self, serialized, inputs, *, run_id, parent_run_id=None, tags=None, metadata=None, **kwargs):
+        now = time.perf_counter() - self._origin
+        metadata = metadata or {}
+        name = kwargs.get('name') or (serialized or {}).get('name', '')
+        with self._lock:
+            if parent_run_id is None:
+                self._roots.add(run_id)
+                return
+            # only the nodes of the top-level graph, not what runs inside them
+            if parent_run_id not in self._roots or name != metadata.get('langgraph_node'):
+                return
+            if not any(t.startswith(NODE_TAG_PREFIX) for t in tags or []):
+                return
+            span: BranchSpan = {
+                'node': name,
+                'step': metadata.get('langgraph_step', 0),
+                'thread': threading.current_thread().name,
+                'start': now,
+                'end': None,
+            }
+            self._open[run_id] = span
+            self.spans.append(span)
+
+    def _end(self, run_id):
+        now = time.perf_counter() - self._origin
+        with self._lock:
+            span = self._open.pop(run_id, None)
+            if span is not None:
+                span['end'] = now
+
+    def on_chain_end(self, outputs, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def on_chain_error(self, error, *, run_id, **kwargs):
+        self._end(run_id)
+
+    def profile(self) -> 'Profile':
+        with self._lock:
+            return Profile([dict(s) for s in self.spans if s['end'] is not None])
+
+
+def profile_run(graph, input, config: Optional[RunnableConfig] = None):
+    """Invoke `graph` once under a fresh profiler, returns (result, Profile)."""
+    profiler = ConcurrencyProfiler()
+    config = dict(config or {})
+    config['callbacks'] = [*(config.get('callbacks') or []), profiler]
+    result = graph.invoke(input, config=config)
+    return result, profiler.profile()
+
+
+class Profile:
+    def __init__(self, spans: List[BranchSpan]):
+        self.spans = sorted(spans, key=lambda s: (s['step'], s['start']))
+        self.steps: Dict[int, List[BranchSpan]] = defaultdict(list)
+        for span in self.spans:
+            self.steps[span['step']].append(span)
+
+    @property
+    def start(self) -> float:
+        return min((s['start'] for s in self.spans), default=0.0)
+
+    @property
+    def end(self) -> float:
+        return max((s['end'] for s in self.spans), default=0.0)
+
+    def fanout_steps(self) -> List[int]:
+        return [step for step, spans in sorted(self.steps.items()) if len(spans) > 1]
+
+    def step_stats(self, step: int) -> Dict[str, Any]:
+        spans = self.steps[step]
+        wall = max(s['end'] for s in spans) - min(s['start'] for s in spans)
+        busy = sum(s['end'] - s['start'] for s in spans)
+        longest = max(s['end'] - s['start'] for s in spans)
+        following = [s for st, ss in self.steps.items() if st > step for s in ss]
+        next_start = min((s['start'] for s in following), default=max(s['end'] for s in spans))
+
+        # every branch waits for the next step to start (the join / aggregate)
+        waits = {s['node']: max(0.0, next_start - s['end']) for s in spans}
+        return {
+            'branches': len(spans),
+            'threads': len({s['thread'] for s in spans}),
+            'wall': wall,
+            'busy': busy,
+            'parallelism': busy / wall if wall > 0 else float(len(spans)),
+            'ideal': busy / longest if longest > 0 else float(len(spans)),
+            'longest': longest,
+            'join_wait': max(waits.values()),    # earliest finisher idles this long
+            'join_gap': next_start - max(s['end'] for s in spans),   # slowest branch -> next step
+            'waits': waits,
+        }
+
+    def summary(self) -> Dict[str, Any]:
+        fanouts = {step: self.step_stats(step) for step in self.fanout_steps()}
+        busy = sum(f['busy'] for f in fanouts.values())
+        wall = sum(f['wall'] for f in fanouts.values())
+        longest = sum(f['longest'] for f in fanouts.values())
+        parallelism = busy / wall if wall > 0 else 1.0
+        ideal = busy / longest if longest > 0 else 1.0
+        return {
+            'wall': self.end - self.start,
+            'nodes': len(self.spans),
+            'fanout_steps': fanouts,
+            # time-weighted over all fan-outs, so tiny steps don't dominate
+            'parallelism': parallelism,
+            'ideal_parallelism': ideal,
+            'efficiency': parallelism / ideal,
+            'max_branches': max((f['branches'] for f in fanouts.values()), default=1),
+            'join_wait': sum(f['join_wait'] for f in fanouts.values()),
+        }
+
+    # timelines
+    def gantt_text(self, width: int = 60) -> str:
+        total = max(self.end - self.start, 1e-9)
+        label_width = max((len(s['node']) for s in self.spans), default=4) + 2
+        thread_width = max((len(s['thread']) for s in self.spans), default=6)
+        lines = [f"{'node':{label_width}s}{'thread':{thread_width}s}  |{'-' * width}| ms"]
+        for span in self.spans:
+            a = int((span['start'] - self.start) / total * width)
+            b = max(a + 1, int(round((span['end'] - self.start) / total * width)))
+            bar = ' ' * a + '#' * (b - a) + ' ' * (width - b)
+            ms = (span['end'] - span['start']) * 1000
+            lines.append(f"{span['node']:{label_width}s}{span['thread']:{thread_width}s}  |{bar}| {ms:.1f}")
+        lines.append(f"{'':{label_width + thread_width}s}  0{'':{width - 1}s}{total * 1000:.0f} ms")
+        return '\n'.join(lines)
+
+    def gantt_html(self, title: str = 'branch timeline') -> str:
+        total = max(self.end - self.start, 1e-9)
+        rows = []
+        for span in self.spans:
+            left = (span['start'] - self.start) / total * 100
+            width = max((span['end'] - span['start']) / total * 100, 0.2)
+            label = f"{span['node']} (step {span['step']}, {span['thread']})"
+            ms = (span['end'] - span['start']) * 1000
+            rows.append(
+                f'<div class="row"><span class="label">{html.escape(label)}</span>'
+                f'<span class="lane"><span class="bar step{span["step"] % 6}" '
+                f'style="left:{left:.2f}%;width:{width:.2f}%" title="{ms:.1f} ms"></span></span></div>'
+            )
+        summary = self.summary()
+        return (
+            '<!doctype html><html><head><meta charset="utf-8">'
+            f'<title>{html.escape(title)}</title><style>'
+            'body{font-family:sans-serif}.row{display:flex;align-items:center;margin:2px 0}'
+            '.label{width:320px;font-size:12px}.lane{position:relative;flex:1;height:14px;background:#eee}'
+            '.bar{position:absolute;top:0;height:14px}'
+            '.step0{background:#4e79a7}.step1{background:#f28e2b}.step2{background:#59a14f}'
+            '.step3{background:#e15759}.step4{background:#76b7b2}.step5{background:#b07aa1}'
+            '</style></head><body>'
+            f'<h3>{html.escape(title)}</h3>'
+            f'<p>wall {summary["wall"] * 1000:.1f} ms, parallelism {summary["parallelism"]:.2f} '
+            f'(max {summary["max_branches"]} branches), join wait {summary["join_wait"] * 1000:.1f} ms</p>'
+            + ''.join(rows) + '</body></html>'
+        )
+
+
+# CI gate
+def check(
+    profile: Profile,
+    min_efficiency: float = 0.8,
+    max_join_gap: float = 0.25,
+    gap_floor: float = 0.005,
+) -> List[str]:
+    """Failures (empty = ok): fan-outs that didn't overlap, or a slow hand-off to the join.
+
+    Parallelism must reach min_efficiency x the ideal of the measured branch
+    durations; the join gap may be at most max_join_gap x the step's longest
+    branch, or gap_floor seconds (scheduling noise) for steps of tiny branches.
+    """
+    failures = []
+    summary = profile.summary()
+    if not summary['fanout_steps']:
+        failures.append('no fan-out step found, branches ran in separate supersteps')
+    elif summary['efficiency'] < min_efficiency:
+        failures.append(
+            f"parallelism {summary['parallelism']:.2f} < {min_efficiency:.0%} of the ideal "
+            f"{summary['ideal_parallelism']:.2f}"
+        )
+    for step, stats in summary['fanout_steps'].items():
+        if stats['join_gap'] > max(max_join_gap * stats['longest'], gap_floor):
+            failures.append(
+                f"step {step}: {stats['join_gap'] * 1000:.1f} ms between the last branch and the join "
+                f"(longest branch {stats['longest'] * 1000:.1f} ms)"
+            )
+    return failures
+
+
+def best_profile(graph, input, config: Optional[RunnableConfig] = None, runs: int = 3) -> 'Profile':
+    """Profile `runs` invokes and keep the one closest to its ideal parallelism, so
+    one run hit by a noisy neighbour doesn't fail the gate."""
+    profiles = [profile_run(graph, input, config)[1] for _ in range(runs)]
+    return max(profiles, key=lambda p: p.summary()['efficiency'] if p.fanout_steps() else 0.0)
+
+
+# demo
+def profiled_graphs():
+    """(name, graph, input) for the two parallel=True demos."""
+    from aggregator_agents import build_aggregator_graph
+    from parallel_agents import build_parallel_ticket_graph, simulated_branches
+    from ticket_cache import initial_state
+
+    sync_branches, _ = simulated_branches({'spam': 0.02, 'urgency': 0.2, 'category': 0.2}, {})
+    social = {
+        'twitter_text': '', 'instagram_text': '', 'reddit_text': '',
+        'twitter_sentiment': 0.0, 'instagram_sentiment': 0.0, 'reddit_sentiment': 0.0,
+        'report': '',
+    }
+    return [
+        ('parallel_tickets', build_parallel_ticket_graph(branches=sync_branches),
+         initial_state('parallel', 'My invoice was charged twice, refund asap.')),
+        ('aggregator', build_aggregator_graph(), social),
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Branch concurrency profile of the parallel=True graphs.')
+    parser.add_argument('--html', help='also write an HTML timeline per graph, <prefix>_<graph>.html')
+    parser.add_argument('--check', action='store_true', help='exit 1 if a graph loses its concurrency')
+    parser.add_argument('--runs', type=int, default=3, help='profile N runs per graph, keep the best')
+    parser.add_argument('--min-efficiency', type=float, default=0.8, help='parallelism / ideal parallelism')
+    args = parser.parse_args()
+
+    failed = False
+    for name, graph, state in profiled_graphs():
+        with contextlib.redirect_stdout(io.StringIO()):   # the agents print
+            profile = best_profile(graph, state, RunnableConfig(parallel=True), args.runs)
+        summary = profile.summary()
+
+        print(f'\n=== {name} ===\n')
+        print(profile.gantt_text())
+        print(
+            f"\nwall {summary['wall'] * 1000:.1f} ms, parallelism {summary['parallelism']:.2f} "
+            f"(ideal {summary['ideal_parallelism']:.2f})"
+        )
+        for step, stats in summary['fanout_steps'].items():
+            waits = ', '.join(f'{n}={w * 1000:.0f}' for n, w in stats['waits'].items())
+            print(
+                f"step {step}: {stats['branches']} branches on {stats['threads']} threads, "
+                f"parallelism {stats['parallelism']:.2f}, join wait ms: {waits}"
+            )
+
+        if args.html:
+            path = f'{args.html}_{name}.html'
+            with open(path, 'w') as f:
+                f.write(profile.gantt_html(name))
+            print(f'timeline -> {path}')
+
+        failures = check(profile, args.min_efficiency)
+        print('check:', 'ok' if not failures else '; '.join(failures))
+        failed = failed or bool(failures)
+
+    if args.check and failed:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,276 @@
+from typing import Any, Callable, Dict, Iterable, List, Optional
+from langgraph.channels.last_value import LastValue
+from langgraph.graph import StateGraph
+from langchain_core.runnables import RunnableConfig
+from importlib.metadata import PackageNotFoundError, version
+import contextlib
+import functools
+import io
+import time
+
+# compile-time optimization pass, run on a StateGraph BEFORE .compile():
+# - identity nodes ('lambda s: s', join_node returning state) cost a superstep
+#   and do nothing: p -> X -> s becomes p -> s (also for fan-out / fan-in)
+# - a straight line of pure nodes a -> b -> c (one edge out, one edge in, no
+#   conditional edges in between) becomes ONE node running a, b, c in order
+#   and returning their merged update
+# - 'pure' can't be checked, the builder says which nodes are (plain dict
+#   update from the state, no Command / Send, no config)
+# - only applied when every channel is a plain LastValue: then merging updates
+#   and dropping no-op writes can't change the final state (reducer channels,
+#   e.g. add_messages, would)
+# - the passes edit StateGraph internals (edges, branches, waiting_edges, node
+#   specs), so on a langgraph outside the tested versions the graph is left as is
+
+_IDENTITY_CODE = (lambda s: s).__code__.co_code
+
+# major versions of langgraph whose StateGraph internals the passes were checked against
+SUPPORTED_LANGGRAPH = (1,)
+
+
+def langgraph_version() -> str:
+    try:
+        return version('langgraph')
+    except PackageNotFoundError:
+        return 'unknown'
+
+
+def _supported(langgraph: str) -> bool:
+    major = langgraph.split('.')[0]
+    return major.isdigit() and int(major) in SUPPORTED_LANGGRAPH
+
+
+def identity(fn: Callable) -> Callable:
+    """Mark a node function as returning its input unchanged."""
+    fn.__identity__ = True
+    return fn
+
+
+def is_identity(fn: Callable) -> bool:
+    if getattr(fn, '__identity__', False):
+        return True
+    # 'def f(state): return state' and 'lambda s: s' compile to the same bytecode
+    code = getattr(fn, '__code__', None)
+    return (
+        code is not None
+        and code.co_code == _IDENTITY_CODE
+        and code.co_argcount == 1
+        and not code.co_freevars
+    )
+
+
+def _own_async(runnable, fn: Callable) -> bool:
+    afunc = getattr(runnable, 'afunc', None)
+    if afunc is None or afunc is fn:
+        return False
+    # sync-only nodes get afunc = partial(run_in_executor, None, fn)
+    return not (isinstance(afunc, functools.partial) and fn in afunc.args)
+
+
+def node_func(spec) -> Optional[Callable]:
+    """The plain state -> update function behind a node, None if it's anything fancier."""
+    runnable = spec.runnable
+    fn = getattr(runnable, 'func', None)
+    if fn is None or _own_async(runnable, fn) or getattr(runnable, 'func_accepts', None):
+        return None   # async variant, or wants config / runtime injected
+    if spec.retry_policy or spec.cache_policy or spec.defer or spec.ends:
+        return None   # these are per-node behaviour we'd lose by merging
+    if getattr(spec, 'error_handler_node', None) or getattr(spec, 'is_error_handler', False):
+        return None
+    return fn
+
+
+def fuse(funcs: List[Callable]) -> Callable:
+    def fused(state: Dict[str, Any]) -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+        for fn in funcs:
+            update = fn(state) or {}
+            merged.update(update)
+            state = {**state, **update}   # what the next node would have read
+        return merged
+    return fused
+
+
+def _plain_state(graph: StateGraph) -> bool:
+    return all(isinstance(channel, LastValue) for channel in graph.channels.values())
+
+
+def _branch_targets(graph: StateGraph) -> Optional[set]:
+    """Every node a conditional edge can route to, None if some path has no map."""
+    targets = set()
+    for branches in graph.branches.values():
+        for branch in branches.values():
+            if branch.ends is None:
+                return None
+            targets.update(branch.ends.values())
+    return targets
+
+
+def _in_waiting_edges(graph: StateGraph, name: str) -> bool:
+    return any(name in starts or name == end for starts, end in graph.waiting_edges)
+
+
+def _retarget_branches(graph: StateGraph, old: str, new: str):
+    for source, branches in graph.branches.items():
+        for key, branch in branches.items():
+            if branch.ends and old in branch.ends.values():
+                ends = {k: (new if v == old else v) for k, v in branch.ends.items()}
+                branches[key] = branch._replace(ends=ends)
+
+
+# passes
+def remove_identity_nodes(graph: StateGraph) -> List[str]:
+    removed = []
+    targets = _branch_targets(graph)
+    if targets is None:
+        return removed
+
+    for name, spec in list(graph.nodes.items()):
+        fn = node_func(spec)
+        if fn is None or not is_identity(fn):
+            continue
+        if name in graph.branches or _in_waiting_edges(graph, name):
+            continue
+        outs = [end for start, end in graph.edges if start == name]
+        ins = [start for start, end in graph.edges if end == name]
+        if not outs or (name in targets and len(outs) != 1):
+            continue
+
+        graph.edges -= {(p, name) for p in ins} | {(name, s) for s in outs}
+        graph.edges |= {(p, s) for p in ins for s in outs}
+        if name in targets:
+            _retarget_branches(graph, name, outs[0])
+            targets = _branch_targets(graph)
+        del graph.nodes[name]
+        removed.append(name)
+    return removed
+
+
+def fuse_linear_chains(graph: StateGraph, pure: Iterable[str]) -> List[List[str]]:
+    pure = {name for name in pure if name in graph.nodes and node_func(graph.nodes[name]) is not None}
+    targets = _branch_targets(graph)
+    if targets is None:
+        return []
+
+    def outs(name):
+        return [end for start, end in graph.edges if start == name]
+
+    def ins(name):
+        return [start for start, end in graph.edges if end == name]
+
+    # a -> b can be merged when b is a's only successor and a is b's only predecessor
+    link = {}
+    for a in pure:
+        following = outs(a)
+        if a in graph.branches or _in_waiting_edges(graph, a) or len(following) != 1:
+            continue
+        b = following[0]
+        if b in pure and b not in targets and ins(b) == [a] and not _in_waiting_edges(graph, b):
+            link[a] = b
+
+    chains = []
+    for head in pure - set(link.values()):
+        chain = [head]
+        while chain[-1] in link:
+            chain.append(link[chain[-1]])
+        if len(chain) > 1:
+            chains.append(chain)
+
+    for chain in chains:
+        first, last = chain[0], chain[-1]
+        name = '+'.join(chain)
+        funcs = [node_func(graph.nodes[n]) for n in chain]
+        members = set(chain)
+
+        edges = set()
+        for start, end in graph.edges:
+            if start in members and end in members:
+                continue   # inside the chain
+            edges.add((name if start == last else start, name if end == first else end))
+        graph.edges = edges
+        if last in graph.branches:
+            graph.branches[name] = graph.branches.pop(last)
+        _retarget_branches(graph, first, name)
+
+        input_schema = graph.nodes[first].input_schema
+        for n in chain:
+            del graph.nodes[n]
+        graph.add_node(name, fuse(funcs), input_schema=input_schema)
+    return chains
+
+
+def optimize_graph(graph: StateGraph, pure: Iterable[str] = (), remove_identity: bool = True) -> Dict[str, Any]:
+    """Rewrite `graph` in place, returns what was done. Call before compile()."""
+    report: Dict[str, Any] = {'removed': [], 'fused': [], 'skipped': None}
+    langgraph = langgraph_version()
+    if not _supported(langgraph):
+        report['skipped'] = f'untested langgraph version {langgraph}'
+        return report
+    if not _plain_state(graph):
+        report['skipped'] = 'state has reducer channels'
+        return report
+    if remove_identity:
+        report['removed'] = remove_identity_nodes(graph)
+    report['fused'] = fuse_linear_chains(graph, pure)
+    return report
+
+
+# benchmark: per-invoke overhead of the tiny-node ticket graphs
+def _strip_times(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in state.items() if not k.endswith('_time')}
+
+
+def benchmark(runs: int = 2000):
+    from parallel_agents import build_parallel_ticket_graph
+    from sequencial_agents import build_sequential_ticket_graph
+    from ticket_cache import initial_state
+
+    text = 'Hi team, I was charged twice on my invoice, I need a refund asap. This is urgent.'
+    cases = {
+        'sequential': build_sequential_ticket_graph,
+        'parallel': build_parallel_ticket_graph,
+    }
+
+    print(f'\n=== Per-invoke overhead, {runs} runs ===\n')
+    print(f"{'graph':12s} {'nodes':>9s} {'plain us':>9s} {'optimized us':>13s} {'saved':>7s}")
+    for kind, build in cases.items():
+        plain, optimized = build(), build(optimize=True)
+        state = initial_state(kind, text)
+        config = RunnableConfig()
+
+        # same final state (timings aside)
+        assert _strip_times(plain.invoke(state, config=config)) == _strip_times(optimized.invoke(state, config=config))
+
+        timings = []
+        for app in (plain, optimized):
+            start = time.perf_counter()
+            for _ in range(runs):
+                app.invoke(state, config=config)
+            timings.append((time.perf_counter() - start) / runs * 1e6)
+
+        nodes = f"{len(plain.builder.nodes)}->{len(optimized.builder.nodes)}"
+        print(f'{kind:12s} {nodes:>9s} {timings[0]:9.1f} {timings[1]:13.1f} {(1 - timings[1] / timings[0]) * 100:6.1f}%')
+
+
+# demo
+def main():
+    from aggregator_agents import build_aggregator_graph
+
+    plain, optimized = build_aggregator_graph(), build_aggregator_graph(optimize=True)
+    state = {
+        'twitter_text': '', 'instagram_text': '', 'reddit_text': '',
+        'twitter_sentiment': 0.0, 'instagram_sentiment': 0.0, 'reddit_sentiment': 0.0,
+        'report': '',
+    }
+    with contextlib.redirect_stdout(io.StringIO()):
+        same = plain.invoke(state, config=RunnableConfig()) == optimized.invoke(state, config=RunnableConfig())
+
+    print('\n=== Aggregator graph ===\n')
+    print('nodes       :', sorted(plain.builder.nodes), '->', sorted(optimized.builder.nodes))
+    print('same result :', same)
+
+    benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -69,15 +69,48 @@ def risk_agent(state: LoanState) -> Command:
         goto=END,
         update=new_state
     )
+
+
+#low level agent - risk evaluation from a decision table (see loan_rules.py)
+def make_rules_risk_agent(rules):
+    def rules_risk_agent(state: LoanState) -> Command:
+        log = state["log"] + " -> Risk"
+
+        decision = rules.evaluate(state)
+        print(f"RiskAgent: rule {decision['rule']} matched")
+
+        return Command(
+            goto=END,
+            update={
+                "risk_score": decision["risk_score"],
+                "approved": decision["approved"],
+                "log": log
+            }
+        )
+
+    return rules_risk_agent
     
     
 # build graph
-def build_hierarchical_graph():
+# rules = a decision table (dict, JSON path, or loan_rules.DecisionTable)
+# that replaces the hard-coded risk_agent
+def build_hierarchical_graph(rules=None):
     graph = StateGraph(LoanState)
 
+    if rules is None:
+        risk = risk_agent
+    else:
+        from loan_rules import DecisionTable, compile_table, load_table
+
+        if isinstance(rules, str):
+            rules = load_table(rules)
+        if not isinstance(rules, DecisionTable):
+            rules = compile_table(rules)
+        risk = make_rules_risk_agent(rules)
+
     graph.add_node("boss", boss_agent)
     graph.add_node("verification", verification_agent)
-    graph.add_node("risk", risk_agent)
+    graph.add_node("risk", risk)
 
     graph.set_entry_point("boss")
 
@@ -107,6 +140,21 @@ def main():
     print("Approved     :", result["approved"])
     print("Log          :", result["log"])
 
+    # same graph, risk node driven by the decision table
+    from loan_rules import DEFAULT_TABLE, compile_table, generate_applications
+
+    rules_app = build_hierarchical_graph(rules=DEFAULT_TABLE)
+
+    print("\n=== Decision table risk node ===\n")
+    for amount in [50000, 150000]:
+        result = rules_app.invoke({**initial_state, "loan_amount": amount}, config=RunnableConfig())
+        print(f"amount={amount} -> approved={result['approved']}, risk={result['risk_score']}")
+
+    # batch scoring, outside the graph
+    applications = generate_applications(10000)
+    decisions = compile_table(DEFAULT_TABLE).evaluate_batch(applications)
+    print("batch approved:", sum(d["approved"] for d in decisions), "/", len(decisions))
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
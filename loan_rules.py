@@ -0,0 +1,329 @@
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from bisect import bisect_left
+import json
+import random
+import time
+
+import numpy as np
+
+# underwriting rules as a decision table instead of nested ifs:
+# - a table is plain data (JSON-able), one rule per row, checked in order,
+#   the first rule that matches wins ('first' hit policy), else the default:
+#     {'id': 'large_loan',
+#      'when': {'loan_amount': {'gt': 100000}, 'purpose': ['home', 'car']},
+#      'then': {'risk_score': 0.3, 'approved': False}}
+#   numeric conditions use gt / gte / lt / lte, anything else is a set of
+#   allowed values (a single value or a list); a field a rule doesn't mention
+#   matches anything, a value missing from the application matches no condition
+# - compile_table() turns it into an index at load time: every numeric field's
+#   thresholds are sorted once, a value's cell is found with bisect, and every
+#   cell stores the bitmask of rules its condition accepts. Evaluating is one
+#   AND of masks per field and the lowest set bit is the winning rule - no
+#   scan over hundreds of rules
+# - evaluate_batch() does the bisect for a whole column with np.searchsorted and
+#   evaluates each distinct combination of cells only once
+
+NUMERIC_OPS = ('gt', 'gte', 'lt', 'lte')
+
+# the rules risk_agent had hard-coded
+DEFAULT_TABLE: Dict[str, Any] = {
+    'rules': [
+        {'id': 'large_loan', 'when': {'loan_amount': {'gt': 100000}}, 'then': {'risk_score': 0.3, 'approved': False}},
+    ],
+    'default': {'id': 'standard', 'then': {'risk_score': 0.9, 'approved': True}},
+}
+
+
+def load_table(path: str) -> Dict[str, Any]:
+    with open(path) as f:
+        return json.load(f)
+
+
+def _is_numeric_condition(condition: Any) -> bool:
+    return isinstance(condition, dict)
+
+
+def rule_matches(rule: Dict[str, Any], application: Dict[str, Any]) -> bool:
+    """Reference semantics of one rule, what the compiled index has to agree with."""
+    for field, condition in rule.get('when', {}).items():
+        value = application.get(field)
+        if value is None:
+            return False
+        if _is_numeric_condition(condition):
+            if 'gt' in condition and not value > condition['gt']:
+                return False
+            if 'gte' in condition and not value >= condition['gte']:
+                return False
+            if 'lt' in condition and not value < condition['lt']:
+                return False
+            if 'lte' in condition and not value <= condition['lte']:
+                return False
+        else:
+            allowed = condition if isinstance(condition, list) else [condition]
+            if value not in allowed:
+                return False
+    return True
+
+
+def evaluate_linear(table: Dict[str, Any], application: Dict[str, Any]) -> Dict[str, Any]:
+    """First matching rule by scanning the table top to bottom (slow path, for checks)."""
+    for rule in table['rules']:
+        if rule_matches(rule, application):
+            return {'rule': rule['id'], **rule['then']}
+    return {'rule': table['default']['id'], **table['default']['then']}
+
+
+class _NumericIndex:
+    # cells for sorted thresholds b0 < b1 < ...: (-inf, b0) [b0] (b0, b1) [b1] ... (bk, inf)
+    # -> value x is in cell 2i (between) or 2i + 1 (exactly b_i), i = bisect_left(bounds, x)
+    def __init__(self, bounds: List[float]):
+        self.bounds = bounds
+        self.array = np.asarray(bounds, dtype=float)
+        self.masks: List[int] = []
+
+    def cell(self, value) -> int:
+        i = bisect_left(self.bounds, value)
+        return 2 * i + 1 if i < len(self.bounds) and self.bounds[i] == value else 2 * i
+
+    def cells(self, values: np.ndarray) -> np.ndarray:
+        i = np.searchsorted(self.array, values, side='left')
+        exact = np.zeros(len(values), dtype=bool)
+        inside = i < len(self.array)
+        exact[inside] = self.array[i[inside]] == values[inside]
+        cells = 2 * i + exact
+        cells[np.isnan(values)] = -1    # missing
+        return cells
+
+    def span(self, condition: Dict[str, float]) -> Tuple[int, int]:
+        lo, hi = 0, 2 * len(self.bounds)
+        if 'gt' in condition:
+            lo = max(lo, 2 * self.bounds.index(condition['gt']) + 2)
+        if 'gte' in condition:
+            lo = max(lo, 2 * self.bounds.index(condition['gte']) + 1)
+        if 'lt' in condition:
+            hi = min(hi, 2 * self.bounds.index(condition['lt']))
+        if 'lte' in condition:
+            hi = min(hi, 2 * self.bounds.index(condition['lte']) + 1)
+        return lo, hi
+
+
+def _words(mask: int, n_words: int) -> List[int]:
+    return [(mask >> (64 * w)) & 0xFFFFFFFFFFFFFFFF for w in range(n_words)]
+
+
+class DecisionTable:
+    def __init__(self, table: Dict[str, Any]):
+        ids = set()
+        for n, rule in enumerate(table['rules']):
+            if 'id' not in rule or 'then' not in rule:
+                raise ValueError(f"rule #{n}: every rule needs an 'id' and a 'then'")
+            if rule['id'] in ids:
+                raise ValueError(f"rule {rule['id']}: duplicate id")
+            ids.add(rule['id'])
+
+        self.table = table
+        self.rules = table['rules']
+        self.default = {'rule': table['default']['id'], **table['default']['then']}
+        self.outcomes = [{'rule': rule['id'], **rule['then']} for rule in self.rules]
+        self.all_rules = (1 << len(self.rules)) - 1
+
+        kinds: Dict[str, bool] = {}    # field -> numeric?
+        for rule in self.rules:
+            for field, condition in rule.get('when', {}).items():
+                numeric = _is_numeric_condition(condition)
+                if numeric and set(condition) - set(NUMERIC_OPS):
+                    raise ValueError(f"rule {rule['id']}: unknown operator in {condition} (use {NUMERIC_OPS})")
+                if kinds.setdefault(field, numeric) != numeric:
+                    raise ValueError(f"rule {rule['id']}: field '{field}' mixes numeric and value conditions")
+
+        # bit i = rule i; 'free' = rules without a condition on the field (they accept anything)
+        self.free: Dict[str, int] = {field: self.all_rules for field in kinds}
+        self.numeric: Dict[str, _NumericIndex] = {}
+        self.values: Dict[str, Dict[Any, int]] = {}
+        self.codes: Dict[str, Dict[Any, int]] = {}        # value -> column code for evaluate_batch
+        self.value_masks: Dict[str, List[int]] = {}
+
+        for field, numeric in kinds.items():
+            constrained = [(i, rule['when'][field]) for i, rule in enumerate(self.rules) if field in rule.get('when', {})]
+            for i, _ in constrained:
+                self.free[field] &= ~(1 << i)
+
+            if numeric:
+                bounds = sorted({v for _, condition in constrained for v in condition.values()})
+                index = _NumericIndex(bounds)
+                masks = [self.free[field]] * (2 * len(bounds) + 1)
+                for i, condition in constrained:
+                    lo, hi = index.span(condition)
+                    for cell in range(lo, hi + 1):
+                        masks[cell] |= 1 << i
+                index.masks = masks
+                self.numeric[field] = index
+            else:
+                values: Dict[Any, int] = {}
+                for i, condition in constrained:
+                    for value in condition if isinstance(condition, list) else [condition]:
+                        values[value] = values.get(value, self.free[field]) | (1 << i)
+                self.values[field] = values
+                self.codes[field] = {value: code for code, value in enumerate(values)}
+                self.value_masks[field] = list(values.values())
+
+        # most selective fields first, so a miss stops early
+        self.fields = sorted(kinds, key=lambda f: bin(self.free[f]).count('1'))
+
+        # the same masks as uint64 words for evaluate_batch: one row per cell / value,
+        # plus a last row with the 'free' mask for missing and unknown values
+        n_words = max(1, (len(self.rules) + 63) // 64)
+        self._all_words = np.array(_words(self.all_rules, n_words), dtype=np.uint64)
+        self.words: Dict[str, np.ndarray] = {}
+        for field in kinds:
+            rows = self.numeric[field].masks if field in self.numeric else self.value_masks[field]
+            self.words[field] = np.array([_words(m, n_words) for m in [*rows, self.free[field]]], dtype=np.uint64)
+
+    # one application
+    def _mask(self, field: str, value: Any) -> int:
+        if value is None:
+            return self.free[field]
+        index = self.numeric.get(field)
+        if index is not None:
+            return index.masks[index.cell(value)]
+        return self.values[field].get(value, self.free[field])
+
+    def match(self, application: Dict[str, Any]) -> int:
+        """Index of the winning rule, -1 for the default."""
+        mask = self.all_rules
+        for field in self.fields:
+            mask &= self._mask(field, application.get(field))
+            if not mask:
+                return -1
+        return (mask & -mask).bit_length() - 1   # lowest set bit = first rule in the table
+
+    def evaluate(self, application: Dict[str, Any]) -> Dict[str, Any]:
+        i = self.match(application)
+        return self.outcomes[i] if i >= 0 else self.default
+
+    def matching_rules(self, application: Dict[str, Any]) -> List[str]:
+        """Every rule that accepts the application, in table order (for reviewing overlaps)."""
+        mask = self.all_rules
+        for field in self.fields:
+            mask &= self._mask(field, application.get(field))
+        return [rule['id'] for i, rule in enumerate(self.rules) if mask >> i & 1]
+
+    # many applications
+    def evaluate_columns(self, columns: Dict[str, Sequence[Any]]) -> np.ndarray:
+        """Winning rule index per row (-1 = default) for column-wise input, e.g. a DataFrame."""
+        n = len(next(iter(columns.values()))) if columns else 0
+        acc = np.tile(self._all_words, (n, 1))
+        for field in self.fields:
+            raw = columns.get(field)
+            if raw is None:
+                acc &= self.words[field][-1]
+                continue
+            index = self.numeric.get(field)
+            if index is not None:
+                cells = index.cells(np.array([np.nan if v is None else v for v in raw], dtype=float))
+            else:
+                codes = self.codes[field]
+                cells = np.array([codes.get(v, -1) for v in raw], dtype=np.int64)
+            acc &= self.words[field][cells]     # cell -1 = the last row = rules free on this field
+
+        # first non-zero word, then its lowest set bit
+        nonzero = acc != 0
+        word = nonzero.argmax(axis=1)
+        first = acc[np.arange(n), word]
+        lowest = first & (~first + np.uint64(1))
+        bit = np.log2(np.maximum(lowest, np.uint64(1)).astype(np.float64)).astype(np.int64)
+        return np.where(nonzero.any(axis=1), word * 64 + bit, -1)
+
+    def evaluate_batch(self, applications: Sequence[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        if not self.fields:    # no conditions at all
+            return [self.evaluate({}) for _ in applications]
+        columns = {field: [a.get(field) for a in applications] for field in self.fields}
+        outcomes = self.outcomes + [self.default]     # index -1 -> default
+        return [outcomes[i] for i in self.evaluate_columns(columns).tolist()]
+
+
+def compile_table(table: Optional[Dict[str, Any]] = None) -> DecisionTable:
+    return DecisionTable(table or DEFAULT_TABLE)
+
+
+# benchmark: a few hundred generated rules
+PURPOSES = ['home', 'car', 'education', 'business', 'personal']
+
+
+def generate_table(n_rules: int = 400, seed: int = 0) -> Dict[str, Any]:
+    rng = random.Random(seed)
+    rules = []
+    for i in range(n_rules):
+        when: Dict[str, Any] = {}
+        lo = rng.randrange(0, 500_000, 5_000)
+        when['loan_amount'] = {'gte': lo, 'lt': lo + rng.randrange(5_000, 200_000, 5_000)}
+        if rng.random() < 0.7:
+            score = rng.randrange(300, 850, 10)
+            when['credit_score'] = {'gte': score} if rng.random() < 0.5 else {'lt': score}
+        if rng.random() < 0.5:
+            income = rng.randrange(20_000, 300_000, 5_000)
+            when['income'] = {'gt': income}
+        if rng.random() < 0.4:
+            when['purpose'] = rng.sample(PURPOSES, rng.randint(1, 3))
+        if rng.random() < 0.2:
+            when['documents_ok'] = True
+        risk = round(rng.random(), 2)
+        rules.append({'id': f'r{i:03d}', 'when': when, 'then': {'risk_score': risk, 'approved': risk >= 0.5}})
+    return {'rules': rules, 'default': {'id': 'manual_review', 'then': {'risk_score': 0.5, 'approved': False}}}
+
+
+def generate_applications(n: int, seed: int = 1) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    return [
+        {
+            'loan_amount': rng.randrange(1_000, 700_000, 1_000),
+            'credit_score': rng.randrange(300, 850, 5),
+            'income': rng.randrange(10_000, 400_000, 1_000),
+            'purpose': rng.choice(PURPOSES),
+            'documents_ok': rng.random() < 0.8,
+        }
+        for _ in range(n)
+    ]
+
+
+def benchmark(n_rules: int = 400, n_apps: int = 20_000):
+    table = generate_table(n_rules)
+    start = time.perf_counter()
+    compiled = compile_table(table)
+    compile_time = time.perf_counter() - start
+    apps = generate_applications(n_apps)
+
+    start = time.perf_counter()
+    linear = [evaluate_linear(table, a) for a in apps]
+    linear_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    indexed = [compiled.evaluate(a) for a in apps]
+    indexed_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    batch = compiled.evaluate_batch(apps)
+    batch_time = time.perf_counter() - start
+
+    assert indexed == linear and batch == linear
+
+    print(f'\n=== {n_rules} rules, {n_apps} applications ===\n')
+    print('compile       :', f'{compile_time * 1000:.1f}ms')
+    print('linear scan   :', f'{linear_time:.3f}s', f'({n_apps / linear_time:,.0f}/s)')
+    print('indexed       :', f'{indexed_time:.3f}s', f'({n_apps / indexed_time:,.0f}/s)')
+    print('batch         :', f'{batch_time:.3f}s', f'({n_apps / batch_time:,.0f}/s)')
+    print('speedup       :', f'{linear_time / indexed_time:.1f}x indexed, {linear_time / batch_time:.1f}x batch')
+    print('default hits  :', sum(1 for d in indexed if d['rule'] == 'manual_review'))
+
+
+# demo
+def main():
+    compiled = compile_table()
+    for amount in [50_000, 100_000, 100_001, 250_000]:
+        print(f'loan_amount={amount:>7d} ->', compiled.evaluate({'loan_amount': amount}))
+
+    benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,12 @@
-from typing import TypedDict, Dict, Any
+from typing import TypedDict, Dict, Any, Callable
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from langgraph.graph import StateGraph, END
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+import asyncio
+import contextlib
+import io
 import random
+import statistics
 import time
 
 # this agent arch checks if a number is divisible by 10
@@ -12,6 +17,8 @@ class LoopState(TypedDict):
     passed: bool
     iterations: int
     max_iterations: int
+    attempts: int          # writer/tester pairs started, over all rounds
+    max_attempts: int      # global budget, 0 = no limit beyond max_iterations
     
 
 # agents
@@ -44,30 +51,122 @@ def controller_node(state: LoopState) -> Dict[str, Any]:
     return result
 
 
+# racing
+# - one round starts K writer/tester pairs at once and keeps the first that passes
+# - the other pairs are cancelled: async tasks at their next await, threads
+#   only if they haven't started yet (running ones finish, result dropped)
+# - K is clipped so attempts never go over max_attempts; attempts counts the
+#   pairs that actually started, in both paths
+def run_pair(writer: Callable, tester: Callable, state: LoopState) -> Dict[str, Any]:
+    update = writer(state)
+    return {**update, **tester({**state, **update})}
+
+
+async def _acall(fn: Callable, state: LoopState) -> Dict[str, Any]:
+    if asyncio.iscoroutinefunction(fn):
+        return await fn(state)
+    return await asyncio.to_thread(fn, state)   # sync agents off the event loop, like afanout
+
+
+async def arun_pair(writer: Callable, tester: Callable, state: LoopState) -> Dict[str, Any]:
+    update = await _acall(writer, state)
+    result = await _acall(tester, {**state, **update})
+    return {**update, **result}
+
+
+def round_width(state: LoopState, race_width: int) -> int:
+    budget = state.get('max_attempts', 0)
+    if not budget:
+        return race_width
+    return max(0, min(race_width, budget - state.get('attempts', 0)))
+
+
+def build_race_node(writer: Callable, tester: Callable, race_width: int):
+    def race(state: LoopState) -> Dict[str, Any]:
+        width = round_width(state, race_width)
+        executor = ThreadPoolExecutor(max_workers=max(width, 1))
+        pending = {executor.submit(run_pair, writer, tester, state) for _ in range(width)}
+        best: Dict[str, Any] = {'passed': False}
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                winners = [f.result() for f in done if f.result()['passed']]
+                best = winners[0] if winners else next(iter(done)).result()
+                if winners:
+                    break
+        finally:
+            never_started = sum(f.cancel() for f in pending)
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        return {**best, 'attempts': state.get('attempts', 0) + width - never_started}
+
+    async def arace(state: LoopState) -> Dict[str, Any]:
+        width = round_width(state, race_width)
+        started = 0
+
+        async def pair():
+            # a task cancelled before its first step never gets here, like a
+            # thread-pool future cancelled before it ran
+            nonlocal started
+            started += 1
+            return await arun_pair(writer, tester, state)
+
+        pending = {asyncio.create_task(pair()) for _ in range(width)}
+        best: Dict[str, Any] = {'passed': False}
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                winners = [t.result() for t in done if t.result()['passed']]
+                best = winners[0] if winners else next(iter(done)).result()
+                if winners:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        return {**best, 'attempts': state.get('attempts', 0) + started}
+
+    return RunnableLambda(race, afunc=arace, name='race')
+
+
 # buld loop graph
-def build_loop_graph():
+def build_loop_graph(race_width: int = 1, writer: Callable = writer_agent, tester: Callable = tester_agent):
     graph = StateGraph(LoopState)
 
-    graph.add_node('writer', writer_agent)
-    graph.add_node('tester', tester_agent)
     graph.add_node('controller', controller_node)
 
-    graph.set_entry_point('writer')
-
-    # writer → tester → controller
-    graph.add_edge('writer', 'tester')
-    graph.add_edge('tester', 'controller')
+    if race_width > 1:
+        # K writer/tester pairs per round, first passing candidate wins
+        graph.add_node('race', build_race_node(writer, tester, race_width))
+        graph.set_entry_point('race')
+        graph.add_edge('race', 'controller')
+        first = 'race'
+    else:
+        def count_attempt(state: LoopState) -> Dict[str, Any]:
+            return {**writer(state), 'attempts': state.get('attempts', 0) + 1}
+
+        graph.add_node('writer', count_attempt)
+        graph.add_node('tester', tester)
+        graph.set_entry_point('writer')
+
+        # writer → tester → controller
+        graph.add_edge('writer', 'tester')
+        graph.add_edge('tester', 'controller')
+        first = 'writer'
 
     # Loop logic
     # controller → writer (if NOT passed AND not exceeded)
     def should_loop(state: LoopState):
-        return (not state['passed']) and (state['iterations'] < state['max_iterations'])
+        budget = state.get('max_attempts', 0)
+        in_budget = not budget or state.get('attempts', 0) < budget
+        return (not state['passed']) and (state['iterations'] < state['max_iterations']) and in_budget
 
     graph.add_conditional_edges(
         'controller',
         should_loop,
         {
-            True: 'writer',    # loop again
+            True: first,       # loop again
             False: END         # stop
         }
     )
@@ -75,13 +174,64 @@ def build_loop_graph():
     return graph.compile()
 
 
+# benchmark: wall-clock vs total work as K grows
+# quiet, slow stand-ins for an expensive generator and its check
+def slow_writer(state: LoopState) -> Dict[str, Any]:
+    time.sleep(0.05)
+    return {'number': random.randint(1, 100)}
+
+
+async def aslow_writer(state: LoopState) -> Dict[str, Any]:
+    await asyncio.sleep(0.05)
+    return {'number': random.randint(1, 100)}
+
+
+def quiet_tester(state: LoopState) -> Dict[str, Any]:
+    return {'passed': state['number'] % 10 == 0}
+
+
+def benchmark_racing(widths=(1, 2, 4, 8), trials: int = 30, max_attempts: int = 40):
+    print(f'\n=== Racing: {trials} runs per K, budget {max_attempts} attempts ===\n')
+    print(f"{'K':>3s} {'mode':>6s} {'wall s':>8s} {'attempts':>9s} {'rounds':>7s} {'pass rate':>10s}")
+    for width in widths:
+        for mode, writer in (('thread', slow_writer), ('async', aslow_writer)):
+            if width == 1 and mode == 'async':
+                continue
+            random.seed(width)
+            app = build_loop_graph(race_width=width, writer=writer, tester=quiet_tester)
+
+            walls, attempts, rounds, passes = [], [], [], 0
+            for _ in range(trials):
+                state: LoopState = {
+                    'number': 0, 'passed': False, 'iterations': 0,
+                    'max_iterations': max_attempts, 'attempts': 0, 'max_attempts': max_attempts,
+                }
+                start = time.time()
+                with contextlib.redirect_stdout(io.StringIO()):   # controller prints every round
+                    if mode == 'async':
+                        final = asyncio.run(app.ainvoke(state, config=RunnableConfig(recursion_limit=200)))
+                    else:
+                        final = app.invoke(state, config=RunnableConfig(recursion_limit=200))
+                walls.append(time.time() - start)
+                attempts.append(final['attempts'])
+                rounds.append(final['iterations'])
+                passes += final['passed']
+
+            print(
+                f'{width:3d} {mode:>6s} {statistics.mean(walls):8.3f} {statistics.mean(attempts):9.1f} '
+                f'{statistics.mean(rounds):7.1f} {passes / trials:9.0%}'
+            )
+
+
 # demo
 def main():
     initial_state: LoopState = {
         'number': 0,
         'passed': False,
         'iterations': 0,
-        'max_iterations': 5
+        'max_iterations': 5,
+        'attempts': 0,
+        'max_attempts': 0,
     }
 
     app = build_loop_graph()
@@ -92,6 +242,8 @@ def main():
     print('\n=== Final State ===')
     print(final)
 
+    benchmark_racing()
+
 
 if __name__ == '__main__':
     main()
@@ -0,0 +1,203 @@
+from typing import TypedDict, Dict, Any, List, Optional, Annotated
+from langgraph.graph import StateGraph, END
+from langgraph.types import Send
+from langchain_core.runnables import RunnableConfig
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeoutError
+import operator
+import random
+import threading
+import time
+
+from sentiment_lexicon import DEFAULT_SCORER, synthetic_posts
+
+# map-reduce version of aggregator_agents.py:
+# - sources are data, not nodes: one `process_source` branch is sent per source at runtime
+# - per-source results land in ONE list channel with an operator.add reducer
+# - max_concurrency in the config bounds how many branches run at once
+# - slow sources hit a per-source timeout, failing sources are recorded, never fatal
+
+
+# state
+class SourceResult(TypedDict):
+    source: str
+    status: str              # 'ok' | 'failed' | 'timeout'
+    sentiment: Optional[float]
+    posts: int
+    error: str
+    latency: float
+
+
+class MapReduceState(TypedDict):
+    sources: List[str]
+    source_timeout: float    # seconds a collector may take before it is a straggler
+    results: Annotated[List[SourceResult], operator.add]
+    report: str
+
+
+# payload of each Send
+class SourceTask(TypedDict):
+    source: str
+    source_timeout: float
+
+
+# simulated collector
+def collect_source(source: str, posts: int = 200) -> List[str]:
+    """Fetch recent posts for one source (simulated: deterministic per source).
+
+    Blocks for as long as the source takes, like a real client would;
+    process_source is what enforces the timeout.
+    """
+    rng = random.Random(source)
+    latency = rng.uniform(0.02, 0.08)
+    if rng.random() < 0.05:
+        latency = 1.0            # straggler
+    failing = rng.random() < 0.03
+
+    time.sleep(latency)
+    if failing:
+        raise ConnectionError(f'{source} is unavailable')
+    return synthetic_posts(posts, seed=rng.randrange(1 << 30))
+
+
+# collectors run here so a blocked one can be abandoned at its timeout; the
+# pool thread stays busy until the call returns, hence more workers than branches.
+# The pool is shared by all runs, so a collector may queue behind stragglers:
+# its timeout only starts once it is actually running (see _start_collector).
+_COLLECTORS = ThreadPoolExecutor(max_workers=128, thread_name_prefix='collector')
+
+
+def _start_collector(source: str):
+    """Submit collect_source, returns the future once a pool thread has picked it up."""
+    started = threading.Event()
+
+    def run():
+        started.set()
+        return collect_source(source)
+
+    future = _COLLECTORS.submit(run)
+    started.wait()   # time queued for a thread is not the source's fault
+    return future
+
+
+# map
+def fan_out(state: MapReduceState):
+    if not state['sources']:
+        return 'reduce'
+    return [
+        Send('process_source', {'source': source, 'source_timeout': state['source_timeout']})
+        for source in state['sources']
+    ]
+
+
+def process_source(task: SourceTask) -> Dict[str, Any]:
+    start = time.time()
+    source = task['source']
+    result: SourceResult = {
+        'source': source,
+        'status': 'ok',
+        'sentiment': None,
+        'posts': 0,
+        'error': '',
+        'latency': 0.0,
+    }
+
+    try:
+        future = _start_collector(source)
+        try:
+            posts = future.result(timeout=task['source_timeout'])
+        except FutureTimeoutError:
+            # can't stop a running thread: the straggler keeps its pool thread
+            # until it returns, its result is dropped
+            raise TimeoutError(f"{source} took longer than {task['source_timeout']}s")
+        sentiment = DEFAULT_SCORER.score_source(posts)   # whole batch in one numpy pass
+        result['sentiment'] = round(sentiment['mean'], 2)
+        result['posts'] = sentiment['posts']
+    except TimeoutError as e:
+        result['status'] = 'timeout'
+        result['error'] = str(e)
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = str(e)
+
+    result['latency'] = time.time() - start
+    return {'results': [result]}
+
+
+# reduce
+def reduce_results(state: MapReduceState) -> Dict[str, Any]:
+    results = state['results']
+    if not results:
+        print('Reduced results')
+        return {'report': 'No sources to aggregate: the source list was empty.\n'}
+
+    ok = [r for r in results if r['status'] == 'ok']
+    timed_out = [r['source'] for r in results if r['status'] == 'timeout']
+    failed = [r['source'] for r in results if r['status'] == 'failed']
+
+    overall = round(sum(r['sentiment'] for r in ok) / len(ok), 2) + 0.0 if ok else 0.0  # + 0.0 drops -0.0
+    posts = sum(r['posts'] for r in ok)
+    report = (
+        f'Overall sentiment: {overall} ({len(ok)}/{len(results)} sources, {posts} posts)\n'
+        f'- timed out: {len(timed_out)} {timed_out[:5]}\n'
+        f'- failed   : {len(failed)} {failed[:5]}\n'
+    )
+
+    print('Reduced results')
+    return {'report': report}
+
+
+# build graph
+def build_map_reduce_graph():
+    graph = StateGraph(MapReduceState)
+
+    graph.add_node('process_source', process_source)
+    graph.add_node('reduce', reduce_results)
+
+    # fan out directly from START, one branch per source
+    graph.set_conditional_entry_point(fan_out, ['process_source', 'reduce'])
+    graph.add_edge('process_source', 'reduce')
+    graph.add_edge('reduce', END)
+
+    return graph.compile()
+
+
+def run_map_reduce(sources: List[str], max_concurrency: int = 32, source_timeout: float = 0.5):
+    initial_state: MapReduceState = {
+        'sources': sources,
+        'source_timeout': source_timeout,
+        'results': [],
+        'report': '',
+    }
+    app = build_map_reduce_graph()
+    return app.invoke(initial_state, config=RunnableConfig(max_concurrency=max_concurrency))
+
+
+# benchmark: throughput vs number of sources
+def benchmark_scaling(source_counts=(8, 32, 128, 512), max_concurrency: int = 32):
+    print(f'\n=== Throughput (max_concurrency={max_concurrency}) ===\n')
+    for n in source_counts:
+        sources = [f'channel_{i}' for i in range(n)]
+        start = time.time()
+        run_map_reduce(sources, max_concurrency=max_concurrency)
+        wall = time.time() - start
+        print(f'sources={n:4d} wall={wall:6.2f}s throughput={n / wall:7.1f} sources/s')
+
+
+# demo
+def main():
+    sources = [f'subreddit_{i}' for i in range(100)] + [f'channel_{i}' for i in range(100)]
+
+    print('\n=== Running Map-Reduce Aggregator Example ===\n')
+    start = time.time()
+    result = run_map_reduce(sources, max_concurrency=32)
+    total = time.time() - start
+
+    print('\n=== Final Report ===\n')
+    print(result['report'])
+    print('wall-clock:', f'{total:.2f}s for {len(sources)} sources')
+
+    benchmark_scaling()
+
+
+if __name__ == '__main__':
+    main()
@@ -1,6 +1,7 @@
-from typing import TypedDict, Dict, Any
+from typing import TypedDict, Dict, Any, List, Set, Tuple
 from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
+import time
 
 # state
 class TicketState(TypedDict):
@@ -10,29 +11,67 @@ class TicketState(TypedDict):
     auto_resolved: bool
     escalated: bool
     history: str
+    # intake scan state, so re-entry only scans text appended since last time
+    scan_offset: int       # chars of text already scanned
+    scan_tail: str         # last chars scanned, for keywords split across the boundary
+    scan_hits: List[str]   # keywords found so far
     
 
-# agents
-def intake_agent(state: TicketState) -> Dict[str, Any]:
-    text = state['text'].lower()
-    history = state['history'] + ' -> intake'
-    
+# keywords
+BILLING_KEYWORDS = ['invoice', 'refund', 'charged']
+TECHNICAL_KEYWORDS = ['error', 'bug', 'crash', 'login']
+INFO_KEYWORDS = ['account id', 'order id']
+ALL_KEYWORDS = BILLING_KEYWORDS + TECHNICAL_KEYWORDS + INFO_KEYWORDS
+TAIL_CHARS = max(len(k) for k in ALL_KEYWORDS) - 1
+
+
+# helpers
+def scan_keywords(text: str, offset: int = 0, tail: str = '', hits: Set[str] = frozenset()) -> Tuple[int, str, Set[str]]:
+    """Scan text[offset:] for keywords, carrying `tail` over from the last scan."""
+    if offset > len(text):
+        # text was replaced, not appended to -> start over
+        offset, tail, hits = 0, '', frozenset()
+
+    window = tail + text[offset:].lower()
+    found = set(hits) | {k for k in ALL_KEYWORDS if k not in hits and k in window}
+    return len(text), window[-TAIL_CHARS:], found
+
+
+def classify(hits: Set[str]) -> Tuple[str, bool]:
     # classify very roughly
-    if any(w in text for w in ['invoice', 'refund', 'charged']):
+    if any(w in hits for w in BILLING_KEYWORDS):
         category = 'billing'
-    elif any(w in text for w in ['error', 'bug', 'crash', 'login']):
+    elif any(w in hits for w in TECHNICAL_KEYWORDS):
         category = 'technical'
     else:
         category = 'other'
-        
+
     # simulate missing info
-    has_required_info = 'account id' in text or 'order id' in text
+    has_required_info = any(w in hits for w in INFO_KEYWORDS)
+    return category, has_required_info
+
+
+# agents
+def intake_agent(state: TicketState) -> Dict[str, Any]:
+    history = state['history'] + ' -> intake'
+
+    # only the text info_agent appended since the last visit is scanned
+    offset, tail, hits = scan_keywords(
+        state['text'],
+        state.get('scan_offset', 0),
+        state.get('scan_tail', ''),
+        set(state.get('scan_hits', [])),
+    )
+    category, has_required_info = classify(hits)
     
     print(f'intake_agent: category={category}, has_required_info={has_required_info}')
     return {
         'category': category,
         'has_required_info': has_required_info,
         'history': history,
+        'scan_offset': offset,
+        'scan_tail': tail,
+        'scan_hits': sorted(hits),
     }
 
 def info_agent(state: TicketState) -> Dict[str, Any]:
@@ -74,11 +113,28 @@ def escalate_agent(state: TicketState) -> Dict[str, Any]:
     }
     
     
+# router label -> network category
+SEMANTIC_CATEGORIES = {'billing': 'billing', 'technical': 'technical'}
+
+
+def make_semantic_intake(router):
+    """intake_agent with the category from a semantic_router.SemanticRouter;
+    the keyword category stays when the router abstains."""
+    def semantic_intake_agent(state: TicketState) -> Dict[str, Any]:
+        update = intake_agent(state)
+        label, _ = router.route(state['text'])
+        if label is not None:
+            update['category'] = SEMANTIC_CATEGORIES.get(label, 'other')
+        return update
+
+    return semantic_intake_agent
+
+
 # build graph
-def build_network_graph():
+def build_network_graph(router=None):
     graph = StateGraph(TicketState)
 
-    graph.add_node('intake', intake_agent)
+    graph.add_node('intake', intake_agent if router is None else make_semantic_intake(router))
     graph.add_node('info', info_agent)
     graph.add_node('auto', auto_resolve_agent)
     graph.add_node('escalate', escalate_agent)
@@ -130,6 +186,41 @@ def build_network_graph():
     return graph.compile()
 
 
+# benchmark: many info rounds, incremental scan vs full rescan
+def benchmark_incremental_intake(rounds: int = 2000):
+    replies = [
+        ' Sorry, here are more details about the problem.',
+        ' It started after the last upd',
+        'ate, the app shows an err',    # keyword split across two rounds
+        'or on every login.',
+    ]
+    text = 'Hi, I was charged twice on my invoice.'
+
+    full_time = incremental_time = 0.0
+    offset, tail, hits = 0, '', set()
+    for i in range(rounds):
+        text += replies[i % len(replies)]
+        if i == rounds - 1:
+            text += ' Order ID: 777'
+
+        start = time.time()
+        full = classify(scan_keywords(text)[2])
+        full_time += time.time() - start
+
+        start = time.time()
+        offset, tail, hits = scan_keywords(text, offset, tail, hits)
+        incremental = classify(hits)
+        incremental_time += time.time() - start
+
+        assert incremental == full, f'round {i}: {incremental} != {full}'
+
+    print(f'\n=== Intake scan over {rounds} info rounds ({len(text)} chars) ===\n')
+    print('full rescan :', f'{full_time:.4f}s')
+    print('incremental :', f'{incremental_time:.4f}s')
+    print('speedup     :', f'{full_time / incremental_time:.1f}x')
+    print('final       :', classify(hits))
+
+
 # demo
 def main():
     text = 'Hi, I was charged twice on my invoice but I did not include my account id.'
@@ -141,6 +232,9 @@ def main():
         'auto_resolved': False,
         'escalated': False,
         'history': '',
+        'scan_offset': 0,
+        'scan_tail': '',
+        'scan_hits': [],
     }
 
     app = build_network_graph()
@@ -155,6 +249,16 @@ def main():
     print('escalated     :', result['escalated'])
     print('history       :', result['history'])
 
+    # paraphrased ticket without any of the billing keywords
+    from semantic_router import default_router
+
+    paraphrase = 'I got billed two times for one order, order id 17, I want my money back.'
+    for label, graph in [('keyword', app), ('semantic', build_network_graph(default_router()))]:
+        routed = graph.invoke({**initial_state, 'text': paraphrase}, config=RunnableConfig())
+        print(f'{label:9s}     : category={routed["category"]}, history={routed["history"]}')
+
+    benchmark_incremental_intake()
+
 
 if __name__ == '__main__':
     main()
\ No newline at end of file
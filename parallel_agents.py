@@ -1,8 +1,13 @@
-from typing import TypedDict, Dict, Any
+from typing import TypedDict, Dict, Any, Callable, List, Optional
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
 from langgraph.graph import StateGraph, END
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+import asyncio
+import random
 import time
 
+from graph_optimizer import optimize_graph
+
 # state
 class TicketState(TypedDict):
     text: str
@@ -12,6 +17,7 @@ class TicketState(TypedDict):
     spam_time: float
     urgency_time: float
     category_time: float
+    cancelled: List[str]   # branches stopped by an early-exit rule
     
 # agents
 def spam_agent(state: TicketState) -> Dict[str, Any]:
@@ -65,30 +71,193 @@ def category_agent(state: TicketState) -> Dict[str, Any]:
 def join_node(state: TicketState) -> TicketState:
     return state
 
+# early exit
+# - a rule looks at one branch's update and returns True to stop the others
+# - with rules, the fan-out is ONE fused node that runs the branches itself,
+#   so it can stop siblings and go straight to join (a LangGraph superstep
+#   always waits for every branch)
+# - async: branches are tasks, cancelled at their next await (cooperative)
+# - threads: branches not started yet are skipped, running ones can't be
+#   interrupted, their result is dropped (best-effort)
+EarlyExitRules = Dict[str, Callable[[Dict[str, Any]], bool]]
+
+SPAM_EARLY_EXIT: EarlyExitRules = {
+    'spam': lambda update: update['is_spam'],
+}
+
+BRANCHES = {
+    'spam': spam_agent,
+    'urgency': urgency_agent,
+    'category': category_agent,
+}
+
+
+def build_fanout_node(branches: Dict[str, Callable], early_exit_rules: EarlyExitRules, max_workers: Optional[int] = None):
+    def should_exit(name: str, update: Dict[str, Any]) -> bool:
+        rule = early_exit_rules.get(name)
+        return bool(rule and rule(update))
+
+    def fanout(state: TicketState) -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+        executor = ThreadPoolExecutor(max_workers=max_workers or len(branches))
+        futures = {executor.submit(fn, state): name for name, fn in branches.items()}
+        pending = set(futures)
+        try:
+            while pending:
+                done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                exit_now = False
+                for future in done:
+                    update = future.result()
+                    merged.update(update)
+                    exit_now = exit_now or should_exit(futures[future], update)
+                if exit_now:
+                    break
+        finally:
+            for future in pending:
+                future.cancel()
+            executor.shutdown(wait=False, cancel_futures=True)
+
+        merged['cancelled'] = sorted(futures[f] for f in pending)
+        return merged
+
+    async def afanout(state: TicketState) -> Dict[str, Any]:
+        merged: Dict[str, Any] = {}
+
+        async def run(fn):
+            if asyncio.iscoroutinefunction(fn):
+                return await fn(state)
+            return await asyncio.to_thread(fn, state)   # can't be interrupted once started
+
+        tasks = {asyncio.create_task(run(fn)): name for name, fn in branches.items()}
+        pending = set(tasks)
+        try:
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                exit_now = False
+                for task in done:
+                    update = task.result()
+                    merged.update(update)
+                    exit_now = exit_now or should_exit(tasks[task], update)
+                if exit_now:
+                    break
+        finally:
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+
+        merged['cancelled'] = sorted(tasks[t] for t in pending)
+        return merged
+
+    return RunnableLambda(fanout, afunc=afanout, name='fanout')
+
+
 # build graph
-def build_parallel_ticket_graph():
+def build_parallel_ticket_graph(
+    early_exit_rules: Optional[EarlyExitRules] = None,
+    branches: Optional[Dict[str, Callable]] = None,
+    optimize: bool = False,
+    router=None,
+):
     graph = StateGraph(TicketState)
+    branches = branches or BRANCHES
+    if router is not None:
+        # semantic_router.SemanticRouter in front of the category branch, the
+        # keyword category_agent still answers when the router abstains
+        from semantic_router import make_category_node
 
-    graph.add_node('spam', spam_agent)
-    graph.add_node('urgency', urgency_agent)
-    graph.add_node('category', category_agent)
+        category = make_category_node(router, branches['category'], labels={'general': 'other'}, time_field='category_time')
+        branches = {**branches, 'category': category}
 
-    graph.add_node('branch', lambda s: s)
     graph.add_node('join', join_node)
+    graph.add_edge('join', END)
+
+    if early_exit_rules:
+        graph.add_node('fanout', build_fanout_node(branches, early_exit_rules))
+        graph.set_entry_point('fanout')
+        graph.add_edge('fanout', 'join')
+        if optimize:
+            optimize_graph(graph)   # join is a pass-through
+        return graph.compile()
 
+    graph.add_node('branch', lambda s: s)
     graph.set_entry_point('branch')
+    for name, fn in branches.items():
+        graph.add_node(name, fn)
+        graph.add_edge('branch', name)
+        graph.add_edge(name, 'join')
 
-    graph.add_edge('branch', 'spam')
-    graph.add_edge('branch', 'urgency')
-    graph.add_edge('branch', 'category')
+    if optimize:
+        # branch / join are pass-throughs, START fans out and branches go to END directly
+        optimize_graph(graph)
+    return graph.compile()
 
-    graph.add_edge('spam', 'join')
-    graph.add_edge('urgency', 'join')
-    graph.add_edge('category', 'join')
 
-    graph.add_edge('join', END)
+# benchmark: compute saved on spam-heavy traffic
+# stand-ins for model-backed branches, they record how long they actually ran
+def simulated_branches(latency: Dict[str, float], work: Dict[str, float]):
+    def make(name, fn):
+        def run(state):
+            start = time.time()
+            try:
+                time.sleep(latency[name])
+                return fn(state)
+            finally:
+                work[name] = work.get(name, 0.0) + time.time() - start
+
+        async def arun(state):
+            start = time.time()
+            try:
+                await asyncio.sleep(latency[name])
+                return fn(state)
+            finally:
+                work[name] = work.get(name, 0.0) + time.time() - start
+
+        return run, arun
+
+    made = {name: make(name, fn) for name, fn in BRANCHES.items()}
+    return {name: sync for name, (sync, _) in made.items()}, {name: asy for name, (_, asy) in made.items()}
+
+
+def benchmark_early_exit(tickets: int = 20, spam_share: float = 0.7):
+    rng = random.Random(0)
+    texts = [
+        'Click here to win money, free gift inside!' if rng.random() < spam_share
+        else 'My invoice was charged twice, please refund asap.'
+        for _ in range(tickets)
+    ]
+    latency = {'spam': 0.02, 'urgency': 0.2, 'category': 0.2}   # spam is a cheap filter
+
+    def initial(text):
+        return {'text': text, 'is_spam': False, 'urgency': '', 'category': '',
+                'spam_time': 0.0, 'urgency_time': 0.0, 'category_time': 0.0, 'cancelled': []}
+
+    print(f'\n=== Early exit on {tickets} tickets, {spam_share:.0%} spam ===\n')
+    print(f"{'mode':22s} {'wall s':>7s} {'branch work s':>14s} {'saved':>7s} {'cancelled':>10s}")
+    baseline = None
+    for label, rules, use_async in [
+        ('fan-out (no rules)', None, False),
+        ('early exit, threads', SPAM_EARLY_EXIT, False),
+        ('early exit, async', SPAM_EARLY_EXIT, True),
+    ]:
+        work: Dict[str, float] = {}
+        sync_branches, async_branches = simulated_branches(latency, work)
+        app = build_parallel_ticket_graph(rules, async_branches if use_async else sync_branches)
+
+        start = time.time()
+        if use_async:
+            async def run_all():
+                return [await app.ainvoke(initial(t)) for t in texts]
+            results = asyncio.run(run_all())
+        else:
+            results = [app.invoke(initial(t), config=RunnableConfig()) for t in texts]
+        wall = time.time() - start
+        time.sleep(max(latency.values()))   # let dropped threads finish and book their work
+
+        total_work = sum(work.values())
+        baseline = baseline or total_work
+        cancelled = sum(len(r.get('cancelled') or []) for r in results)
+        print(f'{label:22s} {wall:7.2f} {total_work:14.2f} {(baseline - total_work) / baseline * 100:6.1f}% {cancelled:10d}')
 
-    return graph.compile()
 
 # demo
 
@@ -107,6 +276,7 @@ def main():
         'spam_time': 0.0,
         'urgency_time': 0.0,
         'category_time': 0.0,
+        'cancelled': [],
     }
     
     app = build_parallel_ticket_graph()
@@ -129,5 +299,16 @@ def main():
     print('category  :', result['category_time'])
     print('wall-clock:', f'{total:.4f}')
 
+    # paraphrased ticket without any of the category keywords
+    from semantic_router import default_router
+
+    paraphrase = 'I got billed two times for one order, I want my money back.'
+    router = default_router(('billing', 'technical', 'account', 'general'))
+    for label, graph in [('keyword', app), ('semantic', build_parallel_ticket_graph(router=router))]:
+        routed = graph.invoke({**initial_state, 'text': paraphrase}, config=config)
+        print(f'{label:9s} : category={routed["category"]}')
+
+    benchmark_early_exit()
+
 if __name__ == '__main__':
     main()
\ No newline at end of file
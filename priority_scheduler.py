@@ -0,0 +1,295 @@
+from typing import Any, Callable, Dict, List, Optional, TypedDict
+from collections import deque
+from concurrent.futures import Future
+from functools import lru_cache
+from langchain_core.runnables import RunnableConfig
+import contextlib
+import io
+import json
+import random
+import statistics
+import threading
+import time
+
+from sequencial_agents import build_sequential_ticket_graph
+from ticket_cache import initial_state
+
+# urgency-aware scheduler for triaged tickets:
+# - one FIFO per triage queue (priority_queue / standard_queue / backlog)
+# - weighted fair queuing (self-clocked): every job gets a virtual finish tag
+#   max(V, last tag of its queue) + cost / weight, workers always take the
+#   smallest tag -> under overload each queue gets CPU in proportion to its weight
+# - per-queue concurrency quota: a queue never holds more than max_concurrency workers,
+#   so a flood of backlog tickets can't occupy every worker; with borrow=True a queue
+#   may go over its quota while no other queue has work waiting (no idle workers)
+# - starvation protection: a head that waited longer than max_wait goes first
+# - wait time (submit -> start) per queue is recorded; metrics() / to_prometheus() export it
+
+
+class QueueConfig(TypedDict):
+    weight: float
+    max_concurrency: int
+
+
+DEFAULT_QUEUES: Dict[str, QueueConfig] = {
+    'priority_queue': {'weight': 8.0, 'max_concurrency': 4},
+    'standard_queue': {'weight': 3.0, 'max_concurrency': 3},
+    'backlog': {'weight': 1.0, 'max_concurrency': 2},
+}
+
+
+class _Job:
+    __slots__ = ('ticket', 'queue', 'tag', 'submitted', 'future')
+
+    def __init__(self, ticket, queue, tag, submitted):
+        self.ticket = ticket
+        self.queue = queue
+        self.tag = tag
+        self.submitted = submitted
+        self.future = Future()
+
+
+def _percentile(values: List[float], q: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class PriorityScheduler:
+    def __init__(
+        self,
+        handler: Callable[[Dict[str, Any]], Any],
+        queues: Optional[Dict[str, QueueConfig]] = None,
+        workers: int = 4,
+        max_wait: Optional[float] = 2.0,     # seconds before a waiting head jumps the line, None = off
+        borrow: bool = True,                  # use idle workers beyond the quota
+        fifo: bool = False,                   # ignore weights / quotas, for comparison
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.handler = handler
+        self.queues = queues or DEFAULT_QUEUES
+        self.workers = workers
+        self.max_wait = max_wait
+        self.borrow = borrow
+        self.fifo = fifo
+        self.clock = clock
+
+        self._pending: Dict[str, deque] = {q: deque() for q in self.queues}
+        self._last_tag: Dict[str, float] = {q: 0.0 for q in self.queues}
+        self._running: Dict[str, int] = {q: 0 for q in self.queues}
+        self._virtual_time = 0.0
+        self._cond = threading.Condition()
+        self._closed = False
+        self._threads: List[threading.Thread] = []
+
+        self._waits: Dict[str, List[float]] = {q: [] for q in self.queues}
+        self._counters = {q: {'submitted': 0, 'completed': 0, 'failed': 0, 'promoted': 0} for q in self.queues}
+
+    # lifecycle
+    def start(self):
+        for i in range(self.workers):
+            thread = threading.Thread(target=self._work, name=f'scheduler-{i}', daemon=True)
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def shutdown(self, wait: bool = True):
+        """Stop taking work; with wait=True the queued tickets are drained first."""
+        with self._cond:
+            if wait:
+                while any(self._pending.values()) or any(self._running.values()):
+                    self._cond.wait()
+            self._closed = True
+            self._cond.notify_all()
+        for thread in self._threads:
+            thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.shutdown()
+
+    # producers
+    def submit(self, ticket: Dict[str, Any], queue: str, cost: float = 1.0) -> Future:
+        if queue not in self.queues:
+            raise ValueError(f'unknown queue: {queue}')
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('scheduler is shut down')
+            start_tag = max(self._virtual_time, self._last_tag[queue])
+            tag = start_tag + cost / self.queues[queue]['weight']
+            self._last_tag[queue] = tag
+
+            job = _Job(ticket, queue, tag, self.clock())
+            self._pending[queue].append(job)
+            self._counters[queue]['submitted'] += 1
+            self._cond.notify()
+        return job.future
+
+    # scheduling
+    def _pick(self) -> Optional[_Job]:
+        heads = [
+            (q, jobs[0]) for q, jobs in self._pending.items()
+            if jobs and (self.fifo or self._running[q] < self.queues[q]['max_concurrency'])
+        ]
+        if not heads and self.borrow:
+            waiting = [(q, jobs[0]) for q, jobs in self._pending.items() if jobs]
+            if len(waiting) == 1:
+                heads = waiting
+        if not heads:
+            return None
+
+        if self.fifo:
+            queue, job = min(heads, key=lambda h: h[1].submitted)
+        else:
+            now = self.clock()
+            starved = [h for h in heads if self.max_wait is not None and now - h[1].submitted > self.max_wait]
+            if starved:
+                queue, job = min(starved, key=lambda h: h[1].submitted)
+                # only a promotion if WFQ would have picked someone else
+                if job is not min(heads, key=lambda h: h[1].tag)[1]:
+                    self._counters[queue]['promoted'] += 1
+            else:
+                queue, job = min(heads, key=lambda h: h[1].tag)
+
+        self._pending[queue].popleft()
+        self._virtual_time = max(self._virtual_time, job.tag)
+        return job
+
+    def _work(self):
+        while True:
+            with self._cond:
+                job = self._pick()
+                while job is None:
+                    if self._closed:
+                        return
+                    self._cond.wait()
+                    job = self._pick()
+                self._running[job.queue] += 1
+                self._waits[job.queue].append(self.clock() - job.submitted)
+
+            try:
+                result = self.handler(job.ticket)
+            except Exception as e:
+                job.future.set_exception(e)
+                outcome = 'failed'
+            else:
+                job.future.set_result(result)
+                outcome = 'completed'
+
+            with self._cond:
+                self._running[job.queue] -= 1
+                self._counters[job.queue][outcome] += 1
+                self._cond.notify_all()   # a quota slot is free again
+
+    # metrics
+    def metrics(self) -> Dict[str, Dict[str, Any]]:
+        with self._cond:
+            out = {}
+            for q in self.queues:
+                waits = self._waits[q]
+                out[q] = {
+                    **self._counters[q],
+                    'depth': len(self._pending[q]),
+                    'running': self._running[q],
+                    'wait_mean': statistics.fmean(waits) if waits else 0.0,
+                    'wait_p50': _percentile(waits, 0.50),
+                    'wait_p95': _percentile(waits, 0.95),
+                    'wait_max': max(waits, default=0.0),
+                }
+            return out
+
+    def to_prometheus(self, prefix: str = 'ticket_scheduler') -> str:
+        """Metrics in the Prometheus text format, one series per queue."""
+        lines = []
+        for q, m in self.metrics().items():
+            for name, value in m.items():
+                lines.append(f'{prefix}_{name}{{queue="{q}"}} {value}')
+        return '\n'.join(lines) + '\n'
+
+
+# triage + downstream, graphs compiled once on first use
+@lru_cache(maxsize=None)
+def get_triage_graph():
+    return build_sequential_ticket_graph()
+
+
+@lru_cache(maxsize=None)
+def get_network_graph():
+    from network_agents import build_network_graph
+
+    return build_network_graph()
+
+
+def triage(text: str) -> str:
+    """Run the sequential pipeline, returns the queue triage_agent picked."""
+    return get_triage_graph().invoke(initial_state('sequential', text), config=RunnableConfig())['queue']
+
+
+def network_handler(ticket: Dict[str, Any]) -> Dict[str, Any]:
+    return get_network_graph().invoke(initial_state('network', ticket['text']), config=RunnableConfig())
+
+
+def submit_triaged(scheduler: PriorityScheduler, text: str) -> Future:
+    return scheduler.submit({'text': text}, triage(text))
+
+
+# demo: overload, 1 in 10 tickets is urgent
+TICKETS = {
+    'priority_queue': 'The system is down and we cannot login, fix this immediately.',
+    'standard_queue': 'I have an issue with my invoice, please refund asap, account id 7.',
+    'backlog': 'How do I change my profile picture? order id 3',
+}
+
+
+def overload_run(fifo: bool, tickets: int = 300, arrival_rate: float = 300.0, service_time: float = 0.02):
+    # 4 workers x 50 jobs/s = 200/s capacity, tickets arrive at 300/s
+    rng = random.Random(0)
+    texts = [
+        TICKETS['priority_queue'] if rng.random() < 0.1
+        else TICKETS['standard_queue'] if rng.random() < 0.4
+        else TICKETS['backlog']
+        for _ in range(tickets)
+    ]
+
+    def handler(ticket):
+        time.sleep(service_time)   # stands in for model calls downstream
+        return network_handler(ticket)
+
+    scheduler = PriorityScheduler(handler, workers=4, max_wait=1.0, fifo=fifo).start()
+    start = time.monotonic()
+    futures = []
+    for i, text in enumerate(texts):
+        futures.append(submit_triaged(scheduler, text))
+        time.sleep(max(0.0, start + (i + 1) / arrival_rate - time.monotonic()))
+    for future in futures:
+        future.result()
+    scheduler.shutdown()
+    return scheduler, time.monotonic() - start
+
+
+def main():
+    print('\n=== Triaged tickets under overload (300/s in, 200/s capacity) ===\n')
+    print(f"{'mode':6s} {'queue':15s} {'done':>5s} {'p50 ms':>8s} {'p95 ms':>8s} {'max ms':>8s} {'promoted':>9s}")
+    last = None
+    for label, fifo in [('fifo', True), ('wfq', False)]:
+        # network_agents prints from its nodes
+        with contextlib.redirect_stdout(io.StringIO()):
+            scheduler, wall = overload_run(fifo)
+        for q, m in scheduler.metrics().items():
+            print(
+                f"{label:6s} {q:15s} {m['completed']:5d} {m['wait_p50'] * 1000:8.1f} "
+                f"{m['wait_p95'] * 1000:8.1f} {m['wait_max'] * 1000:8.1f} {m['promoted']:9d}"
+            )
+        print(f'{label:6s} wall {wall:.2f}s\n')
+        last = scheduler
+
+    print('exported metrics (prometheus):')
+    print(last.to_prometheus())
+    print(json.dumps(last.metrics()['priority_queue'], indent=2))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,335 @@
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from functools import lru_cache
+import hashlib
+import random
+import re
+import time
+import zlib
+
+import numpy as np
+
+# semantic routing without a model server:
+# - HashingEmbedder: words, word bigrams and character 4-grams are hashed
+#   (crc32) into a fixed number of signed buckets -> sparse L2-normalized vector.
+#   No vocabulary, no training, nothing to download.
+# - SemanticRouter: one centroid per label (mean of a few example tickets),
+#   score = cosine similarity = centroid columns . sparse vector (NumPy).
+# - confidence = best similarity - second best: hashed n-gram similarities are
+#   small in absolute terms, what matters is how clearly one label wins.
+#   Below `threshold` the router abstains and the caller falls back
+#   (keyword rules, or an LLM supervisor where there is one).
+# - embeddings are cached by a hash of the text, hashed features by the feature,
+#   so repeats (retries, templates) skip the tokenizing entirely.
+# - opt-in users: supervisor_agents (router=), network_agents.build_network_graph
+#   (router= on intake) and parallel_agents.build_parallel_ticket_graph (router=
+#   in front of category_agent, through make_category_node).
+
+TOKEN_RE = re.compile(r'[a-z0-9]+')
+STOPWORDS = frozenset(
+    'a an and are as at be but by can do for from has have hi hello i if in is it its me my '
+    'of on or our please so that the their them there this to too was we were what when '
+    'with you your'.split()
+)
+
+
+class HashingEmbedder:
+    def __init__(self, dim: int = 1 << 12, char_ngram: int = 4, cache_size: int = 100_000):
+        if dim & (dim - 1):
+            raise ValueError('dim must be a power of two')
+        self.dim = dim
+        self.char_ngram = char_ngram
+        self.cache_size = cache_size
+        self._mask = dim - 1
+        self._features: Dict[str, Tuple[int, float]] = {}   # feature -> (bucket, sign)
+        self._cache: Dict[bytes, Tuple[np.ndarray, np.ndarray]] = {}
+        self.hits = 0
+        self.misses = 0
+
+    def features(self, text: str) -> List[str]:
+        words = [w for w in TOKEN_RE.findall(text.lower()) if w not in STOPWORDS]
+        feats = words + [f'{a} {b}' for a, b in zip(words, words[1:])]
+        n = self.char_ngram
+        for w in words:
+            if len(w) > n and not w.isdigit():   # ids / amounts: the word is enough
+                w = f'<{w}>'
+                feats.extend(w[i:i + n] for i in range(len(w) - n + 1))
+        return feats
+
+    def _bucket(self, feature: str) -> Tuple[int, float]:
+        hit = self._features.get(feature)
+        if hit is None:
+            h = zlib.crc32(feature.encode())
+            hit = (h & self._mask, 1.0 if h & 0x80000000 else -1.0)
+            if len(self._features) >= self.cache_size:
+                self._features.clear()
+            self._features[feature] = hit
+        return hit
+
+    def embed(self, text: str) -> Tuple[np.ndarray, np.ndarray]:
+        """Sparse embedding: (bucket indices, values), values L2-normalized."""
+        key = hashlib.blake2b(text.encode(), digest_size=16).digest()
+        cached = self._cache.get(key)
+        if cached is not None:
+            self.hits += 1
+            return cached
+        self.misses += 1
+
+        acc: Dict[int, float] = {}
+        for feature in self.features(text):
+            bucket, sign = self._bucket(feature)
+            acc[bucket] = acc.get(bucket, 0.0) + sign
+        idx = np.fromiter(acc.keys(), dtype=np.int64, count=len(acc))
+        val = np.fromiter(acc.values(), dtype=np.float32, count=len(acc))
+        norm = float(np.sqrt(val @ val))
+        if norm:
+            val /= norm
+
+        if len(self._cache) >= self.cache_size:
+            self._cache.pop(next(iter(self._cache)))   # oldest first
+        self._cache[key] = (idx, val)
+        return idx, val
+
+    def dense(self, text: str) -> np.ndarray:
+        idx, val = self.embed(text)
+        vec = np.zeros(self.dim, dtype=np.float32)
+        np.add.at(vec, idx, val)
+        return vec
+
+
+class SemanticRouter:
+    def __init__(
+        self,
+        examples: Dict[str, Sequence[str]],
+        threshold: float = 0.05,   # min margin between the two best labels
+        embedder: Optional[HashingEmbedder] = None,
+    ):
+        self.embedder = embedder or HashingEmbedder()
+        self.threshold = threshold
+        self.labels = list(examples)
+
+        centroids = np.stack([
+            np.mean([self.embedder.dense(t) for t in texts], axis=0) for texts in examples.values()
+        ])
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True)
+        self.centroids = np.ascontiguousarray(centroids, dtype=np.float32)   # (labels, dim)
+
+        self.routed = 0
+        self.abstained = 0
+
+    def scores(self, text: str) -> Dict[str, float]:
+        idx, val = self.embedder.embed(text)
+        return dict(zip(self.labels, (self.centroids[:, idx] @ val).tolist()))
+
+    def route(self, text: str) -> Tuple[Optional[str], float]:
+        """(label, confidence); label is None when the confidence is below threshold."""
+        idx, val = self.embedder.embed(text)
+        sims = self.centroids[:, idx] @ val
+        return self._decide(sims[:, None])[0]
+
+    def route_batch(self, texts: Sequence[str]) -> List[Tuple[Optional[str], float]]:
+        if not texts:
+            return []
+        embedded = [self.embedder.embed(t) for t in texts]
+        idx = np.concatenate([e[0] for e in embedded])
+        val = np.concatenate([e[1] for e in embedded])
+        lengths = np.fromiter((len(e[0]) for e in embedded), dtype=np.int64, count=len(embedded))
+
+        # one gather for the whole batch, then a sum per ticket keyed by ticket id
+        # (texts without features get no entries and stay at 0)
+        contrib = self.centroids[:, idx] * val
+        ticket = np.repeat(np.arange(len(texts)), lengths)
+        sims = np.stack([
+            np.bincount(ticket, weights=row, minlength=len(texts)) for row in contrib
+        ]).astype(np.float32)
+
+        return self._decide(sims)
+
+    def _decide(self, sims: np.ndarray) -> List[Tuple[Optional[str], float]]:
+        # sims: (labels, tickets) -> margin of the best label over the runner-up
+        if len(self.labels) > 1:
+            top2 = np.partition(sims, -2, axis=0)[-2:]
+            confidence = top2[1] - top2[0]
+        else:
+            confidence = sims[0]
+        best = sims.argmax(axis=0)
+
+        out = []
+        for b, c in zip(best.tolist(), confidence.tolist()):
+            out.append((self.labels[b], c) if c >= self.threshold else (None, c))
+        abstained = sum(1 for label, _ in out if label is None)
+        self.abstained += abstained
+        self.routed += len(out) - abstained
+        return out
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.routed + self.abstained
+        lookups = self.embedder.hits + self.embedder.misses
+        return {
+            'routed': self.routed,
+            'abstained': self.abstained,
+            'fallback_rate': self.abstained / total if total else 0.0,
+            'cache_hit_rate': self.embedder.hits / lookups if lookups else 0.0,
+        }
+
+
+# example tickets per category, shared by the routers below
+TICKET_EXAMPLES: Dict[str, List[str]] = {
+    'billing': [
+        'I was charged twice for the same invoice',
+        'please refund my last payment',
+        'my credit card was billed the wrong amount',
+        'I got billed two times for the same thing, I want my money back',
+        'cancel my subscription and stop the charges',
+        'where is the receipt for my purchase',
+        'the price on my bill is higher than the plan I signed up for',
+        'a payment went through that I did not authorize',
+    ],
+    'technical': [
+        'I cannot login to my account',
+        'the app crashes when I open it',
+        'I get an error message when I reset my password',
+        'the website is down and nothing loads',
+        'I am unable to sign in, the page just spins',
+        'there is a bug in the export feature',
+        'two factor code never arrives so I cannot get in',
+        'the application keeps freezing after the update',
+    ],
+    'account': [
+        'how do I change my username',
+        'update the email address on my profile',
+        'I want to delete my account',
+        'change the profile picture on my account',
+        'add a new team member to our workspace',
+        'transfer ownership of the account to a colleague',
+    ],
+    'general': [
+        'what are your opening hours',
+        'do you ship to Canada',
+        'where can I find the user guide',
+        'is there a student discount',
+        'how do I contact your sales team',
+        'do you have an office in London',
+    ],
+}
+
+
+def make_category_node(
+    router: SemanticRouter,
+    fallback: Callable[[Dict[str, Any]], Dict[str, Any]],
+    text_field: str = 'text',
+    labels: Optional[Dict[str, str]] = None,   # router label -> value written to 'category'
+    time_field: Optional[str] = None,          # also write the node's run time here
+) -> Callable[[Dict[str, Any]], Dict[str, Any]]:
+    """Node writing 'category' from the router, `fallback` (e.g. category_agent) when it abstains."""
+    labels = labels or {}
+
+    def semantic_category_node(state: Dict[str, Any]) -> Dict[str, Any]:
+        start = time.time()
+        label, _ = router.route(state[text_field])
+        if label is None:
+            return fallback(state)
+        update = {'category': labels.get(label, label)}
+        if time_field:
+            update[time_field] = time.time() - start
+        return update
+
+    return semantic_category_node
+
+
+@lru_cache(maxsize=None)
+def default_router(labels: Tuple[str, ...] = ('billing', 'technical', 'general')) -> SemanticRouter:
+    """Router over a subset of TICKET_EXAMPLES, built once per label set."""
+    return SemanticRouter({label: TICKET_EXAMPLES[label] for label in labels})
+
+
+# benchmark
+LABELED = [
+    ('I paid two times for a single order', 'billing'),
+    ('my money has not come back yet after the return', 'billing'),
+    ('why is there an extra fee on my card statement', 'billing'),
+    ('stop billing me, I cancelled last month', 'billing'),
+    ('I was charged twice and need a refund', 'billing'),
+    ('cannot sign in since this morning', 'technical'),
+    ('the app keeps closing on startup', 'technical'),
+    ('the page shows a blank screen after the update', 'technical'),
+    ('password reset link gives an error', 'technical'),
+    ('my verification code never arrives', 'technical'),
+    ('do you deliver to Australia', 'general'),
+    ('what time does support open on weekends', 'general'),
+    ('where can I read the documentation', 'general'),
+    ('is there a discount for nonprofits', 'general'),
+]
+
+
+def synthetic_tickets(n: int, unique: bool, seed: int = 0) -> List[str]:
+    rng = random.Random(seed)
+    texts = [t for t, _ in LABELED]
+    if not unique:
+        return [rng.choice(texts) for _ in range(n)]
+    # every ticket different (own reference number) -> no embedding cache hits
+    return [f'{rng.choice(texts)} (ticket ref {i})' for i in range(n)]
+
+
+def benchmark(n: int = 50_000):
+    from supervisor_agents import keyword_route
+
+    router = SemanticRouter({label: TICKET_EXAMPLES[label] for label in ('billing', 'technical', 'general')})
+
+    correct_keyword = sum(keyword_route(t) == label for t, label in LABELED)
+    routed = [router.route(t)[0] for t, _ in LABELED]
+    correct_semantic = sum(r == label for r, (_, label) in zip(routed, LABELED))
+    combined = [r or keyword_route(t) for r, (t, _) in zip(routed, LABELED)]
+    correct_combined = sum(r == label for r, (_, label) in zip(combined, LABELED))
+    abstained = sum(r is None for r in routed)
+    print(f'\n=== Accuracy on {len(LABELED)} paraphrased tickets ===\n')
+    print(f'keyword rules             : {correct_keyword}/{len(LABELED)}')
+    print(f'semantic router           : {correct_semantic}/{len(LABELED)} routed, {abstained} abstained (threshold {router.threshold})')
+    print(f'semantic + keyword fallback: {correct_combined}/{len(LABELED)}')
+
+    # the batch path has to agree with route(), labels and confidences,
+    # also around texts without any features
+    texts = [t for t, _ in LABELED] + ['', 'the']
+    texts = [''] + texts[:5] + ['', ''] + texts[5:] + ['']
+    single = [router.route(t) for t in texts]
+    batched = router.route_batch(texts)
+    assert [label for label, _ in single] == [label for label, _ in batched]
+    assert np.allclose([c for _, c in single], [c for _, c in batched], atol=1e-5)
+
+    print(f'\n=== Throughput, {n} tickets, one core ===\n')
+    print(f"{'mode':28s} {'tickets/s':>10s} {'us/ticket':>10s}")
+    for label, unique, batch in [
+        ('unique texts, one by one', True, False),
+        ('unique texts, batched', True, True),
+        ('repeated texts, one by one', False, False),
+        ('repeated texts, batched', False, True),
+    ]:
+        texts = synthetic_tickets(n, unique)
+        router.embedder._cache.clear()
+        start = time.perf_counter()
+        if batch:
+            for i in range(0, n, 1024):
+                router.route_batch(texts[i:i + 1024])
+        else:
+            for t in texts:
+                router.route(t)
+        elapsed = time.perf_counter() - start
+        print(f'{label:28s} {n / elapsed:10.0f} {elapsed / n * 1e6:10.1f}')
+
+    # batch and single must agree
+    texts = synthetic_tickets(2000, True, seed=1)
+    assert [r for r, _ in router.route_batch(texts)] == [router.route(t)[0] for t in texts]
+
+
+# demo
+def main():
+    router = default_router()
+    print('\n=== Semantic routes ===\n')
+    for text, expected in LABELED[:6]:
+        label, sim = router.route(text)
+        print(f'{text[:45]:45s} -> {str(label):10s} (confidence {sim:.2f}, expected {expected})')
+
+    benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,263 @@
+from typing import Dict, Iterable, List, TypedDict
+import math
+import platform
+import random
+import re
+import time
+
+import numpy as np
+
+# lexicon-based sentiment, scored a whole batch of posts at a time:
+# - all posts go into ONE byte buffer, every byte that is not [a-z'] becomes a space
+# - tokens are found with numpy and keyed by their first 16 bytes (two uint64
+#   gathers, no python loop over tokens or characters), then looked up in a small
+#   direct-mapped table of the lexicon keys
+# - the post x term matrix stays sparse: (post id, term id) pairs, never a dense matrix
+# - negation flips a term if a negator appeared <= NEGATION_WINDOW tokens before it
+# - per-post sums with np.bincount, squashed to [-1, 1] like VADER does
+
+LEXICON: Dict[str, float] = {
+    # positive
+    'love': 3.2, 'loved': 2.9, 'great': 3.1, 'awesome': 3.1, 'excellent': 3.2,
+    'good': 1.9, 'nice': 1.8, 'fast': 1.5, 'smooth': 1.6, 'happy': 2.7,
+    'praising': 2.2, 'praise': 2.4, 'beautiful': 2.9, 'stunning': 2.8,
+    'buzz': 1.0, 'excited': 2.2, 'recommend': 2.0, 'works': 1.0, 'fixed': 1.2,
+    'wonderful': 2.7, 'helpful': 1.9, 'best': 3.0,
+    # negative
+    'hate': -2.7, 'terrible': -2.9, 'awful': -3.0, 'bad': -2.5, 'slow': -1.6,
+    'broken': -2.2, 'bug': -1.6, 'bugs': -1.6, 'crash': -2.3, 'crashes': -2.3,
+    'issue': -1.2, 'issues': -1.5, 'problem': -1.7, 'problems': -1.7,
+    'debating': -0.5, 'disappointed': -2.3, 'worst': -3.1, 'refund': -1.0,
+    'angry': -2.3, 'laggy': -1.8, 'expensive': -1.3, 'useless': -2.6,
+}
+
+NEGATIONS = {
+    'not', 'no', 'never', 'none', 'nothing', 'without', 'cannot', 'neither', 'nor',
+    "don't", 'dont', "doesn't", 'doesnt', "isn't", 'isnt', "wasn't", "aren't",
+    "won't", "can't", 'cant', "didn't", 'didnt',
+}
+
+NEGATION_WINDOW = 3        # a negator affects the next 3 tokens
+NEGATION_SCALAR = -0.74    # VADER's damped flip
+NORMALIZATION_ALPHA = 15.0
+
+TOKEN_RE = re.compile(r"[a-z']+")
+
+# bytes that can be part of a token are kept, everything else maps to a space;
+# posts are joined with a NUL token, whose key is 0
+_TOKEN_BYTES = set(b"abcdefghijklmnopqrstuvwxyz'")
+_SPACE = 32
+_TRANSLATE = bytes(c if c in _TOKEN_BYTES or c == 0 else _SPACE for c in range(256))
+_KEY_BYTES = 16              # a token's key is its first 16 bytes, longer tokens never match
+_BYTE_MASKS = np.array([(1 << (8 * k)) - 1 for k in range(9)], dtype=np.uint64)
+_MIX_1 = np.uint64(0x9E3779B97F4A7C15)   # splitmix64 constants, spread every key byte
+_MIX_2 = np.uint64(0xBF58476D1CE4E5B9)   # over the top bits that pick the table slot
+_TABLE_BITS = 16             # direct-mapped lookup table, 64k slots
+
+
+class SourceSentiment(TypedDict):
+    scores: np.ndarray     # one score per post, [-1, 1]
+    mean: float
+    positive_share: float
+    negative_share: float
+    posts: int
+
+
+def normalize(total: float, alpha: float = NORMALIZATION_ALPHA) -> float:
+    return total / math.sqrt(total * total + alpha)
+
+
+def token_key(token: str) -> tuple:
+    """(low, high) 64-bit words of the first _KEY_BYTES bytes, same as _token_keys."""
+    data = token.encode()[:_KEY_BYTES].ljust(_KEY_BYTES, b'\x00')
+    return int.from_bytes(data[:8], 'little'), int.from_bytes(data[8:], 'little')
+
+
+def _token_keys(text: bytes):
+    """Key words and length of every token in a translated byte string, in order."""
+    buf = np.frombuffer(text, dtype=np.uint8)
+    is_char = buf != _SPACE
+    padded = np.concatenate(([False], is_char, [False]))
+    edges = np.flatnonzero(padded[1:] != padded[:-1])
+    starts, lengths = edges[::2], edges[1::2] - edges[::2]
+
+    # an unaligned uint64 view at every byte offset: a token's first 16 bytes are
+    # two gathers, then the bytes past its end are masked off; no loop at all
+    data = text + bytes(_KEY_BYTES)
+    words = np.ndarray((len(data) - 7,), dtype='<u8', buffer=data, strides=(1,))
+    low = words[starts] & _BYTE_MASKS[np.minimum(lengths, 8)]
+    high = words[starts + 8] & _BYTE_MASKS[np.clip(lengths - 8, 0, 8)]
+    return low, high, lengths
+
+
+class LexiconScorer:
+    def __init__(
+        self,
+        lexicon: Dict[str, float] = LEXICON,
+        negations: Iterable[str] = NEGATIONS,
+        window: int = NEGATION_WINDOW,
+    ):
+        self.lexicon = dict(lexicon)
+        self.negations = set(negations)
+        self.window = window
+
+        # term ids: lexicon terms, then negators, then one "unknown" slot
+        terms = list(self.lexicon) + sorted(self.negations - set(self.lexicon))
+        self.vocab = {term: i for i, term in enumerate(terms)}
+        self.unknown_id = len(terms)
+        self.weights = np.zeros(len(terms) + 1)
+        self.is_negation = np.zeros(len(terms) + 1, dtype=bool)
+        for term, i in self.vocab.items():
+            self.weights[i] = self.lexicon.get(term, 0.0)
+            self.is_negation[i] = term in self.negations
+
+        # direct-mapped table: slot = top bits of a hash of the key, pick a shift
+        # with no collisions between terms, both key words are compared on lookup
+        long_terms = [t for t in terms if len(t.encode()) > _KEY_BYTES]
+        if long_terms:
+            raise ValueError(f'terms longer than {_KEY_BYTES} bytes: {long_terms}')
+        keys = np.array([token_key(t) for t in terms], dtype=np.uint64).reshape(-1, 2)
+        hashes = [int(h) for h in self._hash(keys[:, 0], keys[:, 1])]
+        for shift in range(64 - _TABLE_BITS, -1, -1):
+            slots = [(h >> shift) & ((1 << _TABLE_BITS) - 1) for h in hashes]
+            if len(set(slots)) == len(slots):
+                break
+        else:
+            raise ValueError('could not build a collision-free lexicon table')
+        self._shift = np.uint64(shift)
+        self._mask = np.uint64((1 << _TABLE_BITS) - 1)
+        # empty slots hold the all-zero key, which only the post separator has
+        self._table_low = np.zeros(1 << _TABLE_BITS, dtype=np.uint64)
+        self._table_high = np.zeros(1 << _TABLE_BITS, dtype=np.uint64)
+        self._table_id = np.full(1 << _TABLE_BITS, self.unknown_id)
+        for i, ((low, high), slot) in enumerate(zip(keys, slots)):
+            self._table_low[slot] = low
+            self._table_high[slot] = high
+            self._table_id[slot] = i
+
+    @staticmethod
+    def _hash(low: np.ndarray, high: np.ndarray) -> np.ndarray:
+        h = (low ^ (high * _MIX_1)) * _MIX_2     # uint64 wraps
+        return h ^ (h >> np.uint64(31))
+
+    def _lookup(self, low: np.ndarray, high: np.ndarray, lengths: np.ndarray) -> np.ndarray:
+        slots = ((self._hash(low, high) >> self._shift) & self._mask).astype(np.intp)
+        found = (self._table_low[slots] == low) & (self._table_high[slots] == high) & (lengths <= _KEY_BYTES)
+        return np.where(found, self._table_id[slots], self.unknown_id)
+
+    def score_batch(self, posts: List[str]) -> np.ndarray:
+        """Score every post at once, returns an array of len(posts) in [-1, 1]."""
+        if not posts:
+            return np.zeros(0)
+
+        # one buffer for the whole batch, posts separated by a NUL token
+        text = ' \x00 '.join(p.replace('\x00', ' ') for p in posts).lower()
+        low, high, lengths = _token_keys(text.encode().translate(_TRANSLATE))
+
+        is_sep = (low == 0) & (lengths == 1)
+        post_ids = np.cumsum(is_sep)
+        term_ids = self._lookup(low, high, lengths)
+
+        # last negator strictly BEFORE each token, after the last post boundary
+        position = np.arange(low.size)
+        neg_at = np.where(self.is_negation[term_ids], position, -1)
+        last_neg = np.concatenate(([-1], np.maximum.accumulate(neg_at)[:-1]))
+        last_sep = np.maximum.accumulate(np.where(is_sep, position, -1))
+        negated = (last_neg > last_sep) & (position - last_neg <= self.window)
+
+        weights = self.weights[term_ids]
+        weights = np.where(negated, weights * NEGATION_SCALAR, weights)
+
+        totals = np.bincount(post_ids, weights=weights, minlength=len(posts))
+        return totals / np.sqrt(totals * totals + NORMALIZATION_ALPHA)
+
+    def score_source(self, posts: List[str]) -> SourceSentiment:
+        """Per-post scores plus the per-source aggregate."""
+        scores = self.score_batch(posts)
+        count = len(scores)
+        return {
+            'scores': scores,
+            'mean': float(scores.mean()) if count else 0.0,
+            'positive_share': float((scores > 0.05).mean()) if count else 0.0,
+            'negative_share': float((scores < -0.05).mean()) if count else 0.0,
+            'posts': count,
+        }
+
+    # reference implementation, one post at a time (used by the benchmark)
+    def score_post(self, post: str) -> float:
+        tokens = TOKEN_RE.findall(post.lower())
+        total = 0.0
+        last_neg = None
+        for i, token in enumerate(tokens):
+            weight = self.lexicon.get(token, 0.0)
+            if last_neg is not None and i - last_neg <= self.window:
+                weight *= NEGATION_SCALAR
+            total += weight
+            if token in self.negations:
+                last_neg = i
+        return normalize(total)
+
+
+DEFAULT_SCORER = LexiconScorer()
+
+
+def sentiment_score(text: str) -> float:
+    """Score a single text in [-1, 1] with the default lexicon."""
+    return round(float(DEFAULT_SCORER.score_batch([text])[0]), 2)
+
+
+# synthetic traffic for demos / benchmarks
+_FILLER = ['the', 'new', 'update', 'app', 'really', 'is', 'so', 'and', 'today', 'my', 'phone', 'launch']
+
+
+def synthetic_posts(n: int, seed: int = 0, words: int = 30) -> List[str]:
+    rng = random.Random(seed)
+    vocab = _FILLER * 3 + list(LEXICON) + ['not', 'never', "don't"]
+    return [' '.join(rng.choices(vocab, k=words)) for _ in range(n)]
+
+
+# benchmark: vectorized batch vs per-post python loop
+# the ratio depends on the CPU and the NumPy build (2.4x to 3.3x seen so far),
+# so it prints both and keeps the best of `repeat` runs of each path
+def benchmark(n_posts: int = 20000, repeat: int = 3):
+    scorer = LexiconScorer()
+    posts = synthetic_posts(n_posts)
+
+    def best(fn):
+        times = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            result = fn()
+            times.append(time.perf_counter() - start)
+        return result, min(times)
+
+    loop_scores, loop_time = best(lambda: np.array([scorer.score_post(p) for p in posts]))
+    batch_scores, batch_time = best(lambda: scorer.score_batch(posts))
+
+    assert np.allclose(loop_scores, batch_scores), 'batch and loop scores differ'
+
+    print(f'\n=== Lexicon sentiment on {n_posts} posts (best of {repeat}) ===\n')
+    print(f'python {platform.python_version()}, numpy {np.__version__}, {platform.machine()} {platform.processor()}'.rstrip())
+    print('per-post loop :', f'{loop_time:.4f}s')
+    print('numpy batch   :', f'{batch_time:.4f}s')
+    print('speedup       :', f'{loop_time / batch_time:.1f}x (machine dependent)')
+
+
+# demo
+def main():
+    posts = [
+        'I love the new camera, it is great',
+        'not good at all, the app is slow and laggy',
+        "I don't hate it",
+        'Reddit users debating performance issues.',
+    ]
+    result = DEFAULT_SCORER.score_source(posts)
+    for post, score in zip(posts, result['scores']):
+        print(f'{score:+.2f}  {post}')
+    print('source mean:', round(result['mean'], 2))
+
+    benchmark()
+
+
+if __name__ == '__main__':
+    main()
@@ -3,6 +3,8 @@ from langgraph.graph import StateGraph, END
 from langchain_core.runnables import RunnableConfig
 import time
 
+from graph_optimizer import optimize_graph
+
 # state
 class TicketState(TypedDict):
     text: str
@@ -15,14 +17,19 @@ class TicketState(TypedDict):
     triage_time: float
     
     
+# helpers
+def normalize_ticket_text(raw: str) -> str:
+    # collapse whitespace + lowercase, also the key of ticket_cache.py
+    return ' '.join(raw.strip().split()).lower()
+
+
 # agents
 def preprocess_agent(state: TicketState) -> Dict[str, Any]:
     start = time.time()
     raw = state['text']
     
-    cleaned = ' '.join(raw.strip().split())
-    cleaned_lower = cleaned.lower()
-    length = len(cleaned)
+    cleaned_lower = normalize_ticket_text(raw)
+    length = len(cleaned_lower)
     
     return {
         'cleaned_text': cleaned_lower,
@@ -64,7 +71,7 @@ def triage_agent(state: TicketState) -> Dict[str, Any]:
 
 
 # build graph
-def build_sequential_ticket_graph():
+def build_sequential_ticket_graph(optimize: bool = False):
     graph = StateGraph(TicketState)
     
     graph.add_node('preprocess', preprocess_agent)
@@ -79,6 +86,9 @@ def build_sequential_ticket_graph():
     graph.add_edge('urgency', 'triage')
     graph.add_edge('triage', END)
     
+    if optimize:
+        # all three only read the state and return an update -> one fused node
+        optimize_graph(graph, pure=['preprocess', 'urgency', 'triage'])
     
     return graph.compile()
 
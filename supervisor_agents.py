@@ -1,7 +1,8 @@
-from typing import TypedDict, Dict, Any
+from typing import TypedDict, Dict, Any, List, Optional, Annotated
 from langgraph.graph import StateGraph, END
-from langgraph.types import Command
+from langgraph.types import Command, Send
 from langchain_core.runnables import RunnableConfig
+import time
 
 
 # state
@@ -47,17 +48,28 @@ TOOLS = {
 }
 
 
+# routing rules
+ROUTE_KEYWORDS = {
+    "billing": ["invoice", "refund", "charged"],
+    "technical": ["login", "password", "bug", "error"],
+}
+
+
+def keyword_route(text: str) -> str:
+    return keyword_routes(text)[0]
+
+
+def keyword_routes(text: str) -> List[str]:
+    """Every tool whose keywords appear in the text, "general" if none do."""
+    text = text.lower()
+    matched = [name for name, words in ROUTE_KEYWORDS.items() if any(w in text for w in words)]
+    return matched or ["general"]
+
+
 # supervisor agent
 def supervisor_agent(state: TicketState):
-    text = state["user_msg"].lower()
-
     # Decide which tool to call
-    if any(w in text for w in ["invoice", "refund", "charged"]):
-        selected = "billing"
-    elif any(w in text for w in ["login", "password", "bug", "error"]):
-        selected = "technical"
-    else:
-        selected = "general"
+    selected = keyword_route(state["user_msg"])
 
     print(f"Supervisor: routing to {selected} tool")
 
@@ -68,11 +80,77 @@ def supervisor_agent(state: TicketState):
     return tool(state["user_msg"])
 
 
+# semantic supervisor
+# router = semantic_router.SemanticRouter over the TOOLS labels, it catches
+# paraphrases the keywords miss ("I paid two times", "cannot sign in").
+# When it isn't confident it abstains and the keyword rules decide.
+def make_semantic_supervisor(router):
+    def semantic_supervisor_agent(state: TicketState):
+        selected, confidence = router.route(state["user_msg"])
+        if selected not in TOOLS:
+            selected = keyword_route(state["user_msg"])
+            print(f"Supervisor: low confidence ({confidence:.2f}), keyword rules -> {selected} tool")
+        else:
+            print(f"Supervisor: routing to {selected} tool (confidence {confidence:.2f})")
+
+        return TOOLS[selected](state["user_msg"])
+
+    return semantic_supervisor_agent
+
+
+# multi-label supervisor
+# A ticket about a refund AND a login error goes to billing and technical at
+# once: one Send per matching tool, all of them run in the same superstep (in
+# parallel threads), so the ticket takes as long as the slowest tool.
+# Their category / response updates are merged by the reducers below instead
+# of the last write winning.
+def merge_categories(current: str, new: str) -> str:
+    labels = [c for c in current.split("+") if c]
+    labels += [c for c in new.split("+") if c and c not in labels]
+    return "+".join(labels)
+
+
+def merge_responses(current: str, new: str) -> str:
+    return "\n".join(r for r in [current, new] if r)
+
+
+class MultiTicketState(TypedDict):
+    user_msg: str
+    category: Annotated[str, merge_categories]
+    response: Annotated[str, merge_responses]
+
+
+def multi_supervisor_agent(state: MultiTicketState) -> Command:
+    selected = keyword_routes(state["user_msg"])
+    print(f"Supervisor: routing to {', '.join(selected)} tools")
+
+    return Command(goto=[Send(name, {"user_msg": state["user_msg"]}) for name in selected])
+
+
+def make_tool_node(tool):
+    def tool_node(state: MultiTicketState) -> Command:
+        return tool(state["user_msg"])
+    return tool_node
+
+
 # build graph
-def build_supervisor_graph():
+# multi_label=True -> every matching tool answers (keyword rules only)
+# tools overrides TOOLS, e.g. with slower stand-ins for a latency test
+def build_supervisor_graph(router=None, multi_label: bool = False, tools=None):
+    if multi_label:
+        if router is not None:
+            raise ValueError("multi_label uses the keyword rules, it can't take a router")
+        graph = StateGraph(MultiTicketState)
+        graph.add_node("supervisor", multi_supervisor_agent)
+        for name, tool in (tools or TOOLS).items():
+            graph.add_node(name, make_tool_node(tool))
+        graph.set_entry_point("supervisor")
+        return graph.compile()
+
     graph = StateGraph(TicketState)
 
-    graph.add_node("supervisor", supervisor_agent)
+    supervisor = supervisor_agent if router is None else make_semantic_supervisor(router)
+    graph.add_node("supervisor", supervisor)
 
     # entry point
     graph.set_entry_point("supervisor")
@@ -104,6 +182,53 @@ def main():
     print("Category     :", result["category"])
     print("Response     :", result["response"])
 
+    # a paraphrase the keyword rules send to the FAQ bot
+    from semantic_router import default_router
+
+    paraphrase = "I paid two times for a single order"
+    print("\n=== Keyword vs semantic routing ===\n")
+    for label, router in [("keyword", None), ("semantic", default_router())]:
+        result = build_supervisor_graph(router).invoke(
+            {"user_msg": paraphrase, "category": "", "response": ""}, config=RunnableConfig()
+        )
+        print(f"{label:9s}: {paraphrase!r} -> {result['category']}")
+
+    # a ticket with two problems
+    both = "I was charged twice and need a refund, and now I get an error on login."
+    print("\n=== Single vs multi-label ===\n")
+    for label, app in [("single", build_supervisor_graph()), ("multi", build_supervisor_graph(multi_label=True))]:
+        result = app.invoke({"user_msg": both, "category": "", "response": ""}, config=RunnableConfig())
+        print(f"{label:6s}: category={result['category']}")
+        print(f"        response={result['response']!r}")
+
+    benchmark_multi_label()
+
+
+# benchmark: tools that take time (a ticket system / LLM call behind each one)
+def benchmark_multi_label(latency: Optional[Dict[str, float]] = None):
+    latency = latency or {"billing": 0.3, "technical": 0.2, "general": 0.1}
+
+    def slow(name, tool):
+        def run(input: str) -> Command:
+            time.sleep(latency[name])
+            return tool(input)
+        return run
+
+    slow_tools = {name: slow(name, tool) for name, tool in TOOLS.items()}
+    app = build_supervisor_graph(multi_label=True, tools=slow_tools)
+    both = "Refund my invoice please, the login page shows an error."
+
+    start = time.time()
+    result = app.invoke({"user_msg": both, "category": "", "response": ""}, config=RunnableConfig())
+    wall = time.time() - start
+    selected = keyword_routes(both)
+
+    print(f"\n=== Multi-label latency, tools {latency} ===\n")
+    print("category      :", result["category"])
+    print("sum of tools  :", f"{sum(latency[n] for n in selected):.2f}s")
+    print("slowest tool  :", f"{max(latency[n] for n in selected):.2f}s")
+    print("multi-label   :", f"{wall:.2f}s")
+
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
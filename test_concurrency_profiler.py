@@ -0,0 +1,18 @@
+import contextlib
+import io
+
+import pytest
+from langchain_core.runnables import RunnableConfig
+
+from concurrency_profiler import best_profile, check, profiled_graphs
+
+
+GRAPHS = profiled_graphs()
+
+
+@pytest.mark.parametrize('name, graph, state', GRAPHS, ids=[name for name, _, _ in GRAPHS])
+def test_parallel_graphs_keep_their_concurrency(name, graph, state):
+    with contextlib.redirect_stdout(io.StringIO()):   # the agents print
+        profile = best_profile(graph, state, RunnableConfig(parallel=True))
+    assert profile.fanout_steps(), f'{name}: branches ran in separate supersteps'
+    assert check(profile) == []
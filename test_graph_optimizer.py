@@ -0,0 +1,58 @@
+from langchain_core.runnables import RunnableConfig
+
+import graph_optimizer
+from graph_optimizer import _strip_times, optimize_graph
+
+
+TEXT = 'Hi team, I was charged twice on my invoice, I need a refund asap. This is urgent.'
+
+
+def _social_state():
+    return {
+        'twitter_text': '', 'instagram_text': '', 'reddit_text': '',
+        'twitter_sentiment': 0.0, 'instagram_sentiment': 0.0, 'reddit_sentiment': 0.0,
+        'report': '',
+    }
+
+
+def _assert_same_final_state(build, state):
+    plain, optimized = build(), build(optimize=True)
+    assert len(optimized.builder.nodes) < len(plain.builder.nodes)
+    assert _strip_times(plain.invoke(state, config=RunnableConfig())) == \
+           _strip_times(optimized.invoke(state, config=RunnableConfig()))
+
+
+def test_sequential_graph_same_final_state():
+    from sequencial_agents import build_sequential_ticket_graph
+    from ticket_cache import initial_state
+
+    _assert_same_final_state(build_sequential_ticket_graph, initial_state('sequential', TEXT))
+
+
+def test_parallel_graph_same_final_state():
+    from parallel_agents import build_parallel_ticket_graph
+    from ticket_cache import initial_state
+
+    _assert_same_final_state(build_parallel_ticket_graph, initial_state('parallel', TEXT))
+
+
+def test_aggregator_graph_same_final_state():
+    from aggregator_agents import build_aggregator_graph
+
+    _assert_same_final_state(build_aggregator_graph, _social_state())
+
+
+def test_untested_langgraph_version_falls_back_to_plain_graph(monkeypatch):
+    from sequencial_agents import build_sequential_ticket_graph
+    from ticket_cache import initial_state
+
+    monkeypatch.setattr(graph_optimizer, 'langgraph_version', lambda: '0.2.0')
+    plain = build_sequential_ticket_graph()
+    report = optimize_graph(plain.builder, pure=list(plain.builder.nodes))
+    assert report['skipped'] == 'untested langgraph version 0.2.0'
+
+    fallback = build_sequential_ticket_graph(optimize=True)
+    assert sorted(fallback.builder.nodes) == sorted(plain.builder.nodes)
+    state = initial_state('sequential', TEXT)
+    assert _strip_times(plain.invoke(state, config=RunnableConfig())) == \
+           _strip_times(fallback.invoke(state, config=RunnableConfig()))
@@ -0,0 +1,38 @@
+import contextlib
+import io
+
+import pytest
+from langchain_core.runnables import RunnableConfig
+
+from ticket_cache import ResultCache, build_cached_ticket_graphs, initial_state, without_timings
+
+
+TEXT = 'I was charged twice on my invoice, need a refund asap.'
+
+
+@pytest.fixture(scope='module')
+def graphs():
+    return build_cached_ticket_graphs(ResultCache())
+
+
+@pytest.mark.parametrize('kind', ['parallel', 'sequential', 'network'])
+def test_cached_state_equals_uncached_state(graphs, kind):
+    graph = graphs[kind]
+    state = initial_state(kind, TEXT)
+    with contextlib.redirect_stdout(io.StringIO()):   # network_agents prints
+        uncached = graph.graph.invoke(state, config=RunnableConfig())
+        miss = graph.invoke(state, config=RunnableConfig())
+        hit = graph.invoke(state, config=RunnableConfig())
+
+    assert without_timings(miss) == without_timings(uncached)
+    assert without_timings(hit) == without_timings(uncached)
+
+
+def test_network_hit_keeps_text_appended_by_the_graph(graphs):
+    state = initial_state('network', 'I was charged on my invoice')
+    with contextlib.redirect_stdout(io.StringIO()):
+        miss = graphs['network'].invoke(state, config=RunnableConfig())
+        hit = graphs['network'].invoke(state, config=RunnableConfig())
+
+    assert miss['text'] == hit['text'] == 'I was charged on my invoice Account ID: 12345'
+    assert hit['scan_offset'] == len(hit['text'])
@@ -0,0 +1,244 @@
+from typing import Any, Callable, Dict, Optional
+from collections import OrderedDict
+from langchain_core.runnables import RunnableConfig
+import hashlib
+import json
+import pickle
+import threading
+import time
+
+from sequencial_agents import normalize_ticket_text
+
+# content-addressed result cache for ticket graphs:
+# - key = sha256 of (graph namespace, normalized ticket text, the other input fields),
+#   so retries / forwarded emails / extra whitespace or casing hit the same entry
+# - on a hit the graph is NOT run, the stored final state is returned
+# - LRU order (OrderedDict), per-entry TTL, and a cap on the total stored bytes
+# - entries are stored pickled: the byte size is exact and callers can't mutate the cache
+# - CachedGraph normalizes only to build the key: on a miss the graph runs on the
+#   caller's input and its real final state is stored and returned unchanged; a
+#   hit returns the state of the first ticket stored under that key
+
+
+def ticket_key(namespace: str, state: Dict[str, Any], text_field: str = 'text') -> str:
+    """Cache key of an input state: normalized text + every other input field."""
+    others = {k: v for k, v in state.items() if k != text_field}
+    payload = json.dumps(
+        [namespace, normalize_ticket_text(state[text_field]), others],
+        sort_keys=True,
+        default=str,
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+class ResultCache:
+    def __init__(
+        self,
+        max_entries: int = 10_000,
+        max_bytes: int = 64 * 1024 * 1024,
+        ttl: Optional[float] = 3600.0,          # seconds, None = never expires
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.clock = clock
+
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()   # key -> (expires_at, blob)
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+        self.hits = 0
+        self.misses = 0
+        self.expired = 0
+        self.evicted = 0
+        self.rejected = 0       # single values bigger than max_bytes
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, blob = entry
+            if expires_at is not None and self.clock() >= expires_at:
+                self._remove(key)
+                self.expired += 1
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)   # most recently used
+            self.hits += 1
+        return pickle.loads(blob)
+
+    def put(self, key: str, value: Dict[str, Any]):
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            if len(blob) > self.max_bytes:
+                self.rejected += 1
+                return
+
+            expires_at = self.clock() + self.ttl if self.ttl is not None else None
+            self._entries[key] = (expires_at, blob)
+            self._bytes += len(blob)
+
+            # evict least recently used until both caps hold
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                oldest = next(iter(self._entries))
+                self._remove(oldest)
+                self.evicted += 1
+
+    def _remove(self, key: str):
+        _, blob = self._entries.pop(key)
+        self._bytes -= len(blob)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                'entries': len(self._entries),
+                'bytes': self._bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'hit_rate': self.hits / lookups if lookups else 0.0,
+                'expired': self.expired,
+                'evicted': self.evicted,
+                'rejected': self.rejected,
+            }
+
+
+class CachedGraph:
+    """Wraps a compiled graph: invoke() returns the cached final state on a hit
+    and only runs the graph (on the caller's input) on a miss. Everything else
+    is forwarded to the graph."""
+
+    def __init__(self, graph, cache: ResultCache, namespace: str, text_field: str = 'text'):
+        self.graph = graph
+        self.cache = cache
+        self.namespace = namespace
+        self.text_field = text_field
+
+    def invoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs):
+        key = ticket_key(self.namespace, input, self.text_field)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = self.graph.invoke(input, config=config, **kwargs)
+        self.cache.put(key, result)
+        return result
+
+    async def ainvoke(self, input: Dict[str, Any], config: Optional[RunnableConfig] = None, **kwargs):
+        key = ticket_key(self.namespace, input, self.text_field)
+        cached = self.cache.get(key)
+        if cached is not None:
+            return cached
+
+        result = await self.graph.ainvoke(input, config=config, **kwargs)
+        self.cache.put(key, result)
+        return result
+
+    def __getattr__(self, name):
+        return getattr(self.graph, name)
+
+
+# cached versions of the three ticket graphs, one shared cache
+def build_cached_ticket_graphs(cache: Optional[ResultCache] = None) -> Dict[str, CachedGraph]:
+    from parallel_agents import build_parallel_ticket_graph
+    from sequencial_agents import build_sequential_ticket_graph
+    from network_agents import build_network_graph
+
+    cache = cache or ResultCache()
+    return {
+        'parallel': CachedGraph(build_parallel_ticket_graph(), cache, 'parallel'),
+        'sequential': CachedGraph(build_sequential_ticket_graph(), cache, 'sequential'),
+        'network': CachedGraph(build_network_graph(), cache, 'network'),
+    }
+
+
+def initial_state(kind: str, text: str) -> Dict[str, Any]:
+    if kind == 'parallel':
+        return {
+            'text': text, 'is_spam': False, 'urgency': '', 'category': '',
+            'spam_time': 0.0, 'urgency_time': 0.0, 'category_time': 0.0, 'cancelled': [],
+        }
+    if kind == 'sequential':
+        return {
+            'text': text, 'cleaned_text': '', 'text_length': 0, 'urgency': '', 'queue': '',
+            'preprocess_time': 0.0, 'urgency_time': 0.0, 'triage_time': 0.0,
+        }
+    if kind == 'network':
+        return {
+            'text': text, 'category': '', 'has_required_info': False,
+            'auto_resolved': False, 'escalated': False, 'history': '',
+            'scan_offset': 0, 'scan_tail': '', 'scan_hits': [],
+        }
+    raise ValueError(f'unknown graph kind: {kind}')
+
+
+def without_timings(state: Dict[str, Any]) -> Dict[str, Any]:
+    return {k: v for k, v in state.items() if not k.endswith('_time')}
+
+
+# demo
+TICKETS = [
+    'Hi team, the system is down and we cannot login. Please fix this immediately.',
+    'I was charged twice on my invoice, account id 991, need a refund asap.',
+    'Getting an error when I reset my password, order id 17.',
+    'How do I change my profile picture?',
+]
+
+
+def duplicated_stream(n: int):
+    # duplicates like a real inbox: retries, forwards, copy-paste with different spacing/casing
+    variants = [
+        lambda t: t,
+        lambda t: t.upper(),
+        lambda t: '  ' + t.replace(' ', '\n  ') + '\n',
+        lambda t: 'Fwd: ' + t,     # different text -> a real miss
+    ]
+    return [variants[(i // len(TICKETS)) % len(variants)](TICKETS[i % len(TICKETS)]) for i in range(n)]
+
+
+def main():
+    import contextlib
+    import io
+
+    stream = duplicated_stream(200)
+    cache = ResultCache(max_entries=1000, ttl=600)
+    cached = build_cached_ticket_graphs(cache)
+
+    print('\n=== Cached ticket graphs ===\n')
+    print(f"{'graph':12s} {'uncached':>10s} {'cached':>10s} {'speedup':>8s}")
+    for kind, graph in cached.items():
+        # network_agents prints from its nodes, keep the table readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.time()
+            uncached = [graph.graph.invoke(initial_state(kind, t), config=RunnableConfig()) for t in stream]
+            uncached_time = time.time() - start
+
+            start = time.time()
+            results = [graph.invoke(initial_state(kind, t), config=RunnableConfig()) for t in stream]
+            cached_time = time.time() - start
+
+        # a hit returns the full final state of the first ticket with that key, minus timings
+        first: Dict[str, Dict[str, Any]] = {}
+        for t, a, b in zip(stream, uncached, results):
+            expected = first.setdefault(ticket_key(kind, initial_state(kind, t)), a)
+            assert without_timings(expected) == without_timings(b), 'cached result differs'
+
+        print(f'{kind:12s} {uncached_time:9.3f}s {cached_time:9.3f}s {uncached_time / cached_time:7.1f}x')
+
+    print('\ncache stats:', cache.stats())
+
+
+if __name__ == '__main__':
+    main()
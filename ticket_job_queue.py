@@ -0,0 +1,368 @@
+from typing import Any, Callable, Dict, List, Optional, TypedDict
+from multiprocessing import Process
+from langchain_core.runnables import RunnableConfig
+import contextlib
+import io
+import json
+import os
+import sqlite3
+import tempfile
+import time
+
+from ticket_cache import initial_state
+
+# durable job queue for the ticket graphs, one SQLite file, no broker:
+# - WAL mode: readers don't block the writer, many worker processes can share the file
+# - producers enqueue tickets, workers claim a BATCH of jobs in one write transaction
+#   (BEGIN IMMEDIATE), run the graph, write each result back
+# - a claim is a lease: if the worker dies, the lease runs out after visibility_timeout
+#   and the job is handed out again -> at-least-once delivery, results must be idempotent
+# - a live worker renews the leases of its batch between jobs (extend_many), so only one
+#   job slower than visibility_timeout can be handed out twice
+# - a failed job is retried with backoff; after max_attempts it goes to the dead letters
+# - everything is on disk, a restarted producer / worker picks up where it was
+
+READY = 'ready'
+CLAIMED = 'claimed'
+DONE = 'done'
+DEAD = 'dead'
+
+GRAPH_KINDS = ('network', 'parallel')
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS jobs (
+    id            INTEGER PRIMARY KEY AUTOINCREMENT,
+    kind          TEXT    NOT NULL,
+    payload       TEXT    NOT NULL,
+    status        TEXT    NOT NULL DEFAULT 'ready',
+    attempts      INTEGER NOT NULL DEFAULT 0,
+    available_at  REAL    NOT NULL,
+    lease_expires REAL,
+    claimed_by    TEXT,
+    result        TEXT,
+    error         TEXT,
+    created_at    REAL    NOT NULL,
+    updated_at    REAL    NOT NULL
+);
+CREATE INDEX IF NOT EXISTS jobs_ready ON jobs (status, available_at);
+CREATE INDEX IF NOT EXISTS jobs_lease ON jobs (status, lease_expires);
+'''
+
+
+class Job(TypedDict):
+    id: int
+    kind: str
+    payload: Dict[str, Any]
+    attempts: int
+
+
+class JobQueue:
+    def __init__(
+        self,
+        path: str,
+        visibility_timeout: float = 30.0,   # seconds a claim is valid without complete()/extend()
+        max_attempts: int = 3,
+        retry_delay: float = 0.5,           # backoff base, doubles with every attempt
+        clock: Callable[[], float] = time.time,
+    ):
+        self.path = path
+        self.visibility_timeout = visibility_timeout
+        self.max_attempts = max_attempts
+        self.retry_delay = retry_delay
+        self.clock = clock
+
+        # autocommit, transactions are opened explicitly
+        self.db = sqlite3.connect(path, timeout=30.0, isolation_level=None)
+        self.db.execute('PRAGMA journal_mode=WAL')
+        self.db.execute('PRAGMA synchronous=NORMAL')   # durable across process crashes in WAL mode
+        self.db.executescript(SCHEMA)
+
+    def close(self):
+        self.db.close()
+
+    @contextlib.contextmanager
+    def _write(self):
+        # take the write lock up front, so two workers can't claim the same rows
+        self.db.execute('BEGIN IMMEDIATE')
+        try:
+            yield self.db
+        except BaseException:
+            self.db.execute('ROLLBACK')
+            raise
+        self.db.execute('COMMIT')
+
+    # producers
+    def enqueue(self, kind: str, text: str, delay: float = 0.0) -> int:
+        return self.enqueue_many(kind, [text], delay)[0]
+
+    def enqueue_many(self, kind: str, texts: List[str], delay: float = 0.0) -> List[int]:
+        now = self.clock()
+        ids = []
+        with self._write() as db:
+            for text in texts:
+                cur = db.execute(
+                    'INSERT INTO jobs (kind, payload, available_at, created_at, updated_at) VALUES (?, ?, ?, ?, ?)',
+                    (kind, json.dumps({'text': text}), now + delay, now, now),
+                )
+                ids.append(cur.lastrowid)
+        return ids
+
+    # workers
+    def claim(self, worker_id: str, batch: int = 16) -> List[Job]:
+        """Lease up to `batch` jobs: ready ones, or claimed ones whose lease ran out."""
+        now = self.clock()
+        with self._write() as db:
+            rows = db.execute(
+                '''SELECT id, kind, payload, attempts, status FROM jobs
+                   WHERE (status = ? AND available_at <= ?) OR (status = ? AND lease_expires <= ?)
+                   ORDER BY id LIMIT ?''',
+                (READY, now, CLAIMED, now, batch),
+            ).fetchall()
+
+            jobs: List[Job] = []
+            for job_id, kind, payload, attempts, status in rows:
+                if status == CLAIMED and attempts >= self.max_attempts:
+                    # the lease ran out on the last attempt: the worker keeps dying on it
+                    db.execute(
+                        'UPDATE jobs SET status = ?, error = ?, claimed_by = NULL, updated_at = ? WHERE id = ?',
+                        (DEAD, 'visibility timeout expired', now, job_id),
+                    )
+                    continue
+                db.execute(
+                    '''UPDATE jobs SET status = ?, attempts = attempts + 1, claimed_by = ?,
+                       lease_expires = ?, updated_at = ? WHERE id = ?''',
+                    (CLAIMED, worker_id, now + self.visibility_timeout, now, job_id),
+                )
+                jobs.append({'id': job_id, 'kind': kind, 'payload': json.loads(payload), 'attempts': attempts + 1})
+        return jobs
+
+    def extend(self, job_id: int, worker_id: str) -> bool:
+        """Heartbeat for long jobs, False if the lease is already lost."""
+        return self.extend_many(worker_id, [job_id]) == [job_id]
+
+    def extend_many(self, worker_id: str, job_ids: List[int]) -> List[int]:
+        """Heartbeat for a claimed batch in one transaction, returns the ids still held."""
+        now = self.clock()
+        held = []
+        with self._write() as db:
+            for job_id in job_ids:
+                cur = db.execute(
+                    'UPDATE jobs SET lease_expires = ?, updated_at = ? WHERE id = ? AND status = ? AND claimed_by = ?',
+                    (now + self.visibility_timeout, now, job_id, CLAIMED, worker_id),
+                )
+                if cur.rowcount == 1:
+                    held.append(job_id)
+        return held
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Store the result. False if the lease was lost (the job went to another worker)."""
+        return self.complete_many(worker_id, [(job_id, result)]) == 1
+
+    def complete_many(self, worker_id: str, results: List[tuple]) -> int:
+        now = self.clock()
+        done = 0
+        with self._write() as db:
+            for job_id, result in results:
+                cur = db.execute(
+                    '''UPDATE jobs SET status = ?, result = ?, error = NULL, lease_expires = NULL, updated_at = ?
+                       WHERE id = ? AND status = ? AND claimed_by = ?''',
+                    (DONE, json.dumps(result, default=str), now, job_id, CLAIMED, worker_id),
+                )
+                done += cur.rowcount
+        return done
+
+    def fail(self, job_id: int, worker_id: str, error: str) -> str:
+        """Retry later with backoff, or dead-letter after max_attempts. Returns the new status."""
+        now = self.clock()
+        with self._write() as db:
+            row = db.execute(
+                'SELECT attempts FROM jobs WHERE id = ? AND status = ? AND claimed_by = ?',
+                (job_id, CLAIMED, worker_id),
+            ).fetchone()
+            if row is None:
+                return 'lost'
+            attempts = row[0]
+            status = DEAD if attempts >= self.max_attempts else READY
+            db.execute(
+                '''UPDATE jobs SET status = ?, error = ?, claimed_by = NULL, lease_expires = NULL,
+                   available_at = ?, updated_at = ? WHERE id = ?''',
+                (status, error, now + self.retry_delay * 2 ** (attempts - 1), now, job_id),
+            )
+        return status
+
+    # inspection
+    def counts(self) -> Dict[str, int]:
+        rows = self.db.execute('SELECT status, COUNT(*) FROM jobs GROUP BY status').fetchall()
+        return {status: 0 for status in (READY, CLAIMED, DONE, DEAD)} | dict(rows)
+
+    def pending(self) -> int:
+        counts = self.counts()
+        return counts[READY] + counts[CLAIMED]
+
+    def results(self) -> Dict[int, Dict[str, Any]]:
+        rows = self.db.execute('SELECT id, result FROM jobs WHERE status = ?', (DONE,)).fetchall()
+        return {job_id: json.loads(result) for job_id, result in rows}
+
+    def dead_letters(self) -> List[Dict[str, Any]]:
+        rows = self.db.execute(
+            'SELECT id, kind, payload, attempts, error FROM jobs WHERE status = ? ORDER BY id', (DEAD,)
+        ).fetchall()
+        return [
+            {'id': job_id, 'kind': kind, 'payload': json.loads(payload), 'attempts': attempts, 'error': error}
+            for job_id, kind, payload, attempts, error in rows
+        ]
+
+    def requeue_dead(self, job_ids: Optional[List[int]] = None) -> int:
+        """Give dead letters a fresh set of attempts (e.g. after a fix was deployed)."""
+        now = self.clock()
+        with self._write() as db:
+            query = 'UPDATE jobs SET status = ?, attempts = 0, error = NULL, available_at = ?, updated_at = ? WHERE status = ?'
+            params: list = [READY, now, now, DEAD]
+            if job_ids is not None:
+                query += f" AND id IN ({','.join('?' * len(job_ids))})"
+                params += list(job_ids)
+            return db.execute(query, params).rowcount
+
+
+# running the ticket graphs
+_GRAPHS: Dict[str, Any] = {}   # compiled once per worker process
+
+
+def get_graph(kind: str):
+    if kind not in _GRAPHS:
+        if kind == 'network':
+            from network_agents import build_network_graph
+            _GRAPHS[kind] = build_network_graph()
+        elif kind == 'parallel':
+            from parallel_agents import build_parallel_ticket_graph
+            _GRAPHS[kind] = build_parallel_ticket_graph()
+        else:
+            raise ValueError(f'unknown graph kind: {kind}')
+    return _GRAPHS[kind]
+
+
+def run_ticket_job(job: Job) -> Dict[str, Any]:
+    graph = get_graph(job['kind'])
+    # network_agents prints from its nodes
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = graph.invoke(initial_state(job['kind'], job['payload']['text']), config=RunnableConfig())
+    return {k: v for k, v in result.items() if not k.endswith('_time')}
+
+
+def worker_loop(
+    path: str,
+    worker_id: str,
+    batch: int = 16,
+    visibility_timeout: float = 30.0,
+    max_attempts: int = 3,
+    poll_interval: float = 0.05,
+    stop_when_empty: bool = True,
+    handler: Callable[[Job], Dict[str, Any]] = run_ticket_job,
+) -> int:
+    """Claim -> run -> write back until the queue is drained. Returns the jobs completed."""
+    queue = JobQueue(path, visibility_timeout=visibility_timeout, max_attempts=max_attempts)
+    completed = 0
+    try:
+        while True:
+            jobs = queue.claim(worker_id, batch)
+            if not jobs:
+                if stop_when_empty and queue.pending() == 0:
+                    return completed
+                time.sleep(poll_interval)   # other leases may still expire
+                continue
+
+            # the whole batch was leased at claim time: renew the leases still held
+            # (waiting and finished-but-unwritten jobs) every visibility_timeout / 3,
+            # so a slow batch isn't handed out again while this worker is working on it
+            results = []
+            renewed = time.monotonic()
+            for i, job in enumerate(jobs):
+                if time.monotonic() - renewed >= visibility_timeout / 3:
+                    held = set(queue.extend_many(worker_id, [j['id'] for j in jobs[i:]] + [r[0] for r in results]))
+                    renewed = time.monotonic()
+                    results = [r for r in results if r[0] in held]
+                    if job['id'] not in held:
+                        continue   # lease already gone, another worker has it
+                try:
+                    results.append((job['id'], handler(job)))
+                except Exception as e:
+                    queue.fail(job['id'], worker_id, f'{type(e).__name__}: {e}')
+            # one write transaction for the whole batch
+            completed += queue.complete_many(worker_id, results)
+    finally:
+        queue.close()
+
+
+def run_workers(path: str, workers: int = 4, **kwargs) -> float:
+    """Drain the queue with `workers` processes, returns the wall-clock seconds."""
+    start = time.time()
+    processes = [
+        Process(target=worker_loop, args=(path, f'worker-{i}'), kwargs=kwargs)
+        for i in range(workers)
+    ]
+    for p in processes:
+        p.start()
+    for p in processes:
+        p.join()
+    return time.time() - start
+
+
+# demo
+TICKETS = [
+    'Hi team, the system is down and we cannot login. Please fix this immediately.',
+    'I was charged twice on my invoice, account id 991, need a refund asap.',
+    'Getting an error when I reset my password, order id 17.',
+    'How do I change my profile picture?',
+    'Click here to win money, free gift inside!',
+]
+
+
+def fill(queue: JobQueue, n: int):
+    for kind in GRAPH_KINDS:
+        queue.enqueue_many(kind, [f'{TICKETS[i % len(TICKETS)]} (ref {i})' for i in range(n // 2)])
+
+
+def main():
+    workdir = tempfile.mkdtemp(prefix='ticket_queue_')
+
+    # 1. at-least-once: a worker dies holding a batch, the leases run out, another worker finishes
+    path = os.path.join(workdir, 'crash.db')
+    queue = JobQueue(path, visibility_timeout=0.5)
+    fill(queue, 20)
+    queue.enqueue('parallel', None)   # malformed ticket -> fails every attempt
+    lost = queue.claim('crashed-worker', batch=8)
+    queue.close()                     # "restart": everything below reopens the file
+
+    print('\n=== Crash + restart ===\n')
+    print(f'crashed-worker took {len(lost)} jobs and died')
+    worker_loop(path, 'worker-0', visibility_timeout=0.5)
+
+    queue = JobQueue(path)
+    results = queue.results()
+    print('counts      :', queue.counts())
+    print('redelivered :', sum(1 for job in lost if job['id'] in results), 'of', len(lost))
+    for dead in queue.dead_letters():
+        print(f"dead letter : job {dead['id']} after {dead['attempts']} attempts -> {dead['error']}")
+    queue.close()
+
+    # 2. scaling across cores (only up to os.cpu_count())
+    print(f'\n=== Throughput, 2000 tickets, {os.cpu_count()} cores ===\n')
+    print(f"{'workers':>7s} {'wall s':>7s} {'jobs/s':>8s}")
+    for workers in (1, 2, 4):
+        path = os.path.join(workdir, f'scale-{workers}.db')
+        queue = JobQueue(path)
+        fill(queue, 2000)
+        queue.close()
+
+        wall = run_workers(path, workers)
+        queue = JobQueue(path)
+        counts = queue.counts()
+        queue.close()
+        assert counts['done'] == 2000, counts
+        print(f'{workers:7d} {wall:7.2f} {2000 / wall:8.1f}')
+
+    print('\ndatabases in', workdir)
+
+
+if __name__ == '__main__':
+    main()